@@ -4,20 +4,20 @@ Created on Fri May 10 14:56:29 2024
 
 @author: Romain Perrier
 """
-import random as rd
+import asyncio
+import copy
+import inspect
 import numpy as np
-import scipy.stats as stats
 import time
-import choix
 
-from itertools import combinations, permutations
-
-from .util import Rescale, SSR, ready, WindowManager
-from .selection import MI, roulette
+from .util import Rescale, SSR, zscore, run_session
+from .estimation import BradleyTerryModel
+from .selection import MI_pairs_probabilities, combinations_index, window_candidates, RouletteSampler, SelectionState
+from .speculation import speculation_executor
 
 ###############################         FUNCTIONS       ############################################
 
-def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assessment_method, nb_assessment, window):
+def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assessment_method, nb_assessment, window, index = None, rng = None):
     """
     This function is used to do the assessment on a Pair and return the tuple (Max, Min). In the format (int, int)
 
@@ -25,8 +25,8 @@ def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assess
     ----------
     items : list of string
         A list of strings representing the items to be assessed.
-    pair : list of string
-        A list of strings representing the pair of items being assessed.
+    pair : list of int
+        A list of int representing the id, the position in the `items` list, of the pair of items being assessed.
     id_judge : int
         The id of the judge making the assesment.
     sensibility: int
@@ -39,6 +39,10 @@ def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assess
         The number of assessment done.
     window : WindowManager
         an object to manage human assessments.
+    index : dict, optional
+        The id of each item, in the format {string : int}. If None, it is built from the `items` list. The default is None.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Raises
     ------
@@ -48,7 +52,7 @@ def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assess
     Returns
     -------
     tuple
-        A tuple containing the assessment results in the format (int, int).
+        A tuple containing the assessment results as id of items in the format (int, int).
     assessment_duration : double
         Duration of the assessment in second.
     one_more_bias : int
@@ -58,17 +62,31 @@ def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assess
     
     one_more_bias = 0
     
+    rng = np.random.default_rng(rng)
+    
     if assessment_method is not None :
         
+        if index is None :
+            index = {item : i for i, item in enumerate(items)}
+        
+        from .gui import ready
+        
+        #The assessment method can load the items while the judge gets ready
+        prefetch = getattr(assessment_method, "prefetch", None)
+        if prefetch is not None :
+            prefetch([items[x] for x in pair], window)
+        
         ready(window)
 
         a = time.time()
         
-        #We let the judges make the assessment
-        pair = assessment_method(id_judge, pair, nb_assessment, window)
+        #We let the judges make the assessment, the judges work with the names of the items
+        pair = assessment_method(id_judge, [items[x] for x in pair], nb_assessment, window)
         
         b = time.time()
         
+        pair = [index[x] for x in pair]
+        
         assessment_duration = b-a
         
     elif true_values is not None :
@@ -78,13 +96,13 @@ def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assess
         #We sort the pair        
         Booleen = True
         
-        val = np.abs(true_values[items.index(pair[0])]-true_values[items.index(pair[1])])
+        val = np.abs(true_values[pair[0]]-true_values[pair[1]])
         k = -np.log(1/9)/(sensibility + np.finfo(float).eps)
-        if rd.random() >= 1/(1+np.exp(- k * val)) :
-        #if (np.abs(true_values[items.index(pair[0])]-true_values[items.index(pair[1])]) <= sensibility[0]) and (r < sensibility[1]) :
+        if rng.random() >= 1/(1+np.exp(- k * val)) :
+        #if (np.abs(true_values[pair[0]]-true_values[pair[1]]) <= sensibility[0]) and (r < sensibility[1]) :
             Booleen = False
             one_more_bias = 1
-        pair = sorted(pair, key=lambda x: true_values[items.index(x)], reverse = Booleen)
+        pair = sorted(pair, key=lambda x: true_values[x], reverse = Booleen)
         
         b = time.time()
         
@@ -96,7 +114,62 @@ def make_ACJ_assessment (items, pair, id_judge, sensibility, true_values, assess
     
     return (pair[0],pair[1]), assessment_duration, one_more_bias
 
-def estimate_ACJ (items, assessments, true_values):
+async def make_ACJ_assessment_async (items, pair, id_judge, sensibility, true_values, assessment_method, nb_assessment, window, index = None, rng = None):
+    """
+    The asynchronous version of make_ACJ_assessment, for an assessment method defined with `async def`. The other assessments are done by make_ACJ_assessment.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items to be assessed.
+    pair : list of int
+        A list of int representing the id, the position in the `items` list, of the pair of items being assessed.
+    id_judge : int
+        The id of the judge making the assesment.
+    sensibility: int
+        The sensitivity threshold, see make_ACJ_assessment.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+    assessment_method : fun
+        The assessment method, a coroutine function or a function. If none, the assessment is automatically performed using the true value.
+    nb_assessment : int
+        The number of assessment done.
+    window : WindowManager
+        an object to manage human assessments, None for an assessment method defined with `async def`.
+    index : dict, optional
+        The id of each item, in the format {string : int}. If None, it is built from the `items` list. The default is None.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    tuple
+        A tuple containing the assessment results as id of items in the format (int, int).
+    assessment_duration : double
+        Duration of the assessment in second.
+    one_more_bias : int
+        One if the judgment is biaised else 0.
+
+    """
+    
+    if not inspect.iscoroutinefunction(assessment_method) :
+        return make_ACJ_assessment(items, pair, id_judge, sensibility, true_values, assessment_method, nb_assessment, window, index, rng)
+    
+    if index is None :
+        index = {item : i for i, item in enumerate(items)}
+    
+    a = time.time()
+    
+    #We wait for the judge without blocking the other judges and sessions of the event loop
+    pair = await assessment_method(id_judge, [items[x] for x in pair], nb_assessment, window)
+    
+    b = time.time()
+    
+    pair = [index[x] for x in pair]
+    
+    return (pair[0],pair[1]), b-a, 0
+
+def estimate_ACJ (items, assessments, true_values, model = None):
     """
     The method to estimate the value of each ACJ iteration.
 
@@ -105,9 +178,11 @@ def estimate_ACJ (items, assessments, true_values):
     items : list of string
         A list of strings representing the items to be assessed.
     assessments : list of tuple
-         A list containing all the assessments done in the format (int,int).
+         A list containing all the assessments done as id of items in the format (int,int).
     true_values : list of int
         A list of int containing the true values corresponding to each item in the `items` list.
+    model : BradleyTerryModel, optional
+        The model of the session, fitted from its previous parameters if new assessments were added. If None, a new model is fitted. The default is None.
 
     Returns
     -------
@@ -123,17 +198,43 @@ def estimate_ACJ (items, assessments, true_values):
     mean = np.average(true_values)
     std = np.std(true_values)
     
-    assessments_ind = [(items.index(x),items.index(y)) for (x,y) in assessments]
-    parameters = choix.ilsr_pairwise(nb_items, assessments_ind, alpha=0.1)
+    if model is None :
+        model = BradleyTerryModel(nb_items)
+    
+    parameters = model.update(assessments)
     
-    Z_parameters = stats.zscore(parameters)
+    Z_parameters = zscore(parameters)
     for x in Z_parameters: 
         val = round( x * std + mean  )
         estimated_values.append(val)
 
     return estimated_values
 
-def ACJ_new_pair (items, max_item, assessments, estimated_values, entropy):
+def ACJ_state (items, assessments):
+    """
+    This function create the selection state containing the apparition counts and the index of the assessed pairs.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items to be assessed.
+    assessments : list of tuple
+        A list containing all the assessments done as id of items in the format (int, int).
+
+    Returns
+    -------
+    state : SelectionState
+        The apparition counts of items and pairs in the assessments.
+    """
+    
+    state = SelectionState(len(items))
+    
+    for tup in assessments:
+        state.add(tup)
+    
+    return state
+
+def ACJ_new_pair (items, max_item, assessments, estimated_values, entropy, candidate_window = None, state = None, model = None, adjacent = False, rng = None):
     """
     This function select the best new pair to assess.
 
@@ -141,171 +242,529 @@ def ACJ_new_pair (items, max_item, assessments, estimated_values, entropy):
     ----------
     items : list of string
         A list of strings representing the items to be assessed.
+    max_item : tuple
+        The max_item we wont to use. In the format (int, string).
     assessments : list of tuple
-        A list containing all the assessments done in the format (int, int).
+        A list containing all the assessments done as id of items in the format (int, int).
     estimated_values : list of int
         A list of int containing the estimated values corresponding to each item in the `items` list.
+    entropy : bool
+        The method use to select items.
+    candidate_window : int, optional
+        If None all the pairs are candidates, else only the pairs of items within `candidate_window` neighbours once sorted by estimated value, plus `len(items)` random pairs. The default is None.
+    state : SelectionState, optional
+        The apparition counts and the index of the assessed pairs. If None, it is calculated from the assessments list. The default is None.
+    model : BradleyTerryModel, optional
+        The model of the session, its parameters are reused if it is already fitted on the assessments. If None, a new model is fitted. The default is None.
+    adjacent : bool, optional
+        Only used if `entropy` is False. If True, only the items adjacent once sorted by strength are scored, in O(n log n). The default is False.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Returns
     -------
-    pair : list
-        A list representing the new pair to assess.
+    pair : list of int
+        A list representing the id of the new pair to assess.
     """
     
     nb_items = len(items)
     
+    rng = np.random.default_rng(rng)
+    
+    #Let's create all pairs possible, or only the close ones, as sorted index
+    if candidate_window is None :
+        pairs = combinations_index(nb_items, 2)
+    else :
+        pairs = window_candidates(estimated_values, 2, candidate_window, nb_items, rng)
+    
     if not entropy :
-        info_of_quality_assessment = 10000
+        if model is None :
+            model = BradleyTerryModel(nb_items)
         
-        assessments_ind = [(items.index(x),items.index(y)) for (x,y) in assessments]
-        parameters = choix.ilsr_pairwise(nb_items, assessments_ind, alpha=0.1)
+        parameters = model.update(assessments)
         
+        if adjacent :
+            #The pair closest to a probability of 0.5 is always made of neighbours once sorted by strength
+            order = np.argsort(parameters, kind='stable')
+            pairs = np.sort(np.column_stack((order[:-1], order[1:])), axis=1)
         
-        for i in range(0,nb_items):
-            for k in range(0,i):
-                if i != k:
-                    info = choix.probabilities([i, k],parameters)
-                    info = abs(0.5 - round(info[0],2))        
-                    if info < info_of_quality_assessment:
-                        quality_assessment = (i, k)  # i > k
-                        info_of_quality_assessment = info
+        #The pairs (k, i) are scanned by increasing i then k
+        pairs = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
         
-        pair = [items[quality_assessment[0]], items[quality_assessment[1]]]
+        #Probability of i to be preferred to k for all the pairs at once
+        info = model.win_probability(pairs[:, 1], pairs[:, 0])
+        info = np.abs(0.5 - np.round(info, 2))
+        
+        k, i = pairs[np.argmin(info)]
+        pair = [int(i), int(k)]  # i > k
     
     else :
-        #Initialize the proximity of items tuples (i,j) to 0
-        Prox = np.zeros((nb_items,nb_items))
+        if state is None :
+            state = ACJ_state(items, assessments)
         
-        #Initialize the apparition probabilities
-        JointProba = np.zeros((nb_items,nb_items))
-        Proba = np.zeros(nb_items)
+        #The apparition probabilities come from the counts kept up to date at each assessment
+        nb_assessments = state.nb_assessments
+        Proba = state.count / (2 * nb_assessments)
+        PairProba = state.joint_count_of(pairs) / nb_assessments
         
-        #let's fill all the probabilities array
-        for i, item_1 in enumerate(items):
-            nb = sum(1 for tup in assessments if item_1 in tup)
-            Proba[i] = nb / (2 * len(assessments))
-            
-            for j, item_2 in enumerate(items):
-                nb_joint = sum(1 for tup in assessments if item_2 in tup and item_1 in tup)
-                JointProba[i][j] =  nb_joint / len(assessments)
-                
-                #Let's calculate the proximity of the ith and jth items
-                Prox[i][j]=np.abs(estimated_values[i]-estimated_values[j])
-    
-        #Let's calculate the array of Mutual Interaction
-        mi=MI(JointProba,Proba)
+        #Let's calculate the Mutual Interaction of the candidate pairs
+        mi = MI_pairs_probabilities(pairs, PairProba, Proba)
+        
+        #Proximity of the items of each candidate pair
+        estimated_values = np.asarray(estimated_values, dtype=float)
+        Prox = np.abs(estimated_values[pairs[:, 0]] - estimated_values[pairs[:, 1]])
     
         #a high proximity must be more important in selection
         Disp = max_item[0]/(Prox+np.finfo(float).eps)
     
-        #Let's create all pairs possible
-        pairs = list(combinations(items, 2))
-        fit=[]
-        
         #For all pair estimate the fitness for the wheel selection
-        for pair in pairs:
-            i, j = items.index(pair[0]), items.index(pair[1])
-            fit.append((mi[i][j])*Disp[i][j])
-        
-        #Select a pair with a roulette wheel algorithm
-        selected_index = roulette(fit)
-    
-        p = permutations([pairs[selected_index][0], pairs[selected_index][1]], 2)
+        fit = mi*Disp
         
-        #If the intersection of assessment and p is not Null then change the selected pair
-        i = 0
-        while bool(set(assessments) & set(p)):
-            selected_index = roulette(fit)
-            p = permutations([pairs[selected_index][0], pairs[selected_index][1]], 2)
-            i += 1
-            if i>1000:
-                break
+        #Select a pair with a roulette wheel algorithm, the pairs already assessed can not be selected
+        sampler = RouletteSampler(fit, rng)
+        sampler.exclude(state.assessed_mask(pairs))
+        selected_index = sampler.draw()
         
-        pair = [pairs[selected_index][0], pairs[selected_index][1]]
+        pair = pairs[selected_index].tolist()
     
     return pair
 
-def ACJ_init (items, true_values, nb_judge, sensibility, assessment_method):
+def ACJ_window (items, assessment_method, rng = None):
     """
-    This fonction initialize the ACJ algorithm. Set up the assessments list.
+    This fonction opens the window of a human ACJ assessment and shows the tutorial.
 
     Parameters
     ----------
     items : list of string
         A list of strings representing the items to be assessed.
-    true_values : list of int
-        A list of int containing the true values corresponding to each item in the `items` list.
-    nb_judge : int, optional
-        The number of judge that make the evaluation.
-    sensibility: int
-        The sensitivity threshold. If the margin between two items is equal to this value, there is a 10% probability of inverting them. The probability is calculated with this sigmoid function:  1 / (1 + np.exp(-np.log(1/9) / sensibility * x)) where x is the margin between two items.
     assessment_method : fun
-        The assessment method. If none, the assessment is automatically performed using the true value.
+        The assessment method. If none, no window is opened.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Returns
     -------
-    assessments : list of tuple
-         A list containing all the assessments done in the format (int,int).
-    assessments_time : int
-        The duration of the assessments.
-    error : list of int
-        A list containing the number of error for each judges.
     window : WindowManager
-        an object to manage human assessments.
+        an object to manage human assessments, None if `assessment_method` is None.
 
     """
     
-    nb_items = len(items)
-    
-    not_compared = items[:]
-    
-    #Shuffle items if the items are sort the judgment may be biaised
-    rd.shuffle(not_compared)
-    
-    assessments = []
-    assessments_time = np.zeros(nb_judge)
-    error = np.zeros(nb_judge)
+    rng = np.random.default_rng(rng)
     
     window  = None
     
     #if assessment method not None then Show a tutorial
     if assessment_method is not None :
         
+        #tkinter is only imported when a human assessment is done
+        from .gui import ready, WindowManager
+        
         window = WindowManager()
         
         skip_tutorial = ready(window, info = "The ACJ assessment involves comparisons between two items.\n\nIn each iteration, you will be asked to click on the best item.\n\nTo access the tutorial, click on the 'Tutorial' button.\n The tutorial includes an evaluation of the algorithm.\n After completing the tutorial evaluation, the actual test will begin.\n\nBetween each evaluation, a button will appear.\n Ensure you are ready before clicking it, as a countdown will start once clicked.\n At the end of the countdown, you can evaluate the item, so make sure you are prepared.", status =  "Tuto") 
         ###TUTO on pourrait le passer avec un bouton,  reflechir a un break ou un goto
         
         if not skip_tutorial:
-            item_1 = rd.choice(items)
+            item_1 = items[rng.integers(len(items))]
             items_copy = items[:]
             items_copy.remove(item_1)
-            item_2 = rd.choice(items_copy)
+            item_2 = items_copy[rng.integers(len(items_copy))]
     
             _ = assessment_method(-2,[item_1,item_2], -1, window)
     
-    #Assess all items one times
-    for i in range(0,nb_items-2,2):
-        pair = [not_compared[i], not_compared[i+1]]
-        ACJ_assessment = [make_ACJ_assessment(items, pair, id_judge, sensibility[id_judge], true_values, assessment_method, len(assessments)+1, window) for id_judge in range(nb_judge)]
-        assessments_done = [assessment[0] for assessment in ACJ_assessment]
-        assessments_time += np.array([assessment[1] for assessment in ACJ_assessment])
-        error += np.array([assessment[2] for assessment in ACJ_assessment])
+    return window
+
+class ACJSession:
+    """
+    A class to keep the state of an ACJ session, driven step by step : the session gives the next pair to assess with next_pair,
+    the result of the judgment is given back with submit. The session never waits for a judge, so any number of sessions
+    can be driven by the same process, from a window, a web server or a list of recorded assessments.
+    The first pairs assess all items one time, in a random order, then the pairs are selected from the estimated values.
+
+    Attributes:
+    -----------
+    _items : list of string
+        The items to be assessed, the min and max items are added if they are missing.
+    _index : dict
+        The id of each item, in the format {string : int}.
+    _min_item : tuple
+        The min_item, in the format (int, string).
+    _max_item : tuple
+        The max_item, in the format (int, string).
+    _true_values : list of int or None
+        The true values of the items, None if they are unknown.
+    _max_iteration : int
+        Number of maximum iteration after the calibration.
+    _max_accuracy : float
+        Accuracy to reach.
+    _entropy : bool
+        The method use to select items.
+    _candidate_window : int or None
+        The number of neighbours of the candidate pairs, see ACJ_new_pair.
+    _adjacent : bool
+        If True, only the adjacent items are scored, see ACJ_new_pair.
+    _rng : numpy.random.Generator
+        The random generator of the session.
+    _calibration : list of list of int
+        The pairs of the calibration.
+    _assessments : list of tuple
+        The assessments done, as id of items in the format (int, int).
+    _state : SelectionState
+        The apparition counts and the index of the assessed pairs.
+    _model : BradleyTerryModel
+        The Bradley-Terry model shared by the selection and the estimation.
+    _estimated_values : list of int
+        The last estimated values, the prior values until the calibration is done.
+    _previous_values : list of int or None
+        The estimated values before the last assessment. Default is None.
+    _accuracy : float
+        The accuracy of the last estimated values. Default is 0.
+    _iteration : int
+        The number of assessments after the calibration. Default is 0.
+    _pending : list of int or None
+        The pair given by next_pair and not assessed yet. Default is None.
+    _speculations : dict
+        The copies of the session advanced in the background for the likely judgments of the pending pair,
+        in the format {(int, int) : (Future, dict)} with the state of the random generator when they were started. Default is {}.
+    _snapshot : Future or None
+        The copy of the session made in the background when the speculation starts, the copies of the judgments are made from it. Default is None.
+
+    Methods:
+    --------
+    items() -> list of string:
+        Property to get the items of the session.
+    index() -> dict:
+        Property to get the id of each item.
+    rng() -> numpy.random.Generator:
+        Property to get the random generator of the session.
+    assessments() -> list of tuple:
+        Property to get the assessments done.
+    nb_assessments() -> int:
+        Property to get the number of assessments done.
+    accuracy() -> float:
+        Property to get the accuracy of the last estimated values.
+    calibrating() -> bool:
+        Property to know if the pairs of the calibration are not all assessed.
+    next_pair() -> list of int:
+        Get the id of the next pair to assess, None if the session is converged.
+    speculate(results: list of tuple of int, prefetch: function):
+        Select in the background the next pair for the likely judgments of the pending pair, and load its items.
+    submit(result: tuple of int):
+        Add the judgment of a pair and update the estimated values.
+    estimates() -> list of int:
+        Get the estimated values rescaled between the min and max values.
+    converged() -> bool:
+        Check if the maximum number of iterations or the accuracy is reached.
+    """
+    
+    __slots__ = ("_items", "_index", "_min_item", "_max_item", "_true_values", "_max_iteration", "_max_accuracy", "_entropy",
+                 "_candidate_window", "_adjacent", "_rng", "_calibration", "_assessments", "_state", "_model",
+                 "_estimated_values", "_previous_values", "_accuracy", "_iteration", "_pending", "_speculations", "_snapshot")
+
+    def __init__(self, min_item, max_item, items, true_values = None, max_iteration = 30, max_accuracy = 0.9, entropy = False, candidate_window = None, adjacent = False, rng = None):
+        nb_items = len(items)
+        
+        #If min and max value are not in the items list we add them
+        if min_item[1] not in items :
+             items.append(min_item[1])
+             if true_values is not None :
+                 true_values.append(min_item[0])
+        if max_item[1] not in items :
+             items.append(max_item[1])
+             if true_values is not None :
+                 true_values.append(max_item[0])
+        
+        self._items = items
+        self._index = {item : i for i, item in enumerate(items)}
+        self._min_item = min_item
+        self._max_item = max_item
+        self._true_values = true_values
+        self._max_iteration = max_iteration
+        self._max_accuracy = max_accuracy
+        self._entropy = entropy
+        self._candidate_window = candidate_window
+        self._adjacent = adjacent
+        self._rng = np.random.default_rng(rng)
+        
+        not_compared = list(range(len(items)))
+        
+        #Shuffle items if the items are sort the judgment may be biaised
+        self._rng.shuffle(not_compared)
+        
+        #Assess all items one times
+        self._calibration = [[not_compared[i], not_compared[i+1]] for i in range(0, len(items)-2, 2)]
+        if len(items)%2 != 0:
+            self._calibration.append([not_compared[len(items)-1], not_compared[len(items)-2]])
+        
+        self._assessments = []
+        #With a candidate window the items list can be large, only the pairs assessed are counted
+        self._state = SelectionState(len(items), sparse = candidate_window is not None)
+        self._model = BradleyTerryModel(len(items))
+        
+        #Without true values, the estimation of the calibration is centered on the prior values
+        self._estimated_values = [ min_item[0] if items[i] == min_item[1] else
+                                   max_item[0] if items[i] == max_item[1] or i > nb_items/2 else
+                                   min_item[0] for i in range(len(items))]
+        self._previous_values = None
+        self._accuracy = 0
+        self._iteration = 0
+        self._pending = None
+        self._speculations = {}
+        self._snapshot = None
+        
+        if len(self._calibration) == 0 :
+            self._estimate()
+
+    @property
+    def items(self):
+        return self._items
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def rng(self):
+        return self._rng
+
+    @property
+    def assessments(self):
+        return self._assessments
+
+    @property
+    def nb_assessments(self):
+        return len(self._assessments)
+
+    @property
+    def accuracy(self):
+        return self._accuracy
+
+    @property
+    def calibrating(self):
+        return len(self._assessments) < len(self._calibration)
+
+    def next_pair(self):
+        """
+        Get the next pair to assess. The same pair is returned until a judgment is submitted.
+
+        Returns
+        -------
+        pair : list of int
+            The id of the items of the pair, None if the session is converged.
+
+        """
+        if self.converged() :
+            return None
+        
+        if self._pending is None :
+            if self.calibrating :
+                self._pending = self._calibration[len(self._assessments)]
+            else :
+                #We select the best next pair
+                self._pending = ACJ_new_pair(self._items, self._max_item, self._assessments, self._estimated_values, self._entropy, self._candidate_window, self._state, self._model, self._adjacent, self._rng)
+        
+        return self._pending
+
+    def speculate(self, results = None, prefetch = None):
+        """
+        Select in the background the next pair for the likely judgments of the pending pair, while the judges are deciding.
+        The session is copied once in the background, each judgment is prepared on a copy of this snapshot. The copy prepared for the submitted judgment
+        replaces the session if it is ready or being prepared and if no draw was done from its random generator since, so the results are the same as without speculation.
+
+        Parameters
+        ----------
+        results : list of tuple of int, optional
+            The judgments to prepare in the format (winner, loser), the most likely first. If None, both outcomes of the pending pair. The default is None.
+        prefetch : function, optional
+            Called in the background with the id of the next pair of each prepared judgment, to load its items before the judges see them. The default is None.
+
+        """
+        pair = self.next_pair()
+        if pair is None :
+            return
+        
+        if results is None :
+            results = [(pair[0], pair[1]), (pair[1], pair[0])]
+        
+        self._cancel_speculations()
+        
+        executor = speculation_executor()
+        rng_state = self._rng.bit_generator.state
+        #The session is copied once in the background, the caller is not blocked by the copies
+        self._snapshot = executor.submit(self._fork)
+        for result in results :
+            self._speculations[(int(result[0]), int(result[1]))] = (executor.submit(self._advance_snapshot, self._snapshot, result, prefetch), rng_state)
+
+    def _fork(self):
+        #A copy of the session, only the items and the parameters are shared
+        fork = copy.copy(self)
+        fork._assessments = list(self._assessments)
+        fork._state = copy.deepcopy(self._state)
+        fork._model = copy.deepcopy(self._model)
+        fork._rng = copy.deepcopy(self._rng)
+        fork._speculations = {}
+        fork._snapshot = None
+        return fork
+
+    def _advance(self, result, prefetch = None):
+        self.submit(result)
+        if self.next_pair() is not None and prefetch is not None :
+            prefetch(self._pending)
+        return self
+
+    @staticmethod
+    def _advance_snapshot(snapshot, result, prefetch = None):
+        #Run in the background, the judgment is prepared on a copy of the snapshot
+        return snapshot.result()._fork()._advance(result, prefetch)
+
+    def _cancel_speculations(self):
+        #The copies already started are left to finish, their result is ignored
+        for future, _ in self._speculations.values() :
+            future.cancel()
+        self._speculations = {}
+        
+        #The snapshot reads the session, it must be done before the session changes
+        if self._snapshot is not None and not self._snapshot.cancel() :
+            self._snapshot.result()
+        self._snapshot = None
+
+    def submit(self, result):
+        """
+        Add the judgment of a pair and update the estimated values once the calibration is done.
+
+        Parameters
+        ----------
+        result : tuple of int
+            The id of the items of the pair in the format (winner, loser).
+
+        Raises
+        ------
+        Exception
+            The session is already converged.
+
+        """
+        if self.converged() :
+            raise Exception("The session is converged, no more assessment is needed.")
+        
+        speculation = self._speculations.pop((int(result[0]), int(result[1])), None)
+        
+        #The copy not started yet is not waited for, the session is updated directly
+        if speculation is not None and (speculation[0].cancel() or speculation[1] != self._rng.bit_generator.state) :
+            speculation = None
+        self._cancel_speculations()
         
-        assessments.append(max(set(assessments_done), key=assessments_done.count))
+        #The judgment was prepared in the background, the copy is used if the random generator is in the same state
+        if speculation is not None :
+            fork = speculation[0].result()
+            
+            self._assessments.append(fork._assessments[-1])
+            self._state = fork._state
+            self._model = fork._model
+            self._estimated_values = fork._estimated_values
+            self._previous_values = fork._previous_values
+            self._accuracy = fork._accuracy
+            self._iteration = fork._iteration
+            self._pending = fork._pending
+            self._rng.bit_generator.state = fork._rng.bit_generator.state
+            return
+        
+        self._assessments.append((result[0], result[1]))
+        self._state.add(self._assessments[-1])
+        self._pending = None
+        
+        if not self.calibrating :
+            self._estimate()
 
-    if nb_items%2 != 0:
-        pair = [not_compared[nb_items-1], not_compared[nb_items-2]]
-        ACJ_assessment = [make_ACJ_assessment(items, pair, id_judge, sensibility[id_judge], true_values, assessment_method, len(assessments)+1, window) for id_judge in range(nb_judge)]
-        assessments_done = [assessment[0] for assessment in ACJ_assessment]
-        assessments_time += np.array([assessment[1] for assessment in ACJ_assessment])
-        error += np.array([assessment[2] for assessment in ACJ_assessment])
+    def _estimate(self):
+        #We calculate the new estimated values
+        if self._true_values is None :
+            val = self._estimated_values
+        else :
+            val = self._true_values
+        
+        estimated_values = estimate_ACJ(self._items, self._assessments, val, self._model)
         
-        assessments.append(max(set(assessments_done), key=assessments_done.count))
+        if len(self._assessments) == len(self._calibration) :
+            #The estimated values after the calibration are rescaled
+            estimated_values = Rescale(self._min_item[0], self._max_item[0], estimated_values)
+        else :
+            self._iteration += 1
+        
+        self._previous_values, self._estimated_values = self._estimated_values, estimated_values
         
-    return assessments, assessments_time, error, window
+        #We calculate the new accuracy, the convergence of the estimation if the true values are unknown
+        if self._true_values is not None :
+            self._accuracy = SSR(self._true_values, estimated_values)
+        elif self._iteration > 0 :
+            self._accuracy = SSR(self._previous_values, estimated_values)
+
+    def estimates(self):
+        """
+        Get the estimated values, rescaled between the values of the min and max items.
+
+        Returns
+        -------
+        estimated_values : list of int
+            The estimated values corresponding to each item in the `items` list.
+
+        """
+        return Rescale(self._min_item[0], self._max_item[0], self._estimated_values)
+
+    def converged(self):
+        """
+        Check if the session is over, the calibration is done and the maximum number of iterations or the accuracy is reached.
+
+        Returns
+        -------
+        bool
+            True if no more assessment is needed.
+
+        """
+        return not self.calibrating and (self._iteration >= self._max_iteration or self._accuracy >= self._max_accuracy)
+
+def ACJ_report (items, true_values, estimated_values, cond, error, sensibility, nb_assessments, assessments_time, assessment_method):
+    """
+    This function prints the results of an ACJ session.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list, or None.
+    estimated_values : list of int
+        A list of int containing the estimated values corresponding to each item in the `items` list.
+    cond : float
+        Accuracy of estimated value at the end of algorithm.
+    error : list of int
+        A list containing the number of error for each judges.
+    sensibility : list of int
+        The sensitivity threshold of each judge.
+    nb_assessments : int
+        Number of iteration.
+    assessments_time : list of double
+        The duration of the assessments of each judge.
+    assessment_method : fun
+        The assessment method, or None.
+
+    """
+    
+    print("===============================================================")
+    print("| Result of ACJ algorithm")
+    print("| Items : ", items)
+    if true_values is not None :
+        print("| True values : ", true_values)
+    print("| Estimated values : ", estimated_values)
+    if true_values is not None :
+        print("| Accuracy : ", cond)
+    if sensibility != [0 for i in range(len(sensibility))] :
+        print("| Number of error : ", error)
+    print("| Iteration : ", nb_assessments)
+    if assessment_method is not None :
+        print("| Total duration : ", assessments_time)
+    print("===============================================================")
 
-def ACJ (min_item, max_item, items, nb_judge = 1, sensibility = [0], true_values = None, max_iteration = 30, max_accuracy = 0.9, assessment_method = None, entropy = False):
+def ACJ (min_item, max_item, items, nb_judge = 1, sensibility = [0], true_values = None, max_iteration = 30, max_accuracy = 0.9, assessment_method = None, entropy = False, candidate_window = None, adjacent = False, rng = None):
     """
     Adaptive Comparative Judgment (ACJ) is an evaluation method based on the comparison of pairs of items. Rather than scoring each item on a fixed scale, evaluators directly compare two items at a time and judge which is better according to certain criteria.
 
@@ -331,10 +790,18 @@ def ACJ (min_item, max_item, items, nb_judge = 1, sensibility = [0], true_values
         The assessment method. If none, the assessment is automatically performed using the true value. The default is None.
     entropy : bool
         The method use to select items. The default is False
+    candidate_window : int, optional
+        If None all the pairs are candidates for the selection, else only the pairs of items within this number of neighbours once sorted by estimated value, plus some random pairs. Use it for large items list. The default is None.
+    adjacent : bool, optional
+        Only used if `entropy` is False. If True, only the items adjacent once sorted by strength are compared to select the next pair, in O(n log n). The default is False.
+    rng : numpy.random.Generator or int, optional
+        The random generator of the session, or its seed. If None, a new generator is seeded from the system. The default is None.
     Raises
     ------
     Exception
         The len of sensitbility is not equal to the number of judge.
+    Exception
+        The assessment method is defined with async def and an event loop is already running, await ACJ_async instead.
     
 
     Returns
@@ -352,17 +819,15 @@ def ACJ (min_item, max_item, items, nb_judge = 1, sensibility = [0], true_values
 
     """
     
-    nb_items = len(items)
+    #An assessment method defined with async def is run by the asynchronous session in a new event loop
+    if inspect.iscoroutinefunction(assessment_method) :
+        return run_session(ACJ_async(min_item, max_item, items, nb_judge, sensibility, true_values, max_iteration, max_accuracy, assessment_method, entropy, candidate_window, adjacent, rng), "ACJ_async")
+    
+    #All the draws of the session come from the same generator
+    rng = np.random.default_rng(rng)
     
-    #If min and max value are not in the items list we add them
-    if min_item[1] not in items :
-         items.append(min_item[1])
-         if true_values is not None :
-             true_values.append(min_item[0])
-    if max_item[1] not in items :
-         items.append(max_item[1])
-         if true_values is not None :
-             true_values.append(max_item[0])
+    #The session selects the pairs and calculates the estimated values, the judges only assess the pairs
+    session = ACJSession(min_item, max_item, items, true_values, max_iteration, max_accuracy, entropy, candidate_window, adjacent, rng)
              
     if sensibility == [0] :
         sensibility = [0 for i in range(nb_judge)]
@@ -370,80 +835,95 @@ def ACJ (min_item, max_item, items, nb_judge = 1, sensibility = [0], true_values
     if len(sensibility) != nb_judge :
         raise Exception("All the judge need a sensibility tuple ! The len of sensitbility is not equal to the number of judge.")
     
-    #We initialize the assessments list
-    assessments, assessments_time, error, window = ACJ_init(items, true_values, nb_judge, sensibility, assessment_method)
-    
-    iteration = 0
+    assessments_time = np.zeros(nb_judge)
+    error = np.zeros(nb_judge)
     
-    all_estimated_values=[]
+    window = ACJ_window(items, assessment_method, rng)
     
-    #We calculate the estimated value after the initialisation
-    if true_values is None :
-        val =[ min_item[0] if items[i] == min_item[1] else
-               max_item[0] if items[i] == max_item[1] or i > nb_items/2 else
-               min_item[0] for i in range(nb_items)]
-        
-    else :
-        val = true_values
+    #The items of the next pairs are loaded by the assessment method while the judges are deciding
+    prefetch = getattr(assessment_method, "prefetch", None)
+    def prefetch_pair(pair):
+        prefetch([items[x] for x in pair], window)
         
-    estimated_values = estimate_ACJ(items, assessments, val)
-    estimated_values = Rescale(min_item[0], max_item[0], estimated_values)
-    
-    #We add it to the list containing all the estimated values
-    all_estimated_values.append(estimated_values)
-    
-    #We select the accuracy method depending the existence of true_values list
-    if true_values is None:
-        accuracy = lambda true_values, estimated_values, all_estimated_values: SSR(all_estimated_values[-2], all_estimated_values[-1])
-        cond = 0
-    else :
-        accuracy = lambda true_values, estimated_values, all_estimated_values: SSR(true_values, estimated_values)
-        cond = accuracy(true_values, estimated_values, all_estimated_values)
+    while not session.converged():
         
-    while ((iteration<max_iteration) and (cond < max_accuracy)):
+        pair = session.next_pair()
         
-        #We select the best next pair
-        pair = ACJ_new_pair(items, max_item, assessments, estimated_values, entropy)
+        #While the judges are deciding, the next pair is selected in the background for both outcomes
+        if window is not None :
+            session.speculate(prefetch = None if prefetch is None else prefetch_pair)
         
-        #We add the new assessment
-        ACJ_assessment = [make_ACJ_assessment(items, pair, id_judge, sensibility[id_judge], true_values, assessment_method, len(assessments)+1, window) for id_judge in range(nb_judge)]
+        #We add the new assessment, the one of the majority of the judges
+        ACJ_assessment = [make_ACJ_assessment(items, pair, id_judge, sensibility[id_judge], true_values, assessment_method, session.nb_assessments+1, window, session.index, rng) for id_judge in range(nb_judge)]
         assessments_done = [assessment[0] for assessment in ACJ_assessment]
         assessments_time += np.array([assessment[1] for assessment in ACJ_assessment])
         error += np.array([assessment[2] for assessment in ACJ_assessment])
         
-        assessments.append(max(set(assessments_done), key=assessments_done.count))
+        session.submit(max(set(assessments_done), key=assessments_done.count))
+    
+    if window is not None :
+        window.root.destroy()
+    
+    estimated_values = session.estimates()
+    cond = session.accuracy
+    ACJ_report(items, true_values, estimated_values, cond, error, sensibility, session.nb_assessments, assessments_time, assessment_method)
+    return estimated_values, session.nb_assessments, cond, error, assessments_time
 
-        #We calculate the new estimated values
-        if true_values is None :
-            val = estimated_values
-        else :
-            val = true_values
-            
-        estimated_values = estimate_ACJ(items, assessments, val)
+async def ACJ_async (min_item, max_item, items, nb_judge = 1, sensibility = [0], true_values = None, max_iteration = 30, max_accuracy = 0.9, assessment_method = None, entropy = False, candidate_window = None, adjacent = False, rng = None):
+    """
+    The asynchronous version of ACJ, for an assessment method defined with `async def`, for example judges answering over sockets.
+    The judges of a pair are awaited concurrently, and several sessions can run in the same event loop with asyncio.gather.
+    No window is opened for a coroutine assessment method, it is called with None as window.
+
+    Parameters
+    ----------
+    The parameters of ACJ.
+    
+    Raises
+    ------
+    Exception
+        The len of sensitbility is not equal to the number of judge.
+
+    Returns
+    -------
+    The results of ACJ.
+
+    """
+    
+    #All the draws of the session come from the same generator
+    rng = np.random.default_rng(rng)
+    
+    #The session selects the pairs and calculates the estimated values, the judges only assess the pairs
+    session = ACJSession(min_item, max_item, items, true_values, max_iteration, max_accuracy, entropy, candidate_window, adjacent, rng)
+             
+    if sensibility == [0] :
+        sensibility = [0 for i in range(nb_judge)]
+        
+    if len(sensibility) != nb_judge :
+        raise Exception("All the judge need a sensibility tuple ! The len of sensitbility is not equal to the number of judge.")
+    
+    assessments_time = np.zeros(nb_judge)
+    error = np.zeros(nb_judge)
+    
+    #A coroutine assessment method has no window, a function is shown in a window as in ACJ
+    window = None if inspect.iscoroutinefunction(assessment_method) else ACJ_window(items, assessment_method, rng)
+        
+    while not session.converged():
         
-        all_estimated_values.append(estimated_values)
+        pair = session.next_pair()
         
-        #We calculate the new accuracy
-        cond = accuracy(true_values, estimated_values, all_estimated_values)
+        #The judges assess the pair concurrently, we add the assessment of the majority of the judges
+        ACJ_assessment = await asyncio.gather(*[make_ACJ_assessment_async(items, pair, id_judge, sensibility[id_judge], true_values, assessment_method, session.nb_assessments+1, window, session.index, rng) for id_judge in range(nb_judge)])
+        assessments_done = [assessment[0] for assessment in ACJ_assessment]
+        assessments_time += np.array([assessment[1] for assessment in ACJ_assessment])
+        error += np.array([assessment[2] for assessment in ACJ_assessment])
         
-        iteration += 1
+        session.submit(max(set(assessments_done), key=assessments_done.count))
     
     if window is not None :
         window.root.destroy()
     
-    estimated_values = Rescale(min_item[0], max_item[0], estimated_values)
-    print("===============================================================")
-    print("| Result of ACJ algorithm")
-    print("| Items : ", items)
-    if true_values is not None :
-        print("| True values : ", true_values)
-    print("| Estimated values : ", estimated_values)
-    if true_values is not None :
-        print("| Accuracy : ", cond)
-    if sensibility != [0 for i in range(nb_judge)] :
-        print("| Number of error : ", error)
-    print("| Iteration : ", len(assessments))
-    if assessment_method is not None :
-        print("| Total duration : ", assessments_time)
-    print("===============================================================")
-    return estimated_values, len(assessments), cond, error, assessments_time
\ No newline at end of file
+    estimated_values = session.estimates()
+    cond = session.accuracy
+    ACJ_report(items, true_values, estimated_values, cond, error, sensibility, session.nb_assessments, assessments_time, assessment_method)
+    return estimated_values, session.nb_assessments, cond, error, assessments_time
@@ -4,19 +4,20 @@ Created on Mon Apr 29 15:35:28 2024
 
 @author: Romain Perrier
 """
-import random as rd
+import copy
+import inspect
 import numpy as np
 import time
 
-from itertools import chain, combinations, permutations
-
-from .util import Rescale, SSR, ready, WindowManager
-from .selection import II, roulette
+from .util import Rescale, SSR, run_session
+from .estimation import LeastSquaresEstimator, SparseLeastSquaresEstimator
+from .selection import II_trios_probabilities, combinations_index, window_candidates, RouletteSampler, SelectionState
+from .speculation import speculation_executor
 
 
 ###############################         FUNCTIONS       ############################################
 
-def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessment_method, nb_assessment, window):
+def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessment_method, nb_assessment, window, index = None, rng = None):
     """
     This function is used to do the assessment on a Trio and return the tuple (Max,(dist,Average),Min)
 
@@ -24,8 +25,8 @@ def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessmen
     ----------
     items : list of string
         A list of strings representing the items to be assessed.
-    trio : list of string
-        A list of strings representing the trio of items being assessed.
+    trio : list of int
+        A list of int representing the id, the position in the `items` list, of the trio of items being assessed.
     sensibility : tuple
          A  tuple cointaining the sensibility treshold, the absolute value of the error on the scaler, and the probability of making a mystake. In the format (int, int, double).
     true_values : list of int
@@ -38,6 +39,10 @@ def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessmen
         The number of assessment done.
     window : WindowManager
         an object to manage human assessments.
+    index : dict, optional
+        The id of each item, in the format {string : int}. If None, it is built from the `items` list. The default is None.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
         
     Raises
     ------
@@ -47,7 +52,7 @@ def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessmen
     Returns
     -------
     tuple
-        A tuple containing the assessment results (Max,(dist,Average),Min).In the format (int, (int, int), ini).
+        A tuple containing the assessment results (Max,(dist,Average),Min) as id of items.In the format (int, (int, int), int).
     assessment_duration : double
         Duration of the assessment in second.
     assessments_time : int
@@ -60,69 +65,74 @@ def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessmen
     
     nb_inversion = 0
     nb_scale_error = 0
+    
+    rng = np.random.default_rng(rng)
             
     if assessment_method is not None :
         
+        if index is None :
+            index = {item : i for i, item in enumerate(items)}
+        
+        from .gui import ready
+        
+        #The assessment method can load the items while the judge gets ready
+        prefetch = getattr(assessment_method, "prefetch", None)
+        if prefetch is not None :
+            prefetch([items[x] for x in trio], window)
+        
         ready(window)
 
         a = time.time()
         
-        #We let the judge make the assessment
-        trio, dist = assessment_method(scale, trio, nb_assessment, window)
+        #We let the judge make the assessment, the judge works with the names of the items
+        trio, dist = assessment_method(scale, [items[x] for x in trio], nb_assessment, window)
 
         b = time.time()
         
         assessment_duration = b-a
         
-        trio = sorted(trio, key=lambda x: true_values[items.index(x)], reverse = True)
-        dmin = true_values[items.index(trio[1])] - true_values[items.index(trio[0])]
-        dmax = true_values[items.index(trio[2])] - true_values[items.index(trio[0])]
+        trio = [index[x] for x in trio]
         
-        if dmax == 0:
-            true_dist = scale//2
-        else :
-            true_dist = round(scale*dmin/dmax)
-            
-        nb_scale_error=(np.abs(dist-true_dist))
+        trio, nb_scale_error = CTJ_scale_error(trio, dist, true_values, scale)
         
     elif true_values is not None :
         
         a = time.time()
         
         #We sort the trio
-        trio = sorted(trio, key=lambda x: true_values[items.index(x)], reverse = True)
+        trio = sorted(trio, key=lambda x: true_values[x], reverse = True)
         
         b = time.time()
         
         #We calculate the distance between the Average and the Max value
-        dmin = true_values[items.index(trio[1])] - true_values[items.index(trio[0])]
+        dmin = true_values[trio[1]] - true_values[trio[0]]
         
         #We calculate the distance between the Min and the Max value
-        dmax = true_values[items.index(trio[2])] - true_values[items.index(trio[0])]
+        dmax = true_values[trio[2]] - true_values[trio[0]]
         
         ###################
         
         k = -np.log(1/9)/(sensibility[0] + np.finfo(float).eps)
         
-        val = np.abs(true_values[items.index(trio[0])]-true_values[items.index(trio[1])])
+        val = np.abs(true_values[trio[0]]-true_values[trio[1]])
         
-        if rd.random() >= 1/(1+np.exp(- k * val)) :
+        if rng.random() >= 1/(1+np.exp(- k * val)) :
             
             trio[0], trio[1] = trio[1], trio[0]
             
             nb_inversion += 1
         
-        val = np.abs(true_values[items.index(trio[1])]-true_values[items.index(trio[2])])
+        val = np.abs(true_values[trio[1]]-true_values[trio[2]])
             
-        if rd.random() >= 1/(1+np.exp(- k * val)) :
+        if rng.random() >= 1/(1+np.exp(- k * val)) :
                 
             trio[1], trio[2] = trio[2], trio[1]
                 
-            val = np.abs(true_values[items.index(trio[0])]-true_values[items.index(trio[1])])
+            val = np.abs(true_values[trio[0]]-true_values[trio[1]])
             
             nb_inversion += 1
                     
-            if rd.random() >= 1/(1+np.exp(- k * val)) :
+            if rng.random() >= 1/(1+np.exp(- k * val)) :
                         
                 trio[0], trio[1] = trio[1], trio[0]
                 
@@ -132,11 +142,11 @@ def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessmen
         
         bias = 0
         
-        if rd.random() <= sensibility[2] :
+        if rng.random() <= sensibility[2] :
             
             bias = sensibility[1]
             
-            r = rd.random()
+            r = rng.random()
             
             if r < 0.5 :
                 bias = bias * -1
@@ -163,6 +173,100 @@ def make_CTJ_assessment (items, trio, sensibility, true_values, scale, assessmen
         
     return (trio[0], (dist, trio[1]), trio[2]), assessment_duration, error
 
+async def make_CTJ_assessment_async (items, trio, sensibility, true_values, scale, assessment_method, nb_assessment, window, index = None, rng = None):
+    """
+    The asynchronous version of make_CTJ_assessment, for an assessment method defined with `async def`. The other assessments are done by make_CTJ_assessment.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items to be assessed.
+    trio : list of int
+        A list of int representing the id, the position in the `items` list, of the trio of items being assessed.
+    sensibility : tuple
+         The sensibility of the automated assessment, see make_CTJ_assessment.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+    scale : int
+        The value of the scale for the CTJ model.
+    assessment_method : fun
+        The assessment method, a coroutine function or a function. If none, the assessment is automatically performed using the true value.
+    nb_assessment : int
+        The number of assessment done.
+    window : WindowManager
+        an object to manage human assessments, None for an assessment method defined with `async def`.
+    index : dict, optional
+        The id of each item, in the format {string : int}. If None, it is built from the `items` list. The default is None.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    tuple
+        A tuple containing the assessment results (Max,(dist,Average),Min) as id of items.In the format (int, (int, int), int).
+    assessment_duration : double
+        Duration of the assessment in second.
+    error : list of int
+        The number of inversion and the number of scale error.
+
+    """
+    
+    if not inspect.iscoroutinefunction(assessment_method) :
+        return make_CTJ_assessment(items, trio, sensibility, true_values, scale, assessment_method, nb_assessment, window, index, rng)
+    
+    if index is None :
+        index = {item : i for i, item in enumerate(items)}
+    
+    a = time.time()
+    
+    #We wait for the judge without blocking the other sessions of the event loop
+    trio, dist = await assessment_method(scale, [items[x] for x in trio], nb_assessment, window)
+    
+    b = time.time()
+    
+    trio = [index[x] for x in trio]
+    
+    trio, nb_scale_error = CTJ_scale_error(trio, dist, true_values, scale)
+    
+    return (trio[0], (dist, trio[1]), trio[2]), b-a, [0, nb_scale_error]
+
+def CTJ_scale_error (trio, dist, true_values, scale):
+    """
+    This function compares the distance given by a judge to the one of the true values.
+
+    Parameters
+    ----------
+    trio : list of int
+        The id of the items of the trio, as sorted by the judge.
+    dist : int
+        The distance between the Max and the Average given by the judge.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list, or None.
+    scale : int
+        The value of the scale for the CTJ model.
+
+    Returns
+    -------
+    trio : list of int
+        The trio sorted by true value, unchanged if the true values are unknown.
+    nb_scale_error : int
+        The absolute difference between the distance given by the judge and the true distance, 0 if the true values are unknown.
+    """
+    
+    if true_values is None :
+        return trio, 0
+    
+    trio = sorted(trio, key=lambda x: true_values[x], reverse = True)
+    dmin = true_values[trio[1]] - true_values[trio[0]]
+    dmax = true_values[trio[2]] - true_values[trio[0]]
+    
+    if dmax == 0:
+        true_dist = scale//2
+    else :
+        true_dist = round(scale*dmin/dmax)
+        
+    return trio, np.abs(dist-true_dist)
+
 def CTJ_assessments (items, A, b, assessment,scale):
     """
     This function calculates the new line to add in the A array for the CTJ model based on given assessments.
@@ -176,7 +280,7 @@ def CTJ_assessments (items, A, b, assessment,scale):
     b : array of double
         Array of zeros execept for two value, the fixed point of the model.
     assessment : tuple
-        A tuple containing the assessment results (Max,(dist,Average),Min).In the format (int, (int, int), int).
+        A tuple containing the assessment results (Max,(dist,Average),Min) as id of items.In the format (int, (int, int), int).
     scale : int
         The value of the scale for the CTJ model. Default is 10.
 
@@ -188,22 +292,68 @@ def CTJ_assessments (items, A, b, assessment,scale):
     
     nb_items = len(items)
     
-    d1 = assessment[1][0]
-    d2 = scale - d1
-    alpha = d1/d2
-    Max = items.index(assessment[0])
-    Average = items.index(assessment[1][1])
-    Min = items.index(assessment[2])
+    index, coefficients = CTJ_coefficients(assessment, scale)
 
     #Create a new line for A array
     line = list(np.zeros(nb_items))
-    line[Max] = 1
-    line[Average] = -(alpha + 1)
-    line[Min] = alpha
+    for i, coefficient in zip(index, coefficients):
+        line[i] = coefficient
     
     return line
 
-def CTJ_new_trio (items, assessments, estimated_values):
+def CTJ_coefficients (assessment, scale):
+    """
+    This function calculates the non-zero coefficients of the line of the A array for the CTJ model based on given assessment.
+
+    Parameters
+    ----------
+    assessment : tuple
+        A tuple containing the assessment results (Max,(dist,Average),Min) as id of items.In the format (int, (int, int), int).
+    scale : int
+        The value of the scale for the CTJ model.
+
+    Returns
+    -------
+    index : list of int
+        The id of the items Max, Average and Min, the columns of the non-zero coefficients.
+    coefficients : list of double
+        The coefficients of the line for Max, Average and Min.
+    """
+    
+    d1 = assessment[1][0]
+    d2 = scale - d1
+    alpha = d1/d2
+    Max = assessment[0]
+    Average = assessment[1][1]
+    Min = assessment[2]
+    
+    return [Max, Average, Min], [1, -(alpha + 1), alpha]
+
+def CTJ_state (items, assessments):
+    """
+    This function create the selection state containing the apparition counts of the assessments.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items to be assessed.
+    assessments : list of tuple
+        A list containing all the assessments done as id of items in the format (int,(int,int),int).
+
+    Returns
+    -------
+    state : SelectionState
+        The apparition counts of items, pairs and trios in the assessments.
+    """
+    
+    state = SelectionState(len(items))
+    
+    for tup in assessments:
+        state.add((tup[0], tup[1][1], tup[2]))
+    
+    return state
+
+def CTJ_new_trio (items, assessments, estimated_values, state = None, candidate_window = None, rng = None):
     """
     This function select the best new trio to assess.
 
@@ -212,188 +362,543 @@ def CTJ_new_trio (items, assessments, estimated_values):
     items : list of string
         A list of strings representing the items to be assessed.
     assessments : list of tuple
-        A list containing all the assessments done in the format (int,(int,int),int).
+        A list containing all the assessments done as id of items in the format (int,(int,int),int).
     estimated_values : list of int
         A list of int containing the estimated values corresponding to each item in the `items` list.
+    state : SelectionState, optional
+        The apparition counts of the assessments. If None, the counts are calculated from the assessments list. The default is None.
+    candidate_window : int, optional
+        If None all the trios are candidates, else only the trios of items within `candidate_window` neighbours once sorted by estimated value, plus `len(items)` random trios. The default is None.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Returns
     -------
-    trio : list
-        A list representing the new trio to assess.
+    trio : list of int
+        A list representing the id of the new trio to assess.
     """
     
     nb_items = len(items)
     
-    #Let's set the assessment from (Max, (dist, Average), Min) to (Max, Average, Min)
-    assessment = [(tup[0],tup[1][1],tup[2]) for tup in assessments]
+    rng = np.random.default_rng(rng)
     
-    #Initialize the proximity of items tuples (i,j,k) to 0
-    Prox = np.zeros((nb_items,nb_items,nb_items))
+    if state is None :
+        state = CTJ_state(items, assessments)
     
-    #Initialize the apparition probabilities
-    TriProba = np.zeros((nb_items,nb_items,nb_items))
-    JointProba = np.zeros((nb_items,nb_items))
-    Proba = np.zeros(nb_items)
+    nb_assessments = state.nb_assessments
     
-    #let's fill all the probabilities array
-    for i, item_1 in enumerate(items):
-        nb = sum(1 for tup in assessment if item_1 in tup)
-        Proba[i] = nb / (3 * len(assessment))
-        
-        for j, item_2 in enumerate(items):
-            nb_joint = sum(1 for tup in assessment if item_2 in tup and item_1 in tup)
-            JointProba[i][j] = 2 * nb_joint / (3 * len(assessment))
+    #Let's create all trios possible, or only the close ones, as sorted index
+    if candidate_window is None :
+        trios = combinations_index(nb_items, 3)
+    else :
+        trios = window_candidates(estimated_values, 3, candidate_window, nb_items, rng)
+    i, j, k = trios[:, 0], trios[:, 1], trios[:, 2]
     
-            if i == j:
-                JointProba[i][j] = 0
+    #Let's calculate the apparition probabilities from the counts
+    Proba = state.count / (3 * nb_assessments)
+    #The joint probabilities of the pairs (i, j), (i, k) and (j, k) of each trio
+    pairs = np.column_stack((i, j, i, k, j, k)).reshape(-1, 2)
+    PairProba = 2 * state.joint_count_of(pairs).reshape(-1, 3) / (3 * nb_assessments)
+    TriProba = state.tri_count_of(trios) / nb_assessments
     
-            for k, item_3 in enumerate(items):
-                 nb_tri = sum(1 for tup in assessment if item_3 in tup and item_2 in tup and item_1 in tup)
-                 TriProba[i][j][k] = nb_tri / len(assessment)
-                 
-                 #Let's calculate the proximity of the ith, jth and kth items
-                 Prox[i][j][k] = np.sqrt((estimated_values[i] - estimated_values[j]) ** 2 +
-                                         (estimated_values[j] - estimated_values[k]) ** 2 +
-                                         (estimated_values[i] - estimated_values[k]) ** 2)        
-                 
-                 if i == j and j == k:
-                     TriProba[i][j][k] = 0
-
-    #Let's calculate the array of Information Interaction
-    ii=II(TriProba,JointProba,Proba)
+    #Let's calculate the proximity of the items of each trio
+    values = np.array(estimated_values, dtype=float)
+    Prox = np.sqrt((values[i] - values[j]) ** 2 +
+                   (values[j] - values[k]) ** 2 +
+                   (values[i] - values[k]) ** 2)
 
-    #Let's create all trios possible
-    trios = list(combinations(items, 3))
-    fit=[]
+    #Let's calculate the Information Interaction of each trio
+    ii = II_trios_probabilities(trios, TriProba, PairProba, Proba)
     
     #For all trio estimate the fitness for the wheel selection
-    for trio in trios:
-        i, j, k = items.index(trio[0]), items.index(trio[1]), items.index(trio[2])
-        fit.append(((ii[i][j][k])**2)*Prox[i][j][k])
-    
-    #Select a trio with a roulette wheel algorithm
-    selected_index = roulette(fit)
-    
-    p = permutations([trios[selected_index][0], trios[selected_index][1], trios[selected_index][2]], 3)
+    fit = (ii**2)*Prox
     
-    #If the intersection of assessment and p is not Null then change the selected trio
-    i = 0
-    while bool(set(assessment) & set(p)):
-        selected_index = roulette(fit)
-        p=permutations([trios[selected_index][0], trios[selected_index][1], trios[selected_index][2]], 3)
-        i+=1
-        if i>1000:
-            break
+    #Select a trio with a roulette wheel algorithm, the trios already assessed can not be selected
+    sampler = RouletteSampler(fit, rng)
+    sampler.exclude(state.assessed_mask(trios))
+    selected_index = sampler.draw()
         
-    trio = [trios[selected_index][0], trios[selected_index][1], trios[selected_index][2]]
+    trio = trios[selected_index].tolist()
 
     return trio
 
-def CTJ_init (items, max_id, min_id, max_val, min_val, sensibility, true_values, scale, assessment_method ):
+def CTJ_window (items, scale, assessment_method, rng = None):
     """
-    This fonction initialize the CTJ algorithm. Set up the array of the model and the assessments list.
+    This fonction opens the window of a human CTJ assessment and shows the tutorial.
 
     Parameters
     ----------
     items : list of string
         A list of strings representing the items to be assessed.
-    max_id : int
-        The position of the max value in the items list.
-    min_id : int
-        The position of the min value in the items list.
-    max_val : int
-        The max value of items list.
-    min_val : int
-        The min value of items list.
-    sensibility : tuple
-        A  tuple cointaining the sensibility treshold, the absolute value of the error on the scaler, and the probability of making a mystake. In the format (int, int, double).
-    true_values : list of int
-        A list of int containing the true values corresponding to each item in the `items` list.
     scale : int
         The value of the scale for the CTJ model.
     assessment_method : fun
-        The assessment method. If none, the assessment is automatically performed using the true value.
+        The assessment method. If none, no window is opened.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Returns
     -------
-    A : array of double
-        An array used to calculate the estimated value.
-    b : array of double
-        Array of zeros execept for two value, the fixed point of the model.
-    assessments : list of tuple
-         A list containing all the assessments done in the format (int,(int,int),int).
-    error : list of int
-        The first element is the number of inversion done in automated assessment, the second is the number of scale error. Default is [0,0].
     window : WindowManager
-        an object to manage human assessments.
+        an object to manage human assessments, None if `assessment_method` is None.
 
     """
     
-    nb_items = len(items)
+    rng = np.random.default_rng(rng)
     
     window = None
     
-    #Create the matrices
-    A = np.zeros((2, nb_items), dtype=np.double)
-    b = np.zeros((2, 1), dtype=np.double)
-    A[0][min_id] = 1
-    b[0] = min_val
-    A[1][max_id] = 1
-    b[1] = max_val
-
-    not_compared = items[:]
-    
-    #Shuffle items if the items are sort the judgment may be biaised
-    rd.shuffle(not_compared)
-    
-    assessments = []
-    
-    assessments_time = 0
-    
-    error = [0,0]
-    
     #if assessment method not None then Show a tutorial
     if assessment_method is not None :
         
+        #tkinter is only imported when a human assessment is done
+        from .gui import ready, WindowManager
+        
         window = WindowManager()
         
         skip_tutorial = ready(window, info = "In each iteration, you will be asked to sort the items from best (on the left) to worst (on the right).\n Then, use the slider below to indicate the distance between the extreme items and the average one.\n To swap items, click on both of them.\n\nTo access the tutorial, click on the 'Tutorial' button.\n The tutorial includes an evaluation of the algorithm.\n After completing the tutorial evaluation, the actual test will begin.\n\nBetween each evaluation, a button will appear. Ensure you are ready before clicking it, as a countdown will start once clicked.\n At the end of the countdown, you can evaluate the items, so make sure you are prepared.", status =  "Tuto") 
         
         if not skip_tutorial:
-            item_1 = rd.choice(items)
+            item_1 = items[rng.integers(len(items))]
             items_copy = items[:]
             items_copy.remove(item_1)
-            item_2 = rd.choice(items_copy)
+            item_2 = items_copy[rng.integers(len(items_copy))]
             items_copy.remove(item_2)
-            item_3 = rd.choice(items_copy)
+            item_3 = items_copy[rng.integers(len(items_copy))]
     
             _ = assessment_method(scale,[item_1, item_2, item_3] , -1, window) 
+    
+    return window
 
-    #Assess all items one times
-    for i in range(0,nb_items-3,3):
-        trio = [not_compared[i], not_compared[i+1], not_compared[i+2]]
-        assessment = make_CTJ_assessment(items, trio, sensibility, true_values, scale, assessment_method, len(assessments)+1, window)
-        assessments.append(assessment[0])
-        assessments_time += assessment[1]
-        error[0] += assessment[2][0]
-        error[1] += assessment[2][1]
-        line = CTJ_assessments(items, A, b, assessments[-1], scale)
-        A = np.vstack([A, line])
-        b = np.vstack([b, [0]])
-
-    if nb_items%3 != 0:
-        trio = [not_compared[nb_items-1], not_compared[nb_items-2], not_compared[nb_items-3]]
-        assessment = make_CTJ_assessment(items, trio, sensibility, true_values, scale, assessment_method, len(assessments)+1, window)
-        assessments.append(assessment[0])
-        assessments_time += assessment[1]
-        error[0] += assessment[2][0]
-        error[1] += assessment[2][1]
-        A = np.vstack([A, line])
-        b = np.vstack([b, [0]])
+class CTJSession:
+    """
+    A class to keep the state of a CTJ session, driven step by step : the session gives the next trio to assess with next_trio,
+    the result of the judgment is given back with submit. The session never waits for a judge, so any number of sessions
+    can be driven by the same process.
+    The first trios assess all items one time, in a random order, then the trios are selected from the estimated values.
+
+    Attributes:
+    -----------
+    _items : list of string
+        The items to be assessed, the min and max items are added if they are missing.
+    _index : dict
+        The id of each item, in the format {string : int}.
+    _min_item : tuple
+        The min_item, in the format (int, string).
+    _max_item : tuple
+        The max_item, in the format (int, string).
+    _true_values : list of int or None
+        The true values of the items, None if they are unknown.
+    _max_iteration : int
+        Number of maximum iteration after the calibration.
+    _max_accuracy : float
+        Accuracy to reach.
+    _scale : int
+        The value of the scale for the CTJ model.
+    _candidate_window : int or None
+        The number of neighbours of the candidate trios, see CTJ_new_trio.
+    _rng : numpy.random.Generator
+        The random generator of the session.
+    _calibration : list of list of int
+        The trios of the calibration.
+    _assessments : list of tuple
+        The assessments done, as id of items in the format (int,(int,int),int).
+    _state : SelectionState
+        The apparition counts of items, pairs and trios in the assessments.
+    _estimator : LeastSquaresEstimator or SparseLeastSquaresEstimator
+        The least squares model containing the fixed points and a line for each assessment.
+    _estimated_values : list of int or None
+        The last estimated values, None until the calibration is done. Default is None.
+    _previous_values : list of int or None
+        The estimated values before the last assessment. Default is None.
+    _accuracy : float
+        The accuracy of the last estimated values. Default is 0.
+    _iteration : int
+        The number of assessments after the calibration. Default is 0.
+    _pending : list of int or None
+        The trio given by next_trio and not assessed yet. Default is None.
+    _speculations : dict
+        The copies of the session advanced in the background for the likely judgments of the pending trio,
+        in the format {(int,(int,int),int) : (Future, dict)} with the state of the random generator when they were started. Default is {}.
+    _snapshot : Future or None
+        The copy of the session made in the background when the speculation starts, the copies of the judgments are made from it. Default is None.
+
+    Methods:
+    --------
+    items() -> list of string:
+        Property to get the items of the session.
+    index() -> dict:
+        Property to get the id of each item.
+    rng() -> numpy.random.Generator:
+        Property to get the random generator of the session.
+    assessments() -> list of tuple:
+        Property to get the assessments done.
+    nb_assessments() -> int:
+        Property to get the number of assessments done.
+    accuracy() -> float:
+        Property to get the accuracy of the last estimated values.
+    calibrating() -> bool:
+        Property to know if the trios of the calibration are not all assessed.
+    next_trio() -> list of int:
+        Get the id of the next trio to assess, None if the session is converged.
+    likely_results() -> list of tuple:
+        Get the likely judgments of the pending trio.
+    speculate(results: list of tuple, prefetch: function):
+        Select in the background the next trio for the likely judgments of the pending trio, and load its items.
+    submit(result: tuple):
+        Add the judgment of a trio and update the estimated values.
+    estimates() -> list of int:
+        Get the estimated values rescaled between the min and max values.
+    converged() -> bool:
+        Check if the maximum number of iterations or the accuracy is reached.
+    """
+    
+    __slots__ = ("_items", "_index", "_min_item", "_max_item", "_true_values", "_max_iteration", "_max_accuracy", "_scale",
+                 "_candidate_window", "_rng", "_calibration", "_assessments", "_state", "_estimator",
+                 "_estimated_values", "_previous_values", "_accuracy", "_iteration", "_pending", "_speculations", "_snapshot")
+
+    def __init__(self, min_item, max_item, items, true_values = None, max_iteration = 30, max_accuracy = 0.9, scale = 10, candidate_window = None, backend = "dense", rng = None):
+        #If min and max value are not in the items list we add them
+        if min_item[1] not in items :
+             items.append(min_item[1])
+             if true_values is not None :
+                 true_values.append(min_item[0])
+        if max_item[1] not in items :
+             items.append(max_item[1])
+             if true_values is not None :
+                 true_values.append(max_item[0])
+        
+        nb_items = len(items)
+        
+        self._items = items
+        self._index = {item : i for i, item in enumerate(items)}
+        self._min_item = min_item
+        self._max_item = max_item
+        self._true_values = true_values
+        self._max_iteration = max_iteration
+        self._max_accuracy = max_accuracy
+        self._scale = scale
+        self._candidate_window = candidate_window
+        self._rng = np.random.default_rng(rng)
+        
+        #Create the model with the two fixed points
+        if backend == "dense" :
+            self._estimator = LeastSquaresEstimator(nb_items)
+        elif backend == "sparse" :
+            self._estimator = SparseLeastSquaresEstimator(nb_items)
+        else :
+            raise Exception("Unknown backend " + str(backend) + ", the backend must be 'dense' or 'sparse'.")
+        self._estimator.add([self._index[min_item[1]]], [1], min_item[0])
+        self._estimator.add([self._index[max_item[1]]], [1], max_item[0])
         
-    return A, b, assessments, assessments_time, error, window
+        not_compared = list(range(nb_items))
+        
+        #Shuffle items if the items are sort the judgment may be biaised
+        self._rng.shuffle(not_compared)
+        
+        #Assess all items one times
+        self._calibration = [[not_compared[i], not_compared[i+1], not_compared[i+2]] for i in range(0, nb_items-3, 3)]
+        if nb_items%3 != 0:
+            self._calibration.append([not_compared[nb_items-1], not_compared[nb_items-2], not_compared[nb_items-3]])
+        
+        self._assessments = []
+        #For large items lists only the pairs assessed are counted
+        self._state = SelectionState(nb_items, sparse = backend == "sparse" or candidate_window is not None)
+        self._estimated_values = None
+        self._previous_values = None
+        self._accuracy = 0
+        self._iteration = 0
+        self._pending = None
+        self._speculations = {}
+        self._snapshot = None
+        
+        if len(self._calibration) == 0 :
+            self._estimate()
+
+    @property
+    def items(self):
+        return self._items
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def rng(self):
+        return self._rng
+
+    @property
+    def assessments(self):
+        return self._assessments
+
+    @property
+    def nb_assessments(self):
+        return len(self._assessments)
 
-def CTJ (min_item, max_item, items, sensibility = (0,0,0), true_values = None, max_iteration = 30, max_accuracy = 0.9, scale = 10, assessment_method = None):
+    @property
+    def accuracy(self):
+        return self._accuracy
+
+    @property
+    def calibrating(self):
+        return len(self._assessments) < len(self._calibration)
+
+    def next_trio(self):
+        """
+        Get the next trio to assess. The same trio is returned until a judgment is submitted.
+
+        Returns
+        -------
+        trio : list of int
+            The id of the items of the trio, None if the session is converged.
+
+        """
+        if self.converged() :
+            return None
+        
+        if self._pending is None :
+            if self.calibrating :
+                self._pending = self._calibration[len(self._assessments)]
+            else :
+                #We select the best next trio
+                self._pending = CTJ_new_trio(self._items, self._assessments, self._estimated_values, self._state, self._candidate_window, self._rng)
+        
+        return self._pending
+
+    def likely_results(self):
+        """
+        Get the likely judgments of the pending trio : the items sorted by true value, or by estimated value if the true values are unknown,
+        with the distance of these values and the distances next to it.
+
+        Returns
+        -------
+        results : list of tuple
+            The judgments in the format (Max,(dist,Average),Min), the most likely first. Empty if the session is converged or if there is no value to sort the trio.
+
+        """
+        trio = self.next_trio()
+        
+        values = self._true_values if self._true_values is not None else self._estimated_values
+        if trio is None or values is None :
+            return []
+        
+        #The judge sorts the trio as the values do, the trio is sorted by true value when they are known
+        Max, Average, Min = sorted(trio, key=lambda x: values[x], reverse = True)
+        
+        dmax = values[Min] - values[Max]
+        if dmax == 0:
+            dist = self._scale//2
+        else :
+            dist = round(self._scale*(values[Average] - values[Max])/dmax)
+        
+        return [(Max, (d, Average), Min) for d in (dist, dist-1, dist+1) if 0 <= d < self._scale]
+
+    def speculate(self, results = None, prefetch = None):
+        """
+        Select in the background the next trio for the likely judgments of the pending trio, while the judge is deciding.
+        The session is copied once in the background, each judgment is prepared on a copy of this snapshot. The copy prepared for the submitted judgment
+        replaces the session if it is ready or being prepared and if no draw was done from its random generator since, so the results are the same as without speculation.
+
+        Parameters
+        ----------
+        results : list of tuple, optional
+            The judgments to prepare in the format (Max,(dist,Average),Min), the most likely first. If None, see likely_results. The default is None.
+        prefetch : function, optional
+            Called in the background with the id of the next trio of each prepared judgment, or at once with the next trio of the calibration,
+            to load its items before the judge sees them. The default is None.
+
+        """
+        if results is None :
+            results = self.likely_results()
+        
+        #During the calibration the next trio does not depend on the judgment, its items are loaded at once
+        following = len(self._assessments) + 1
+        if prefetch is not None and following < len(self._calibration) :
+            prefetch(self._calibration[following])
+        
+        self._cancel_speculations()
+        
+        executor = speculation_executor()
+        rng_state = self._rng.bit_generator.state
+        #The session is copied once in the background, the caller is not blocked by the copies
+        if len(results) > 0 :
+            self._snapshot = executor.submit(self._fork)
+        for result in results :
+            key = (int(result[0]), (int(result[1][0]), int(result[1][1])), int(result[2]))
+            self._speculations[key] = (executor.submit(self._advance_snapshot, self._snapshot, result, prefetch), rng_state)
+
+    def _fork(self):
+        #A copy of the session, only the items and the parameters are shared
+        fork = copy.copy(self)
+        fork._assessments = list(self._assessments)
+        fork._state = copy.deepcopy(self._state)
+        fork._estimator = copy.deepcopy(self._estimator)
+        fork._rng = copy.deepcopy(self._rng)
+        fork._speculations = {}
+        fork._snapshot = None
+        return fork
+
+    def _advance(self, result, prefetch = None):
+        self.submit(result)
+        if self.next_trio() is not None and prefetch is not None :
+            prefetch(self._pending)
+        return self
+
+    @staticmethod
+    def _advance_snapshot(snapshot, result, prefetch = None):
+        #Run in the background, the judgment is prepared on a copy of the snapshot
+        return snapshot.result()._fork()._advance(result, prefetch)
+
+    def _cancel_speculations(self):
+        #The copies already started are left to finish, their result is ignored
+        for future, _ in self._speculations.values() :
+            future.cancel()
+        self._speculations = {}
+        
+        #The snapshot reads the session, it must be done before the session changes
+        if self._snapshot is not None and not self._snapshot.cancel() :
+            self._snapshot.result()
+        self._snapshot = None
+
+    def submit(self, result):
+        """
+        Add the judgment of a trio and update the estimated values once the calibration is done.
+
+        Parameters
+        ----------
+        result : tuple
+            The judgment as id of items in the format (Max,(dist,Average),Min), the distance is on the scale of the session.
+
+        Raises
+        ------
+        Exception
+            The session is already converged.
+
+        """
+        if self.converged() :
+            raise Exception("The session is converged, no more assessment is needed.")
+        
+        speculation = self._speculations.pop((int(result[0]), (int(result[1][0]), int(result[1][1])), int(result[2])), None)
+        
+        #The copy not started yet is not waited for, the session is updated directly
+        if speculation is not None and (speculation[0].cancel() or speculation[1] != self._rng.bit_generator.state) :
+            speculation = None
+        self._cancel_speculations()
+        
+        #The judgment was prepared in the background, the copy is used if the random generator is in the same state
+        if speculation is not None :
+            fork = speculation[0].result()
+            
+            self._assessments.append(fork._assessments[-1])
+            self._state = fork._state
+            self._estimator = fork._estimator
+            self._estimated_values = fork._estimated_values
+            self._previous_values = fork._previous_values
+            self._accuracy = fork._accuracy
+            self._iteration = fork._iteration
+            self._pending = fork._pending
+            self._rng.bit_generator.state = fork._rng.bit_generator.state
+            return
+        
+        self._assessments.append(result)
+        self._state.add((result[0], result[1][1], result[2]))
+        self._pending = None
+        
+        #We add the new line to the model
+        self._estimator.add(*CTJ_coefficients(result, self._scale))
+        
+        if not self.calibrating :
+            self._estimate()
+
+    def _estimate(self):
+        #We calculate the new estimated values
+        estimated_values = list(self._estimator.solve())
+        estimated_values = Rescale(self._min_item[0], self._max_item[0], estimated_values)
+        
+        if len(self._assessments) > len(self._calibration) :
+            self._iteration += 1
+        
+        self._previous_values, self._estimated_values = self._estimated_values, estimated_values
+        
+        #We calculate the new accuracy, the convergence of the estimation if the true values are unknown
+        if self._true_values is not None :
+            self._accuracy = SSR(self._true_values, estimated_values)
+        elif self._iteration > 0 :
+            self._accuracy = SSR(self._previous_values, estimated_values)
+
+    def estimates(self):
+        """
+        Get the estimated values, rescaled between the values of the min and max items.
+
+        Returns
+        -------
+        estimated_values : list of int
+            The estimated values corresponding to each item in the `items` list, None until the calibration is done.
+
+        """
+        if self._estimated_values is None :
+            return None
+        
+        return Rescale(self._min_item[0], self._max_item[0], self._estimated_values)
+
+    def converged(self):
+        """
+        Check if the session is over, the calibration is done and the maximum number of iterations or the accuracy is reached.
+
+        Returns
+        -------
+        bool
+            True if no more assessment is needed.
+
+        """
+        return not self.calibrating and (self._iteration >= self._max_iteration or self._accuracy >= self._max_accuracy)
+
+def CTJ_report (items, true_values, estimated_values, cond, error, sensibility, nb_assessments, assessments_time, assessment_method):
+    """
+    This function prints the results of a CTJ session.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list, or None.
+    estimated_values : list of int
+        A list of int containing the estimated values corresponding to each item in the `items` list.
+    cond : float
+        Accuracy of estimated value at the end of algorithm.
+    error : list of int
+        The number of inversion and the number of scale error.
+    sensibility : tuple
+        The sensibility of the automated assessment.
+    nb_assessments : int
+        Number of iteration.
+    assessments_time : double
+        The duration of the assessments.
+    assessment_method : fun
+        The assessment method, or None.
+
+    """
+    
+    print("===============================================================")
+    print("| Result of CTJ algorithm")
+    print("| Items : ", items)
+    if true_values is not None :
+        print("| True values : ", true_values)
+    print("| Estimated values : ", estimated_values)
+    if true_values is not None :
+        print("| Accuracy : ", cond)
+    if sensibility != (0,0,0) :
+        print("| Number of inversion : ", error[0])
+        print("| Number of scale error : ", error[1])
+    if sensibility == (0,0,0):
+        print("| Your mean scale error : ", error[1])
+    print("| Iteration : ", nb_assessments)
+    if assessment_method is not None :
+        print("| Total duration : ", assessments_time)
+    print("===============================================================")
+
+def CTJ (min_item, max_item, items, sensibility = (0,0,0), true_values = None, max_iteration = 30, max_accuracy = 0.9, scale = 10, assessment_method = None, candidate_window = None, backend = "dense", rng = None):
     """
     Comparative Triple judgement (CTJ) is an evaluation method based on the comparison of a trio of elements. Rather than scoring each item on a fixed scale, evaluators directly compare three items at once, ranking them from best to worst, and then position the central item on a scale by moving it closer to the end that best matches it.  CTJ was devised by Dr Kevin Kelly.
 
@@ -419,6 +924,17 @@ def CTJ (min_item, max_item, items, sensibility = (0,0,0), true_values = None, m
         The value of the scale for the CTJ model. Default is 10.
     assessment_method : fun
         The assessment method. If none, the assessment is automatically performed using the true value. Default is None.
+    candidate_window : int, optional
+        If None all the trios are candidates for the selection, else only the trios of items within this number of neighbours once sorted by estimated value, plus some random trios. Use it for large items list. Default is None.
+    backend : string, optional
+        The least squares model, "dense" accumulates the normal equations, "sparse" keeps only the non-zero coefficients and solves iteratively from the previous estimation. Use "sparse" for several thousands items. Default is "dense".
+    rng : numpy.random.Generator or int, optional
+        The random generator of the session, or its seed. If None, a new generator is seeded from the system. The default is None.
+    
+    Raises
+    ------
+    Exception
+        The assessment method is defined with async def and an event loop is already running, await CTJ_async instead.
         
     Returns
     -------
@@ -435,92 +951,106 @@ def CTJ (min_item, max_item, items, sensibility = (0,0,0), true_values = None, m
 
     """
     
-    #If min and max value are not in the items list we add them
-    if min_item[1] not in items :
-         items.append(min_item[1])
-         if true_values is not None :
-             true_values.append(min_item[0])
-    if max_item[1] not in items :
-         items.append(max_item[1])
-         if true_values is not None :
-             true_values.append(max_item[0])
+    #An assessment method defined with async def is run by the asynchronous session in a new event loop
+    if inspect.iscoroutinefunction(assessment_method) :
+        return run_session(CTJ_async(min_item, max_item, items, sensibility, true_values, max_iteration, max_accuracy, scale, assessment_method, candidate_window, backend, rng), "CTJ_async")
     
-    #We initialize the A array, b array and assessments list
-    A, b, assessments, assessments_time, error, window = CTJ_init(items, items.index(max_item[1]), items.index(min_item[1]), max_item[0], min_item[0], sensibility, true_values, scale, assessment_method )
+    #All the draws of the session come from the same generator
+    rng = np.random.default_rng(rng)
     
-    iteration = 0
+    #The session selects the trios and calculates the estimated values, the judge only assesses the trios
+    session = CTJSession(min_item, max_item, items, true_values, max_iteration, max_accuracy, scale, candidate_window, backend, rng)
     
-    all_estimated_values=[]
+    assessments_time = 0
     
-    #We calculate the estimated value after the initialisation
-    estimated_values = np.linalg.lstsq(A,b,rcond=1e-17)[0]
-    estimated_values = list(chain.from_iterable(estimated_values)) 
-    estimated_values = Rescale(min_item[0], max_item[0], estimated_values)
-
-    #We add it to the list containing all the estimated values
-    all_estimated_values.append(estimated_values)
-        
-    #We select the accuracy method depending the existence of true_values list
-    if true_values is None:
-        accuracy = lambda true_values, estimated_values, all_estimated_values: SSR(all_estimated_values[-2], all_estimated_values[-1])
-        cond = 0
-    else :
-        accuracy = lambda true_values, estimated_values, all_estimated_values: SSR(true_values, estimated_values)
-        cond = accuracy(true_values, estimated_values, all_estimated_values)
-
+    error = [0,0]
+    
+    window = CTJ_window(items, scale, assessment_method, rng)
+    
+    #The items of the next trios are loaded by the assessment method while the judge is deciding
+    prefetch = getattr(assessment_method, "prefetch", None)
+    def prefetch_trio(trio):
+        prefetch([items[x] for x in trio], window)
     
-    while ((iteration<max_iteration) and (cond<max_accuracy)):
+    while not session.converged():
         
-        #We select the best next trio
-        trio = CTJ_new_trio(items, assessments, estimated_values)
+        trio = session.next_trio()
+        
+        #While the judge is deciding, the next trio is selected in the background for the likely judgments
+        if window is not None :
+            session.speculate(prefetch = None if prefetch is None else prefetch_trio)
         
         #We add the new assessment
-        assessment = make_CTJ_assessment(items, trio, sensibility, true_values, scale, assessment_method, len(assessments)+1, window)
-        assessments.append(assessment[0])
+        assessment = make_CTJ_assessment(items, trio, sensibility, true_values, scale, assessment_method, session.nb_assessments+1, window, session.index, rng)
         assessments_time += assessment[1]
         error[0] += assessment[2][0]
         error[1] += assessment[2][1]
         
-        #We upgrade the A and b array
-        line = CTJ_assessments(items, A, b, assessments[-1], scale)
-        A = np.vstack([A, line])
-        b = np.vstack([b, [0]])
+        session.submit(assessment[0])
+    
+    if window is not None :
+        window.root.destroy()
+    
+    #We rescale them
+    estimated_values = session.estimates()
+    cond = session.accuracy
+    
+    if assessment_method is not None :
+        error[1]=error[1]/len(assessment)
         
-        #We calculate the new estimated values
-        estimated_values = np.linalg.lstsq(A,b,rcond=1e-17)[0]
-        estimated_values = list(chain.from_iterable(estimated_values)) 
-        estimated_values = Rescale(min_item[0], max_item[0], estimated_values)
+    CTJ_report(items, true_values, estimated_values, cond, error, sensibility, session.nb_assessments, assessments_time, assessment_method)
+    return estimated_values, session.nb_assessments, cond, error, assessments_time
+
+async def CTJ_async (min_item, max_item, items, sensibility = (0,0,0), true_values = None, max_iteration = 30, max_accuracy = 0.9, scale = 10, assessment_method = None, candidate_window = None, backend = "dense", rng = None):
+    """
+    The asynchronous version of CTJ, for an assessment method defined with `async def`, for example a judge answering over a socket.
+    Several sessions can run in the same event loop with asyncio.gather.
+    No window is opened for a coroutine assessment method, it is called with None as window.
+
+    Parameters
+    ----------
+    The parameters of CTJ.
+
+    Returns
+    -------
+    The results of CTJ.
+
+    """
+    
+    #All the draws of the session come from the same generator
+    rng = np.random.default_rng(rng)
+    
+    #The session selects the trios and calculates the estimated values, the judge only assesses the trios
+    session = CTJSession(min_item, max_item, items, true_values, max_iteration, max_accuracy, scale, candidate_window, backend, rng)
+    
+    assessments_time = 0
+    
+    error = [0,0]
+    
+    #A coroutine assessment method has no window, a function is shown in a window as in CTJ
+    window = None if inspect.iscoroutinefunction(assessment_method) else CTJ_window(items, scale, assessment_method, rng)
+    
+    while not session.converged():
+        
+        trio = session.next_trio()
         
-        all_estimated_values.append(estimated_values)
+        #We add the new assessment
+        assessment = await make_CTJ_assessment_async(items, trio, sensibility, true_values, scale, assessment_method, session.nb_assessments+1, window, session.index, rng)
+        assessments_time += assessment[1]
+        error[0] += assessment[2][0]
+        error[1] += assessment[2][1]
         
-        #We calculate the new accuracy
-        cond = accuracy(true_values, estimated_values, all_estimated_values)
-        iteration += 1
+        session.submit(assessment[0])
     
     if window is not None :
         window.root.destroy()
     
     #We rescale them
-    estimated_values = Rescale(min_item[0], max_item[0], estimated_values)
+    estimated_values = session.estimates()
+    cond = session.accuracy
     
     if assessment_method is not None :
         error[1]=error[1]/len(assessment)
         
-    print("===============================================================")
-    print("| Result of CTJ algorithm")
-    print("| Items : ", items)
-    if true_values is not None :
-        print("| True values : ", true_values)
-    print("| Estimated values : ", estimated_values)
-    if true_values is not None :
-        print("| Accuracy : ", cond)
-    if sensibility != (0,0,0) :
-        print("| Number of inversion : ", error[0])
-        print("| Number of scale error : ", error[1])
-    if sensibility == (0,0,0):
-        print("| Your mean scale error : ", error[1])
-    print("| Iteration : ", len(assessments))
-    if assessment_method is not None :
-        print("| Total duration : ", assessments_time)
-    print("===============================================================")
-    return estimated_values, len(assessments), cond, error, assessments_time
\ No newline at end of file
+    CTJ_report(items, true_values, estimated_values, cond, error, sensibility, session.nb_assessments, assessments_time, assessment_method)
+    return estimated_values, session.nb_assessments, cond, error, assessments_time
@@ -4,15 +4,15 @@ Created on Fri May 17 14:45:35 2024
 
 @author: Romain Perrier
 """
-import random as rd
+import inspect
 import numpy as np
 import time
 
-from .util import SSR, Rescale, ready, WindowManager
+from .util import SSR, Rescale, run_session
 
 ###############################         FUNCTIONS       ############################################
 
-def make_Rubric_assessment(items, item, sensibility, true_values, estimated_values, assessment_method, nb_assessment, window):
+def make_Rubric_assessment(items, item, sensibility, true_values, estimated_values, assessment_method, nb_assessment, window, rng = None):
     """
     This function is used to do the assessment on an item and return the value of it
 
@@ -20,8 +20,8 @@ def make_Rubric_assessment(items, item, sensibility, true_values, estimated_valu
     ----------
     items : list of string
         A list of strings representing the items to be assessed.
-    item :  string
-        A string representing the item being assessed.
+    item :  int
+        The id, the position in the `items` list, of the item being assessed.
     sensibility :tuple
          A tuple cointaining the marge of error, and the probability of making a mystake. In the format (int, double).
     true_values : list of int
@@ -32,6 +32,8 @@ def make_Rubric_assessment(items, item, sensibility, true_values, estimated_valu
         The assessment method. If none, the assessment is automatically performed using the true value.
     nb_assessment: int
         The number of assessment done.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Raises
     ------
@@ -51,14 +53,23 @@ def make_Rubric_assessment(items, item, sensibility, true_values, estimated_valu
     
     one_more_bias = 0
     
+    rng = np.random.default_rng(rng)
+    
     if assessment_method is not None :
         
+        from .gui import ready
+        
+        #The assessment method can load the items while the judge gets ready
+        prefetch = getattr(assessment_method, "prefetch", None)
+        if prefetch is not None :
+            prefetch([items[item]], window)
+        
         ready(window)
 
         a = time.time()
         
         #We let the judges make the assessment
-        estimated_values[items.index(item)] = assessment_method(item, nb_assessment, window)
+        estimated_values[item] = assessment_method(items[item], nb_assessment, window)
         
         b = time.time()
         
@@ -70,17 +81,17 @@ def make_Rubric_assessment(items, item, sensibility, true_values, estimated_valu
         
         bias = 0
         
-        if rd.random() < sensibility[1] :
+        if rng.random() < sensibility[1] :
         
             bias = sensibility[0]
             
-            if rd.random() < 0.5 :
+            if rng.random() < 0.5 :
                 bias = bias * -1
                 
             one_more_bias = 1
             
         
-        estimated_values[items.index(item)]  =  true_values[items.index(item)] + bias
+        estimated_values[item]  =  true_values[item] + bias
         
         b = time.time()
         
@@ -91,7 +102,294 @@ def make_Rubric_assessment(items, item, sensibility, true_values, estimated_valu
     
     return estimated_values , assessment_duration, one_more_bias
 
-def Rubric(min_item, max_item, items, sensibility = (0,0), true_values = None, assessment_method = None):
+async def make_Rubric_assessment_async(items, item, sensibility, true_values, estimated_values, assessment_method, nb_assessment, window, rng = None):
+    """
+    The asynchronous version of make_Rubric_assessment, for an assessment method defined with `async def`. The other assessments are done by make_Rubric_assessment.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items to be assessed.
+    item :  int
+        The id, the position in the `items` list, of the item being assessed.
+    sensibility :tuple
+         The sensibility of the automated assessment, see make_Rubric_assessment.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+    estimated_values : list of int
+        A list of int containing the estimated values corresponding to each item in the `items` list.
+    assessment_method : fun
+        The assessment method, a coroutine function or a function. If none, the assessment is automatically performed using the true value.
+    nb_assessment: int
+        The number of assessment done.
+    window : WindowManager
+        an object to manage human assessments, None for an assessment method defined with `async def`.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    estimated_values : list of int
+        The list containing the estimated values for all items.
+    assessment_duration : double
+        Duration of the assessment in second.
+    one_more_bias : int
+        One if the judgment is biaised else 0.
+
+    """
+    
+    if not inspect.iscoroutinefunction(assessment_method) :
+        return make_Rubric_assessment(items, item, sensibility, true_values, estimated_values, assessment_method, nb_assessment, window, rng)
+    
+    a = time.time()
+    
+    #We wait for the judge without blocking the other sessions of the event loop
+    estimated_values[item] = await assessment_method(items[item], nb_assessment, window)
+    
+    b = time.time()
+    
+    return estimated_values, b-a, 0
+
+def Rubric_window (items, assessment_method, rng = None):
+    """
+    This fonction opens the window of a human Rubric assessment and shows the tutorial.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items to be assessed.
+    assessment_method : fun
+        The assessment method. If none, no window is opened.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    window : WindowManager
+        an object to manage human assessments, None if `assessment_method` is None.
+
+    """
+    
+    rng = np.random.default_rng(rng)
+    
+    window = None
+    
+    if assessment_method is not None :
+        
+        #tkinter is only imported when a human assessment is done
+        from .gui import ready, WindowManager
+        
+        window = WindowManager()
+        
+        skip_tutorial = ready(window, info="The Rubric assessment involves individually grading each item.\n\nIn each iteration, you will be asked to enter the value of the item shown in the box below.\n\nTo access the tutorial, click on the 'Tutorial' button.\n The tutorial includes an evaluation of the algorithm.\n After completing the tutorial evaluation, the actual test will begin.\n\nBetween each evaluation, a button will appear.\n Ensure you are ready before clicking it, as a countdown will start once clicked.\n At the end of the countdown, you can evaluate the item, so make sure you are prepared.", status="Tuto")
+    
+        if not skip_tutorial:
+            item = items[rng.integers(len(items))]
+            _ = assessment_method(item , -1, window)
+    
+    return window
+
+class RubricSession:
+    """
+    A class to keep the state of a Rubric session, driven step by step : the session gives the next item to assess with next_item,
+    the value given by the judge is given back with submit. Each item is assessed one time, in a random order.
+
+    Attributes:
+    -----------
+    _items : list of string
+        The items to be assessed, the min and max items are added if they are missing.
+    _min_item : tuple
+        The min_item, in the format (int, string).
+    _max_item : tuple
+        The max_item, in the format (int, string).
+    _true_values : list of int or None
+        The true values of the items, None if they are unknown.
+    _remaining : list of int
+        The id of the items not assessed yet, the next one is the last.
+    _values : float array
+        The value given to each item, 0 if it is not assessed yet.
+
+    Methods:
+    --------
+    items() -> list of string:
+        Property to get the items of the session.
+    values() -> float array:
+        Property to get the value given to each item.
+    nb_assessments() -> int:
+        Property to get the number of assessments done.
+    accuracy() -> float:
+        Property to get the accuracy of the estimated values, None if the true values are unknown or the session is not converged.
+    next_item() -> int:
+        Get the id of the next item to assess, None if the session is converged.
+    upcoming_items(nb: int) -> list of int:
+        Get the id of the items assessed after the next one.
+    submit(value: int):
+        Give its value to the next item.
+    estimates() -> list of int:
+        Get the values rescaled between the min and max values.
+    converged() -> bool:
+        Check if all the items are assessed.
+    """
+    
+    __slots__ = ("_items", "_min_item", "_max_item", "_true_values", "_remaining", "_values")
+
+    def __init__(self, min_item, max_item, items, true_values = None, rng = None):
+        #If min and max value are not in the items list we add them
+        if min_item[1] not in items :
+             items.append(min_item[1])
+             if true_values is not None :
+                 true_values.append(min_item[0])
+        if max_item[1] not in items :
+             items.append(max_item[1])
+             if true_values is not None :
+                 true_values.append(max_item[0])
+        
+        self._items = items
+        self._min_item = min_item
+        self._max_item = max_item
+        self._true_values = true_values
+        
+        #The algorithm works on the id of the items
+        self._remaining = list(range(len(items)))
+        np.random.default_rng(rng).shuffle(self._remaining)
+        
+        self._values = np.zeros(len(items))
+
+    @property
+    def items(self):
+        return self._items
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def nb_assessments(self):
+        return len(self._items) - len(self._remaining)
+
+    @property
+    def accuracy(self):
+        if self._true_values is None or not self.converged() :
+            return None
+        return SSR(self._true_values, self.estimates())
+
+    def next_item(self):
+        """
+        Get the next item to assess. The same item is returned until its value is submitted.
+
+        Returns
+        -------
+        item : int
+            The id of the item, None if the session is converged.
+
+        """
+        if self.converged() :
+            return None
+        
+        return self._remaining[-1]
+
+    def upcoming_items(self, nb = 1):
+        """
+        Get the items assessed after the one returned by next_item, the order of the items is drawn at the creation of the session.
+
+        Parameters
+        ----------
+        nb : int, optional
+            The maximum number of items. The default is 1.
+
+        Returns
+        -------
+        items : list of int
+            The id of the items, in the order they will be assessed.
+
+        """
+        return self._remaining[-2:-nb-2:-1]
+
+    def submit(self, value):
+        """
+        Give its value to the item returned by next_item.
+
+        Parameters
+        ----------
+        value : int
+            The value of the item.
+
+        Raises
+        ------
+        Exception
+            The session is already converged.
+
+        """
+        if self.converged() :
+            raise Exception("The session is converged, no more assessment is needed.")
+        
+        self._values[self._remaining.pop()] = value
+
+    def estimates(self):
+        """
+        Get the values of the items, rescaled between the values of the min and max items.
+
+        Returns
+        -------
+        estimated_values : list of int
+            The estimated values corresponding to each item in the `items` list.
+
+        """
+        return Rescale(self._min_item[0], self._max_item[0], self._values)
+
+    def converged(self):
+        """
+        Check if the session is over, all the items are assessed.
+
+        Returns
+        -------
+        bool
+            True if no more assessment is needed.
+
+        """
+        return len(self._remaining) == 0
+
+def Rubric_report (items, true_values, estimated_values, acc, error, sensibility, assessments_time, assessment_method):
+    """
+    This function prints the results of a Rubric session.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list, or None.
+    estimated_values : list of int
+        A list of int containing the estimated values corresponding to each item in the `items` list.
+    acc : float
+        Accuracy of estimated value, None if the true values are unknown.
+    error : int
+        Number of error.
+    sensibility : tuple
+        The sensibility of the automated assessment.
+    assessments_time : double
+        The duration of the assessments.
+    assessment_method : fun
+        The assessment method, or None.
+
+    """
+    
+    print("===============================================================")
+    print("| Result of Rubric algorithm")
+    print("| Items : ", items)
+    if true_values is not None :
+        print("| True values : ", true_values)
+    print("| Estimated values : ", estimated_values)
+    if true_values is not None :
+        print("| Accuracy : ", acc)
+    if sensibility != (0,0) :
+        print("| Number of error : ", error)
+    print("| Iteration : ", len(items))
+    if assessment_method is not None :
+        print("| Total duration : ", assessments_time)
+    print("===============================================================")
+
+def Rubric(min_item, max_item, items, sensibility = (0,0), true_values = None, assessment_method = None, rng = None):
     """
     Rubric Judgment is an evaluation method based on the direct notation of an item. An item is shown and we must evaluate it and give a value to it.
 
@@ -109,6 +407,13 @@ def Rubric(min_item, max_item, items, sensibility = (0,0), true_values = None, a
         A list of int containing the true values corresponding to each item in the `items` list. The default is None.
     assessment_method : fun
         The assessment method. If none, the assessment is automatically performed using the true value. The default is None.    
+    rng : numpy.random.Generator or int, optional
+        The random generator of the session, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Raises
+    ------
+    Exception
+        The assessment method is defined with async def and an event loop is already running, await Rubric_async instead.
 
     Returns
     -------
@@ -125,65 +430,90 @@ def Rubric(min_item, max_item, items, sensibility = (0,0), true_values = None, a
         
     """
     
-    #If min and max value are not in the items list we add them
-    if min_item[1] not in items :
-         items.append(min_item[1])
-         if true_values is not None :
-             true_values.append(min_item[0])
-    if max_item[1] not in items :
-         items.append(max_item[1])
-         if true_values is not None :
-             true_values.append(max_item[0])
+    #An assessment method defined with async def is run by the asynchronous session in a new event loop
+    if inspect.iscoroutinefunction(assessment_method) :
+        return run_session(Rubric_async(min_item, max_item, items, sensibility, true_values, assessment_method, rng), "Rubric_async")
     
-    items_copy = items[:]
+    #All the draws of the session come from the same generator
+    rng = np.random.default_rng(rng)
     
-    rd.shuffle(items_copy)
+    #The session gives the items to assess in a random order
+    session = RubricSession(min_item, max_item, items, true_values, rng)
     
     assessments_time = 0
     
     error = 0
     
-    window = None
+    window = Rubric_window(items, assessment_method, rng)
     
-    estimated_values = np.zeros(len(items))
-    
-    if assessment_method is not None :
+    prefetch = getattr(assessment_method, "prefetch", None)
+
+    while not session.converged() :
         
-        window = WindowManager()
+        item = session.next_item()
         
-        skip_tutorial = ready(window, info="The Rubric assessment involves individually grading each item.\n\nIn each iteration, you will be asked to enter the value of the item shown in the box below.\n\nTo access the tutorial, click on the 'Tutorial' button.\n The tutorial includes an evaluation of the algorithm.\n After completing the tutorial evaluation, the actual test will begin.\n\nBetween each evaluation, a button will appear.\n Ensure you are ready before clicking it, as a countdown will start once clicked.\n At the end of the countdown, you can evaluate the item, so make sure you are prepared.", status="Tuto")
+        #The order of the items is known, the following item is loaded with this one while the judge is deciding
+        if prefetch is not None :
+            prefetch([items[x] for x in [item] + session.upcoming_items()], window)
+        
+        estimated_values, time, one_more_bias = make_Rubric_assessment(items, item, sensibility, true_values, session.values, assessment_method, session.nb_assessments+1, window, rng)
+        assessments_time += time
+        error += one_more_bias
+        session.submit(estimated_values[item])
     
-        if not skip_tutorial:
-            item = rd.choice(items)
-            _ = assessment_method(item , -1, window)    
+    estimated_values = session.estimates()
+    
+    acc = session.accuracy
+    
+    if window is not None :
+        window.root.destroy()
+    
+    Rubric_report(items, true_values, estimated_values, acc, error, sensibility, assessments_time, assessment_method)
+    return estimated_values, len(items), acc, error, assessments_time
+
+async def Rubric_async(min_item, max_item, items, sensibility = (0,0), true_values = None, assessment_method = None, rng = None):
+    """
+    The asynchronous version of Rubric, for an assessment method defined with `async def`, for example a judge answering over a socket.
+    Several sessions can run in the same event loop with asyncio.gather.
+    No window is opened for a coroutine assessment method, it is called with None as window.
+
+    Parameters
+    ----------
+    The parameters of Rubric.
 
-    while len(items_copy) != 0 :
+    Returns
+    -------
+    The results of Rubric.
+
+    """
+    
+    #All the draws of the session come from the same generator
+    rng = np.random.default_rng(rng)
+    
+    #The session gives the items to assess in a random order
+    session = RubricSession(min_item, max_item, items, true_values, rng)
+    
+    assessments_time = 0
+    
+    error = 0
+    
+    #A coroutine assessment method has no window, a function is shown in a window as in Rubric
+    window = None if inspect.iscoroutinefunction(assessment_method) else Rubric_window(items, assessment_method, rng)
+
+    while not session.converged() :
         
-        item = items_copy.pop()
-        estimated_values, time, one_more_bias = make_Rubric_assessment(items, item, sensibility, true_values, estimated_values, assessment_method, len(items)-len(items_copy), window)
+        item = session.next_item()
+        estimated_values, time, one_more_bias = await make_Rubric_assessment_async(items, item, sensibility, true_values, session.values, assessment_method, session.nb_assessments+1, window, rng)
         assessments_time += time
         error += one_more_bias
+        session.submit(estimated_values[item])
     
-    estimated_values = Rescale(min_item[0], max_item[0], estimated_values)
+    estimated_values = session.estimates()
     
-    acc = None
+    acc = session.accuracy
     
     if window is not None :
         window.root.destroy()
     
-    print("===============================================================")
-    print("| Result of Rubric algorithm")
-    print("| Items : ", items)
-    if true_values is not None :
-        print("| True values : ", true_values)
-    print("| Estimated values : ", estimated_values)
-    if true_values is not None :
-        acc = SSR(true_values, estimated_values)
-        print("| Accuracy : ", acc)
-    if sensibility != (0,0) :
-        print("| Number of error : ", error)
-    print("| Iteration : ", len(items))
-    if assessment_method is not None :
-        print("| Total duration : ", assessments_time)
-    print("===============================================================")
-    return estimated_values, len(items), acc, error, assessments_time
\ No newline at end of file
+    Rubric_report(items, true_values, estimated_values, acc, error, sensibility, assessments_time, assessment_method)
+    return estimated_values, len(items), acc, error, assessments_time
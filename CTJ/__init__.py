@@ -4,10 +4,20 @@ Created on Wed May  1 16:05:18 2024
 
 @author: Romain Perrier
 """
-from .Rubric import Rubric
+from .Rubric import Rubric, Rubric_async, RubricSession
 
-from .ACJ import ACJ
+from .ACJ import ACJ, ACJ_async, ACJSession
 
-from .CTJ import CTJ
+from .CTJ import CTJ, CTJ_async, CTJSession
 
-from .assessment_method import rubric_assessment_method_image, acj_assessment_method_image, ctj_assessment_method_image, rubric_assessment_method_pdf, acj_assessment_method_pdf, ctj_assessment_method_pdf
\ No newline at end of file
+#The assessment methods need tkinter, PIL and PyMuPDF, they are only imported when they are used
+_assessment_methods = ("rubric_assessment_method_image", "acj_assessment_method_image", "ctj_assessment_method_image", "rubric_assessment_method_pdf", "acj_assessment_method_pdf", "ctj_assessment_method_pdf")
+
+def __getattr__ (name):
+    if name in _assessment_methods :
+        from . import assessment_method
+        return getattr(assessment_method, name)
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+
+def __dir__ ():
+    return list(globals()) + list(_assessment_methods)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+The command line of the package : python -m CTJ run or python -m CTJ thumbnails.
+"""
+
+import argparse
+import json
+import sys
+
+from .experiment import run_experiment, write_results
+
+###############################         FUNCTIONS       ############################################
+
+def main (argv = None):
+    """
+    Command line interface of the package, run with `python -m CTJ`.
+
+    Parameters
+    ----------
+    argv : list of string, optional
+        The arguments. If None, the arguments of the command line are used. The default is None.
+
+    """
+    parser = argparse.ArgumentParser(prog="python -m CTJ", description="Rubric Assesment, ACJ and CTJ Algorithms implementation.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run automated sessions for each configuration of a parameter grid.")
+    run_parser.add_argument("grid", help="JSON file containing the parameter grid, or a list of grids, see CTJ.experiment.expand_grid.")
+    run_parser.add_argument("--runs", type=int, default=1, help="Number of sessions of each configuration. The default is 1.")
+    run_parser.add_argument("--seed", type=int, default=None, help="Seed of the experiment, the same seed gives the same results.")
+    run_parser.add_argument("--workers", type=int, default=None, help="Number of processes. The default is one per processor.")
+    run_parser.add_argument("--output", default=None, help="CSV file for the results. The default is the standard output.")
+
+    thumbnails_parser = subparsers.add_parser("thumbnails", help="Render the thumbnails of the items of a directory before a session.")
+    thumbnails_parser.add_argument("directory", nargs="?", default=".", help="Directory of the items, the PNG images and PDF documents. The default is the current directory.")
+    thumbnails_parser.add_argument("--screen", action="append", default=None, help="Size of the screens of the judges, in the format WIDTHxHEIGHT. Can be repeated. The default is 1920x1080.")
+    thumbnails_parser.add_argument("--workers", type=int, default=None, help="Number of processes. The default is one per processor.")
+    thumbnails_parser.add_argument("--force", action="store_true", help="Render all the thumbnails again, not only the ones of new or modified items.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run" :
+        with open(args.grid, "r", encoding="utf-8") as f :
+            grid = json.load(f)
+
+        results = run_experiment(grid, args.runs, args.seed, args.workers)
+
+        if args.output is None :
+            write_results(results, sys.stdout)
+        else :
+            with open(args.output, "w", newline="", encoding="utf-8") as f :
+                write_results(results, f)
+
+    elif args.command == "thumbnails" :
+        #Pillow and PyMuPDF are only imported for this command
+        from .thumbnails import build_thumbnail_store
+        
+        screens = [tuple(int(x) for x in screen.lower().split("x")) for screen in (args.screen or ["1920x1080"])]
+        
+        index, nb_rendered = build_thumbnail_store(args.directory, screens, args.workers, args.force)
+        
+        print(str(nb_rendered) + " thumbnails rendered, " + str(len(index)) + " in the store.")
+
+if __name__ == "__main__" :
+    main()
@@ -10,10 +10,16 @@ try:
 except ImportError:
     raise Exception("tkinter is not installed, for more information refer to : https://github.com/RoPerrier/CTJ/blob/main/fix_import_error_tkinter.md")
 
-from PIL import Image, ImageTk
+from PIL import ImageTk
     
 import os
-import fitz
+
+from collections import deque
+
+from .cache import ThumbnailCache, open_pdf, render_page, pdf_thumbnail, stored_thumbnail
+
+#The resized images of the last items shown, shared by all the assessments
+thumbnails = ThumbnailCache()
 
 ###############################         FUNCTIONS       ############################################
 
@@ -26,6 +32,8 @@ class AssessmentManager:
     -----------
     _testing : bool
         Indicates if the assessment is currently in testing mode. Default is True.
+    _done : tk.BooleanVar or None
+        The variable waited by `wait`, set when the testing status becomes False. Default is None.
     _bad_ending : bool
         Indicates if the assessment ended in an error state. Default is False.
     _sort : list
@@ -42,7 +50,9 @@ class AssessmentManager:
     testing() -> bool:
         Property to get the testing status.
     testing(value: bool):
-        Property to set the testing status.
+        Property to set the testing status, setting it to False ends the wait.
+    wait(window: WindowManager):
+        Waits for the end of the assessment while the window handles its events.
     bad_ending() -> bool:
         Property to get the bad ending status.
     bad_ending(value: bool):
@@ -79,6 +89,7 @@ class AssessmentManager:
 
     def __init__(self):
         self._testing = True
+        self._done = None
         self._bad_ending = False
         self._sort = []
         self._sort_label = []
@@ -92,6 +103,23 @@ class AssessmentManager:
     @testing.setter
     def testing(self, value):
         self._testing = value
+        if not value and self._done is not None:
+            self._done.set(True)
+    
+    def wait(self, window):
+        """
+        Waits until the testing status is set to False by a callback of the window.
+        Tkinter handles the events of the window meanwhile, without using the processor between two events.
+        
+        Parameters:
+        -----------
+        window : WindowManager
+            The window of the assessment.
+        """
+        if self.testing:
+            self._done = tk.BooleanVar(window.root, value=False)
+            window.root.wait_variable(self._done)
+            self._done = None
     
     @property
     def bad_ending(self):
@@ -231,6 +259,134 @@ class AssessmentManager:
         self.testing = False
 
 
+def build_rubric_screen(screen, window, pdf = False):
+    """
+    Build the widgets of the Rubric screen, kept by the window between the judgments.
+
+    Parameters
+    ----------
+    screen : Screen
+        The screen to fill.
+    window : WindowManager
+        an object to manage human assessments.
+    pdf : bool, optional
+        If True, a button opens the viewer of the item. The default is False.
+    """
+    
+    # Create text block
+    screen.text_label = tk.Label(screen.frame, padx=10, pady=10, text = "Please enter the value of this item :", bg=window.bgcolor)
+    screen.text_label.pack()
+    
+    label_frame = tk.Frame(screen.frame, bg=window.bgcolor)
+    label_frame.pack(padx=10, pady=10)
+    
+    screen.labels = [tk.Label(label_frame, bg=window.bgcolor)]
+    screen.labels[0].grid(row=0, column=0, padx=10, pady=10)
+    
+    if pdf:
+        view_button = tk.Button(screen.frame, text="View", command=lambda: screen.viewers[screen.items[0]].create_viewer_window())
+        view_button.pack(pady=10)
+    
+    # Entry only for int
+    entry_frame = tk.Frame(screen.frame, bg=window.bgcolor)
+    entry_frame.pack(padx=10, pady=10)
+    
+    vcmd = window.root.register(lambda input: screen.manager.validate_entry(input))
+    screen.entry = tk.Entry(entry_frame, validate="key", validatecommand=(vcmd, '%P'))
+    screen.entry.pack(padx=10, pady=10)
+    
+    window.root.update_idletasks() #For macOs
+    
+    close_button = tk.Button(screen.frame, text="Next", command = lambda: screen.manager.rubric_close(screen.entry))
+    close_button.pack(pady=10)
+    
+    screen.assessment_label = tk.Label(screen.frame, bg=window.bgcolor)
+    screen.assessment_label.pack(side=tk.BOTTOM, pady=10)
+
+def build_acj_screen(screen, window, pdf = False):
+    """
+    Build the widgets of the ACJ screen, kept by the window between the judgments.
+
+    Parameters
+    ----------
+    screen : Screen
+        The screen to fill.
+    window : WindowManager
+        an object to manage human assessments.
+    pdf : bool, optional
+        If True, a button under each item opens its viewer. The default is False.
+    """
+    
+    # Create text block
+    screen.text_label = tk.Label(screen.frame, padx=10, pady=10, bg=window.bgcolor)
+    screen.text_label.pack()
+    
+    frame = tk.Frame(screen.frame, bg=window.bgcolor)
+    frame.pack(padx=10, pady=10)
+    
+    screen.labels = []
+    
+    for i in range(2):
+        label = tk.Label(frame, bg=window.bgcolor)
+        label.grid(row=0, column=i, padx=10, pady=10)
+        label.bind("<Button-1>", lambda event, idx=i: screen.manager.acj_close(screen.items[idx], screen.items))
+        screen.labels.append(label)
+        
+        if pdf:
+            view_button = tk.Button(frame, text="View", command=lambda idx=i: screen.viewers[screen.items[idx]].create_viewer_window())
+            view_button.grid(row=1, column=i, pady=10)
+    
+    screen.assessment_label = tk.Label(screen.frame, bg=window.bgcolor)
+    screen.assessment_label.pack(side=tk.BOTTOM, pady=10)
+
+def build_ctj_screen(screen, window, pdf = False):
+    """
+    Build the widgets of the CTJ screen, kept by the window between the judgments.
+
+    Parameters
+    ----------
+    screen : Screen
+        The screen to fill.
+    window : WindowManager
+        an object to manage human assessments.
+    pdf : bool, optional
+        If True, a button under each item opens its viewer. The default is False.
+    """
+    
+    #create text block
+    screen.text_label = tk.Label(screen.frame, padx=10, pady=10, text = "Please sort the items from best to worst, then choose the distance between the middle item and the others:\n(To swap two items, click the first one, then the second)", bg=window.bgcolor)
+    screen.text_label.pack()
+
+    label_frame = tk.Frame(screen.frame, bg=window.bgcolor)
+    label_frame.pack(padx=10, pady=10)
+    
+    screen.labels = []
+    
+    for i in range(3):
+        label = tk.Label(label_frame)
+        label.grid(row=0, column=i, padx=10, pady=10)
+        label.bind("<Button-1>", lambda event, idx=i: screen.manager.swap_images(event, idx, screen.items))
+        screen.labels.append(label)
+        
+        if pdf:
+            # The items are swapped in place, the button opens the item shown above it
+            view_button = tk.Button(label_frame, text="View PDF", command=lambda idx=i: screen.viewers[screen.items[idx]].create_viewer_window())
+            view_button.grid(row=1, column=i, padx=10, pady=5)
+    
+    slider_frame = tk.Frame(screen.frame, bg=window.bgcolor)
+    slider_frame.pack(padx=10, pady=10)
+    
+    screen.slider = tk.Scale(slider_frame, from_=0, orient=tk.HORIZONTAL, length=400)
+    screen.slider.grid(row=1, column=0, columnspan=3, pady=10)
+    
+    window.root.update_idletasks() #For macOs
+
+    close_button = tk.Button(screen.frame, text="Next", command=lambda: screen.manager.ctj_close(screen.items, screen.slider, screen.slider_range))
+    close_button.pack(pady=10)
+    
+    screen.assessment_label = tk.Label(screen.frame, bg=window.bgcolor)
+    screen.assessment_label.pack(side=tk.BOTTOM, pady=10)
+
 def rubric_assessment_method_image(item, nb_assessment, window):
     """
     Generate a window to let the user make the Rubric assessment.
@@ -261,14 +417,6 @@ def rubric_assessment_method_image(item, nb_assessment, window):
     rubric_assessment  = AssessmentManager()
         
     item_value = None
-
-    # Check if root and window.bgcolor are already defined
-    window.create_window("Rubric")
-    
-    # Create text block
-    l = tk.Label (padx=10, pady=10, text = "Please enter the value of this item :")
-    l.config(bg=window.bgcolor)
-    l.pack ()
     
     # Load images dynamically based on list elements
     
@@ -279,37 +427,21 @@ def rubric_assessment_method_image(item, nb_assessment, window):
         window.root.destroy()
         raise Exception(image_path + " not in directory.")
     
-    image = resize_image(image_path, (window.root.winfo_screenwidth() * 0.9)//3,window.root.winfo_screenheight() * 0.5)
+    image = resize_image(image_path, *image_size(window))
     
-    label_frame = tk.Frame(window.root, bg=window.bgcolor)
-    label_frame.pack(padx=10, pady=10)
-    
-    label = tk.Label(label_frame, image=image, bg=window.bgcolor)
-    label.grid(row=0, column=0, padx=10, pady=10)
-    
-    # Entry only for int
-    entry_frame = tk.Frame(window.root, bg=window.bgcolor)
-    entry_frame.pack(padx=10, pady=10)
+    # The screen is built at the first assessment, then only the image, the entry and the counter change
+    screen = window.show_screen("Rubric", build_rubric_screen)
+    screen.manager = rubric_assessment
+    screen.items = [item]
+    screen.images = [image]
     
-    vcmd = window.root.register(rubric_assessment.validate_entry)
-    entry = tk.Entry(entry_frame, validate="key", validatecommand=(vcmd, '%P'))
-    entry.pack(padx=10, pady=10)
-    
-    window.root.update_idletasks() #For macOs
-    
-    close_button = tk.Button(window.root, text="Next", command = lambda: rubric_assessment.rubric_close(entry))
-    close_button.pack(pady=10)
-    
-    assessment_label = tk.Label(window.root, text=f"You are making the {nb_assessment} judgement")
-    assessment_label.config(bg=window.bgcolor)
-    assessment_label.pack(side=tk.BOTTOM, pady=10)
+    screen.labels[0].config(image=image)
+    screen.entry.delete(0, tk.END)
+    screen.assessment_label.config(text=f"You are making the {nb_assessment} judgement")
     
     window.root.protocol("WM_DELETE_WINDOW", rubric_assessment.exit_program)
     
-    while rubric_assessment.testing:
-        window.root.update()
-    for widget in window.root.winfo_children():
-        widget.destroy()
+    rubric_assessment.wait(window)
     if rubric_assessment.bad_ending or rubric_assessment.dist == "":
         window.root.destroy()
         raise Exception("Assessment not done !")
@@ -347,16 +479,6 @@ def acj_assessment_method_image(id_judge, pair, nb_assessment, window):
     """
     
     acj_assessment = AssessmentManager()
-
-    window.create_window("ACJ")
-        
-    # Create text block
-    l = tk.Label (padx=10, pady=10, text = "Judge " + str(id_judge+1) + "\nPlease select the best item :")
-    l.config(bg=window.bgcolor)
-    l.pack ()
-    
-    frame = tk.Frame(window.root, bg=window.bgcolor)
-    frame.pack(padx=10, pady=10)
     
     # Load images dynamically based on list elements
     images = []
@@ -369,26 +491,22 @@ def acj_assessment_method_image(id_judge, pair, nb_assessment, window):
             acj_assessment.testing = False
             raise Exception(image_path + " not in directory.")
     
-        images.append(resize_image(image_path, (window.root.winfo_screenwidth() * 0.9)//3, window.root.winfo_screenheight() * 0.5))
-                      
-    label1 = tk.Label(frame, image=images[0], bg=window.bgcolor)
-    label1.grid(row=0, column=0, padx=10, pady=10)
-    label1.bind("<Button-1>", lambda event: acj_assessment.acj_close(pair[0], pair))
+        images.append(resize_image(image_path, *image_size(window)))
     
-    label2 = tk.Label(frame, image=images[1], bg=window.bgcolor)
-    label2.grid(row=0, column=1, padx=10, pady=10)
-    label2.bind("<Button-1>", lambda event: acj_assessment.acj_close(pair[1], pair))
+    # The screen is built at the first assessment, then only the images and the texts change
+    screen = window.show_screen("ACJ", build_acj_screen)
+    screen.manager = acj_assessment
+    screen.items = pair
+    screen.images = images
     
-    assessment_label = tk.Label(window.root, text=f"You are making the {nb_assessment} judgement")
-    assessment_label.config(bg=window.bgcolor)
-    assessment_label.pack(side=tk.BOTTOM, pady=10)
+    screen.text_label.config(text = "Judge " + str(id_judge+1) + "\nPlease select the best item :")
+    for label, image in zip(screen.labels, images):
+        label.config(image=image)
+    screen.assessment_label.config(text=f"You are making the {nb_assessment} judgement")
 
     window.root.protocol("WM_DELETE_WINDOW", acj_assessment.exit_program)
     
-    while acj_assessment.testing:
-        window.root.update()
-    for widget in window.root.winfo_children():
-        widget.destroy()
+    acj_assessment.wait(window)
     if acj_assessment.bad_ending:
         window.root.destroy()
         raise Exception("Assessment not done !")
@@ -426,16 +544,6 @@ def ctj_assessment_method_image(slider_range, trio, nb_assessment, window):
     """
     
     ctj_assessment = AssessmentManager()
-    
-    window.create_window("CTJ")
-
-    #create text block
-    l = tk.Label (padx=10, pady=10, text = "Please sort the items from best to worst, then choose the distance between the middle item and the others:\n(To swap two items, click the first one, then the second)")
-    l.config(bg=window.bgcolor)
-    l.pack ()
-
-    label_frame = tk.Frame(window.root, bg=window.bgcolor)
-    label_frame.pack(padx=10, pady=10)
 
     for image_name in trio:
         image_path = image_name + ".png"
@@ -445,36 +553,25 @@ def ctj_assessment_method_image(slider_range, trio, nb_assessment, window):
             window.root.destroy()
             raise Exception(image_path + " not in directory.")
 
-        ctj_assessment.sort.append(resize_image(image_path, (window.root.winfo_screenwidth() * 0.9)//3,window.root.winfo_screenheight() * 0.5))
-    
-    ctj_assessment.sort_label = [tk.Label(label_frame, image=image) for image in ctj_assessment.sort]
-    
-    for i, label in enumerate(ctj_assessment.sort_label):
-        label.grid(row=0, column=i, padx=10, pady=10)
-        label.bind("<Button-1>", lambda event, idx=i: ctj_assessment.swap_images(event, idx, trio))
+        ctj_assessment.sort.append(resize_image(image_path, *image_size(window)))
     
-    slider_frame = tk.Frame(window.root, bg=window.bgcolor)
-    slider_frame.pack(padx=10, pady=10)
-    
-    slider = tk.Scale(slider_frame, from_=0, to=slider_range, orient=tk.HORIZONTAL, length=400)
-    slider.grid(row=1, column=0, columnspan=len(trio), pady=10)
+    # The screen is built at the first assessment, then only the images, the slider and the counter change
+    screen = window.show_screen("CTJ", build_ctj_screen)
+    screen.manager = ctj_assessment
+    screen.items = trio
+    screen.slider_range = slider_range
     
-    window.root.update_idletasks() #For macOs
-
-    close_button = tk.Button(window.root, text="Next", command=lambda: ctj_assessment.ctj_close(trio, slider, slider_range))
-    close_button.pack(pady=10)
+    ctj_assessment.sort_label = screen.labels
+    for label, image in zip(screen.labels, ctj_assessment.sort):
+        label.config(image=image)
     
-    assessment_label = tk.Label(window.root, text=f"You are making the {nb_assessment} judgement")
-    assessment_label.config(bg=window.bgcolor)
-    assessment_label.pack(side=tk.BOTTOM, pady=10)
+    screen.slider.config(to=slider_range)
+    screen.slider.set(0)
+    screen.assessment_label.config(text=f"You are making the {nb_assessment} judgement")
 
     window.root.protocol("WM_DELETE_WINDOW", ctj_assessment.exit_program)
     
-    while ctj_assessment.testing :
-        window.root.update()
-        
-    for widget in window.root.winfo_children():
-        widget.destroy()
+    ctj_assessment.wait(window)
     if ctj_assessment.bad_ending :
         window.root.destroy()
         raise Exception("Assessment not done !")
@@ -501,17 +598,52 @@ def resize_image(image_path, width, height):
     resized_image : tk.PhotoImage
         Resized image as a Tkinter PhotoImage object.
     """
-        
-    original_image = Image.open(image_path)
     
-    # Use the thumbnail method to resize the image in place
-    original_image.thumbnail((width, height), Image.Resampling.LANCZOS)
+    # The image is only loaded and resized if it is not in the cache
+    original_image = thumbnails.get(image_path, width, height)
     
     # Convert the resized image to a Tkinter PhotoImage object
     resized_image = ImageTk.PhotoImage(original_image)
     
     return resized_image
 
+def image_size(window):
+    """
+    The maximum size of the images in the assessment windows, a third of the width and half of the height of the screen.
+    The size of the screen is the one read at the creation of the window, so it can be called from the background threads.
+
+    Parameters
+    ----------
+    window : WindowManager
+        an object to manage human assessments.
+
+    Returns
+    -------
+    tuple
+        The maximum width and height of the images.
+    """
+    
+    screen_width, screen_height = window.screen_size
+    return (screen_width * 0.9)//3, screen_height * 0.5
+
+def prefetch_images(items, window):
+    """
+    Load and resize the images of the items in a background thread, so the next assessment window is shown without waiting.
+
+    Parameters
+    ----------
+    items : list of string
+        A list of strings representing the items that will be shown.
+    window : WindowManager
+        an object to manage human assessments.
+    """
+    
+    if window is None or window.root is None:
+        return
+    
+    width, height = image_size(window)
+    thumbnails.prefetch([item + ".png" for item in items], width, height)
+
 
 ###PDF
 
@@ -520,13 +652,19 @@ class PDFViewer:
     def __init__(self, root, file_name):
         self.root = root
         self.file_name = file_name
-        self.doc = fitz.open(file_name)
-        self.num_pages = len(self.doc)
+        # The document is shared by all the viewers of the file, it is only opened once
+        self.num_pages = len(open_pdf(file_name))
         self.current_page = 0
         self.img_tk = None
-        self.image_refs = []
+        # Only the images displayed must be kept from the garbage collection
+        self.image_refs = deque(maxlen=2)
+        self.shown = None
+        self.resize_job = None
+        self.viewer_root = None
 
     def create_viewer_window(self):
+        # A new window shows its page even if it is already rendered
+        self.shown = None
         self.viewer_root = tk.Toplevel(self.root)
         self.viewer_root.geometry('750x700')
 
@@ -556,22 +694,34 @@ class PDFViewer:
         # Configure the scroll bar
         self.scrollbar.config(command=self.canvas.yview)
 
-        self.viewer_root.protocol("WM_DELETE_WINDOW", self.viewer_root.destroy)
+        self.viewer_root.protocol("WM_DELETE_WINDOW", self.close_viewer_window)
+
+    def close_viewer_window(self):
+        if self.viewer_root is None:
+            return
+        if self.resize_job is not None:
+            self.viewer_root.after_cancel(self.resize_job)
+            self.resize_job = None
+        self.shown = None
+        self.viewer_root.destroy()
+        self.viewer_root = None
 
     def pdf_to_img(self, page_num, width):
-        page = self.doc.load_page(page_num)
-        zoom = width / page.rect.width
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        # The pages are rendered once for each width bucket, the image is shared by the cache
+        return render_page(self.file_name, page_num, width)
 
     def show_image(self):
+        self.resize_job = None
         try:
             width = self.canvas.winfo_width()
             if width <= 1:  # Initial call before canvas is properly sized
-                self.viewer_root.after(100, self.show_image)
+                self.resize_job = self.viewer_root.after(100, self.show_image)
                 return
             im = self.pdf_to_img(self.current_page, width)
+            # Nothing to redraw if the window was resized within the same width bucket
+            if self.shown == (self.current_page, im.width):
+                return
+            self.shown = (self.current_page, im.width)
             self.img_tk = ImageTk.PhotoImage(im)
             self.canvas.delete("all")  # Clear previous images
             self.canvas.create_image(0, 0, anchor='nw', image=self.img_tk)
@@ -601,72 +751,64 @@ class PDFViewer:
             self.show_image()
 
     def on_resize(self, event):
-        self.show_image()
+        # A window drag sends many events, the page is only shown once the size stops changing
+        if self.resize_job is not None:
+            self.viewer_root.after_cancel(self.resize_job)
+        self.resize_job = self.viewer_root.after(150, self.show_image)
 
     def display_first_page(self, width, height):
-        first_page_image = self.pdf_to_img(0, width)
-
-        first_page_image.thumbnail((width, height), Image.Resampling.LANCZOS)
+        # The thumbnail rendered in advance is used if it is up to date
+        first_page_image = stored_thumbnail(self.file_name, width, height)
+        
+        if first_page_image is None:
+            first_page_image = pdf_thumbnail(self.file_name, width, height)
         
         return ImageTk.PhotoImage(first_page_image)
 
+def close_viewers(viewers):
+    """
+    Close the viewer windows opened during an assessment, the screen of the assessment is kept.
+
+    Parameters
+    ----------
+    viewers : dict
+        The viewer of each item, in the format {string : PDFViewer}.
+    """
+    for viewer in viewers.values():
+        viewer.close_viewer_window()
+
 def rubric_assessment_method_pdf(item, nb_assessment, window):
     rubric_assessment = AssessmentManager()
         
     item_value = None
 
-    window.create_window("Rubric")
-    
-    l = tk.Label(padx=10, pady=10, text="Please enter the value of this item:")
-    l.config(bg=window.bgcolor)
-    l.pack()
-
-    # Create PDFViewer instance without displaying it
-    pdf_viewer = PDFViewer(window.root, item + ".pdf")
-
-    # Convert the first page of the PDF to an image
     if not os.path.exists(item + ".pdf"):
         rubric_assessment.testing = False
         window.root.destroy()
         raise Exception(item + ".pdf not in directory.")
     
-    first_page_image = pdf_viewer.display_first_page((window.root.winfo_screenwidth() * 0.9) // 3, window.root.winfo_screenheight() * 0.5)
+    # Create PDFViewer instance without displaying it
+    pdf_viewer = PDFViewer(window.root, item + ".pdf")
 
-    label_frame = tk.Frame(window.root, bg=window.bgcolor)
-    label_frame.pack(padx=10, pady=10)
+    # Convert the first page of the PDF to an image
     
-    label = tk.Label(label_frame, image=first_page_image, bg=window.bgcolor)
-    label.grid(row=0, column=0, padx=10, pady=10)
-    label.image = first_page_image  # Keep a reference to avoid garbage collection
-
-    def view():
-        pdf_viewer.create_viewer_window()
+    first_page_image = pdf_viewer.display_first_page(*image_size(window))
 
-    view_button = tk.Button(window.root, text="View", command=view)
-    view_button.pack(pady=10)
+    # The screen is built at the first assessment, then only the image, the entry and the counter change
+    screen = window.show_screen("Rubric PDF", build_rubric_screen, True)
+    screen.manager = rubric_assessment
+    screen.items = [item]
+    screen.viewers = {item : pdf_viewer}
+    screen.images = [first_page_image]  # Keep a reference to avoid garbage collection
     
-    entry_frame = tk.Frame(window.root, bg=window.bgcolor)
-    entry_frame.pack(padx=10, pady=10)
-    
-    vcmd = window.root.register(rubric_assessment.validate_entry)
-    entry = tk.Entry(entry_frame, validate="key", validatecommand=(vcmd, '%P'))
-    entry.pack(padx=10, pady=10)
-    
-    window.root.update_idletasks()  # For macOS
-    
-    close_button = tk.Button(window.root, text="Next", command=lambda: rubric_assessment.rubric_close(entry))
-    close_button.pack(pady=10)
-    
-    assessment_label = tk.Label(window.root, text=f"You are making the {nb_assessment} judgement")
-    assessment_label.config(bg=window.bgcolor)
-    assessment_label.pack(side=tk.BOTTOM, pady=10)
+    screen.labels[0].config(image=first_page_image)
+    screen.entry.delete(0, tk.END)
+    screen.assessment_label.config(text=f"You are making the {nb_assessment} judgement")
     
     window.root.protocol("WM_DELETE_WINDOW", rubric_assessment.exit_program)
     
-    while rubric_assessment.testing:
-        window.root.update()
-    for widget in window.root.winfo_children():
-        widget.destroy()
+    rubric_assessment.wait(window)
+    close_viewers(screen.viewers)
     if rubric_assessment.bad_ending or rubric_assessment.dist == "":
         window.root.destroy()
         raise Exception("Assessment not done!")
@@ -705,19 +847,10 @@ def acj_assessment_method_pdf(id_judge, pair, nb_assessment, window):
     """
     
     acj_assessment = AssessmentManager()
-
-    window.create_window("ACJ")
-        
-    # Create text block
-    l = tk.Label (padx=10, pady=10, text = "Judge " + str(id_judge+1) + "\nPlease select the best item :")
-    l.config(bg=window.bgcolor)
-    l.pack ()
     
-    frame = tk.Frame(window.root, bg=window.bgcolor)
-    frame.pack(padx=10, pady=10)
-    
-    # Load images dynamically based on list elements
-    pdf = []
+    # The viewer of each item, reused by its view button
+    viewers = {}
+    images = []
     
     for pdf_name in pair:
         pdf_path = pdf_name + ".pdf"
@@ -728,39 +861,25 @@ def acj_assessment_method_pdf(id_judge, pair, nb_assessment, window):
             raise Exception(pdf_path + " not in directory.")
         
         # Create PDFViewer instance without displaying it
-        pdf_viewer = PDFViewer(window.root, pdf_path)
-        pdf.append(pdf_viewer)
-    
-    first_page_image_1 = pdf[0].display_first_page((window.root.winfo_screenwidth() * 0.9) // 3, window.root.winfo_screenheight() * 0.5)
-    first_page_image_2 = pdf[1].display_first_page((window.root.winfo_screenwidth() * 0.9) // 3, window.root.winfo_screenheight() * 0.5)
-
-    def view(pdf_index):
-        pdf[pdf_index].create_viewer_window()
-    
-    label1 = tk.Label(frame, image=first_page_image_1, bg=window.bgcolor)
-    label1.grid(row=0, column=0, padx=10, pady=10)
-    label1.bind("<Button-1>", lambda event: acj_assessment.acj_close(pair[0], pair))
-    
-    view_button1 = tk.Button(frame, text="View", command=lambda: view(0))
-    view_button1.grid(row=1, column=0, pady=10)
-    
-    label2 = tk.Label(frame, image=first_page_image_2, bg=window.bgcolor)
-    label2.grid(row=0, column=1, padx=10, pady=10)
-    label2.bind("<Button-1>", lambda event: acj_assessment.acj_close(pair[1], pair))
+        viewers[pdf_name] = PDFViewer(window.root, pdf_path)
+        images.append(viewers[pdf_name].display_first_page(*image_size(window)))
     
-    view_button2 = tk.Button(frame, text="View", command=lambda: view(1))
-    view_button2.grid(row=1, column=1, pady=10)
+    # The screen is built at the first assessment, then only the images and the texts change
+    screen = window.show_screen("ACJ PDF", build_acj_screen, True)
+    screen.manager = acj_assessment
+    screen.items = pair
+    screen.viewers = viewers
+    screen.images = images
     
-    assessment_label = tk.Label(window.root, text=f"You are making the {nb_assessment} judgement")
-    assessment_label.config(bg=window.bgcolor)
-    assessment_label.pack(side=tk.BOTTOM, pady=10)
+    screen.text_label.config(text = "Judge " + str(id_judge+1) + "\nPlease select the best item :")
+    for label, image in zip(screen.labels, images):
+        label.config(image=image)
+    screen.assessment_label.config(text=f"You are making the {nb_assessment} judgement")
 
     window.root.protocol("WM_DELETE_WINDOW", acj_assessment.exit_program)
     
-    while acj_assessment.testing:
-        window.root.update()
-    for widget in window.root.winfo_children():
-        widget.destroy()
+    acj_assessment.wait(window)
+    close_viewers(viewers)
     if acj_assessment.bad_ending:
         window.root.destroy()
         raise Exception("Assessment not done !")
@@ -799,15 +918,8 @@ def ctj_assessment_method_pdf(slider_range, trio, nb_assessment, window):
     
     ctj_assessment = AssessmentManager()
     
-    window.create_window("CTJ")
-
-    # Create text block
-    l = tk.Label(padx=10, pady=10, text="Please sort the items from best to worst, then choose the distance between the middle one and the others:\n(To swap two items, click the first one and then the second)")
-    l.config(bg=window.bgcolor)
-    l.pack()
-
-    label_frame = tk.Frame(window.root, bg=window.bgcolor)
-    label_frame.pack(padx=10, pady=10)
+    # The viewer of each item, reused by its view button
+    viewers = {}
 
     for pdf_name in trio:
         pdf_path = pdf_name + ".pdf"
@@ -817,58 +929,29 @@ def ctj_assessment_method_pdf(slider_range, trio, nb_assessment, window):
             window.root.destroy()
             raise Exception(pdf_path + " not in directory.")
             
-        pdf_viewer = PDFViewer(window.root, pdf_path)
+        viewers[pdf_name] = PDFViewer(window.root, pdf_path)
         
-        ctj_assessment.sort.append(pdf_viewer.display_first_page((window.root.winfo_screenwidth() * 0.9) // 3, window.root.winfo_screenheight() * 0.5))
+        ctj_assessment.sort.append(viewers[pdf_name].display_first_page(*image_size(window)))
 
-    ctj_assessment.sort_label = [tk.Label(label_frame, image=image) for image in ctj_assessment.sort]
+    # The screen is built at the first assessment, then only the images, the slider and the counter change
+    screen = window.show_screen("CTJ PDF", build_ctj_screen, True)
+    screen.manager = ctj_assessment
+    screen.items = trio
+    screen.viewers = viewers
+    screen.slider_range = slider_range
     
-    def view(pdf_path):
-        PDFViewer(window.root, pdf_path).create_viewer_window()
-        
-    def create_view_button(pdf_path, row, col):
-        button = tk.Button(label_frame, text="View PDF", command=lambda: view(pdf_path))
-        button.grid(row=row, column=col, padx=10, pady=5)
-        return button
-
-    ctj_assessment.view_buttons = []
+    ctj_assessment.sort_label = screen.labels
+    for label, image in zip(screen.labels, ctj_assessment.sort):
+        label.config(image=image)
     
-    def update_display():
-        for i, label in enumerate(ctj_assessment.sort_label):
-            label.grid(row=0, column=i, padx=10, pady=10)
-            ctj_assessment.view_buttons[i].grid(row=1, column=i, padx=10, pady=5)
-            ctj_assessment.view_buttons[i].config(command=lambda path=trio[i] + ".pdf": view(path))
-    
-    for i, label in enumerate(ctj_assessment.sort_label):
-        label.grid(row=0, column=i, padx=10, pady=10)
-        label.bind("<Button-1>", lambda event, idx=i: ctj_assessment.swap_images(event, idx, trio))
-        button = create_view_button(trio[i] + ".pdf", 1, i)
-        ctj_assessment.view_buttons.append(button)
-
-    slider_frame = tk.Frame(window.root, bg=window.bgcolor)
-    slider_frame.pack(padx=10, pady=10)
-    
-    slider = tk.Scale(slider_frame, from_=0, to=slider_range, orient=tk.HORIZONTAL, length=400)
-    slider.grid(row=1, column=0, columnspan=len(trio), pady=10)
-    
-    window.root.update_idletasks() # For macOS
-
-    close_button = tk.Button(window.root, text="Next", command=lambda: ctj_assessment.ctj_close(trio, slider, slider_range))
-    close_button.pack(pady=10)
-    
-    assessment_label = tk.Label(window.root, text=f"You are making the {nb_assessment} judgment")
-    assessment_label.config(bg=window.bgcolor)
-    assessment_label.pack(side=tk.BOTTOM, pady=10)
+    screen.slider.config(to=slider_range)
+    screen.slider.set(0)
+    screen.assessment_label.config(text=f"You are making the {nb_assessment} judgment")
 
     window.root.protocol("WM_DELETE_WINDOW", ctj_assessment.exit_program)
     
-    while ctj_assessment.testing:
-        window.root.update()
-        # Update display after each event loop to reflect swaps
-        update_display()
-        
-    for widget in window.root.winfo_children():
-        widget.destroy()
+    ctj_assessment.wait(window)
+    close_viewers(viewers)
     if ctj_assessment.bad_ending:
         window.root.destroy()
         raise Exception("Assessment not done!")
@@ -876,3 +959,8 @@ def ctj_assessment_method_pdf(slider_range, trio, nb_assessment, window):
     tup = (ctj_assessment.sort, ctj_assessment.dist)
     
     return tup
+
+#The algorithms give the next items to these functions before the judge is ready
+rubric_assessment_method_image.prefetch = prefetch_images
+acj_assessment_method_image.prefetch = prefetch_images
+ctj_assessment_method_image.prefetch = prefetch_images
@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+"""
+The caches of the resized images and of the PDF documents, shared by the assessment windows.
+"""
+
+import json
+import os
+import threading
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+###############################         FUNCTIONS       ############################################
+
+class LRUCache:
+    """
+    A class to keep a bounded number of values, the least recently used one is removed when the cache is full.
+    The cache can be used by several threads.
+
+    Attributes:
+    -----------
+    _maxsize : int
+        The maximum number of values kept.
+    _items : OrderedDict
+        The values, from the least to the most recently used.
+    _on_evict : fun or None
+        Called with the key and the value removed from the cache, to release it. Default is None.
+    _lock : threading.Lock
+        The lock protecting `_items`.
+
+    Methods:
+    --------
+    maxsize() -> int:
+        Property to get the maximum number of values kept.
+    get(key: tuple, default) -> any:
+        Get a value and mark it as the most recently used, `default` if it is not in the cache.
+    put(key: tuple, value: any):
+        Add a value and remove the least recently used ones if the cache is full.
+    clear():
+        Remove all the values.
+    """
+
+    def __init__(self, maxsize, on_evict = None):
+        self._maxsize = maxsize
+        self._items = OrderedDict()
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default = None):
+        """
+        Get a value and mark it as the most recently used.
+
+        Parameters:
+        -----------
+        key : tuple
+            The key of the value.
+        default : any, optional
+            The value returned if the key is not in the cache. Default is None.
+
+        Returns:
+        --------
+        value : any
+            The value of the key, or `default`.
+        """
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        """
+        Add a value as the most recently used, and remove the least recently used ones if the cache is full.
+
+        Parameters:
+        -----------
+        key : tuple
+            The key of the value.
+        value : any
+            The value to keep.
+        """
+        evicted = []
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._maxsize:
+                evicted.append(self._items.popitem(last=False))
+        
+        #The values are released outside of the lock
+        if self._on_evict is not None:
+            for item in evicted:
+                self._on_evict(*item)
+
+    def clear(self):
+        """
+        Remove all the values.
+        """
+        with self._lock:
+            evicted = list(self._items.items())
+            self._items.clear()
+        
+        if self._on_evict is not None:
+            for item in evicted:
+                self._on_evict(*item)
+
+class ThumbnailCache:
+    """
+    A class to keep the last resized images in memory, the least recently used one is removed when the cache is full.
+    An image is identified by its path, the size it is resized to and its modification time, so a modified file is loaded again.
+    The images are loaded and resized with Pillow, when they are needed or in advance in a background thread with prefetch.
+    Only Pillow images are kept, the Tkinter images must be created from them in the thread of the window.
+
+    Attributes:
+    -----------
+    _images : LRUCache
+        The resized images, at most 64 by default.
+    _pending : dict
+        The future of each image being loaded in the background thread.
+    _lock : threading.Lock
+        The lock protecting `_pending`, shared by the window and the background thread.
+    _executor : ThreadPoolExecutor or None
+        The background thread, created at the first prefetch. Default is None.
+
+    Methods:
+    --------
+    maxsize() -> int:
+        Property to get the maximum number of images kept.
+    get(path: str, width: int, height: int) -> PIL.Image.Image:
+        Get the image resized to fit in (width, height), from the cache if possible.
+    prefetch(paths: list of str, width: int, height: int):
+        Load and resize the images in the background thread.
+    clear():
+        Remove all the images.
+    """
+
+    def __init__(self, maxsize = 64):
+        self._images = LRUCache(maxsize)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def maxsize(self):
+        return self._images.maxsize
+
+    def _key(self, path, width, height):
+        path = os.path.abspath(path)
+        return (path, int(width), int(height), os.stat(path).st_mtime_ns)
+
+    def _load(self, key):
+        try:
+            # The thumbnail rendered in advance is used if it is up to date
+            image = stored_thumbnail(key[0], key[1], key[2])
+            if image is None:
+                image = image_thumbnail(key[0], key[1], key[2])
+            
+            self._images.put(key, image)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        
+        return image
+
+    def get(self, path, width, height):
+        """
+        Get an image resized to fit in (width, height) while preserving its aspect ratio.
+        If the image is being loaded in the background, we wait for it instead of loading it twice.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the image file.
+        width : int
+            The maximum width of the image.
+        height : int
+            The maximum height of the image.
+
+        Returns:
+        --------
+        image : PIL.Image.Image
+            The resized image.
+        """
+        key = self._key(path, width, height)
+        
+        image = self._images.get(key)
+        if image is not None:
+            return image
+        
+        with self._lock:
+            future = self._pending.get(key)
+        
+        if future is not None:
+            return future.result()
+        
+        return self._load(key)
+
+    def prefetch(self, paths, width, height):
+        """
+        Load and resize images in the background thread, so they are ready when they are shown.
+        The missing files and the images already cached or loading are skipped.
+
+        Parameters:
+        -----------
+        paths : list of str
+            Paths to the image files.
+        width : int
+            The maximum width of the images.
+        height : int
+            The maximum height of the images.
+        """
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            
+            key = self._key(path, width, height)
+            
+            with self._lock:
+                if key in self._images or key in self._pending:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CTJ-prefetch")
+                self._pending[key] = self._executor.submit(self._load, key)
+
+    def clear(self):
+        """
+        Remove all the images, the images being loaded are still added.
+        """
+        self._images.clear()
+
+def _close_document(key, document):
+    document.close()
+
+#The open PDF documents and their rendered pages, shared by all the viewers of the process
+pdf_documents = LRUCache(8, on_evict=_close_document)
+pdf_pages = LRUCache(16)
+
+def open_pdf(path):
+    """
+    Open a PDF document, or get it from the documents already open. A modified file is opened again.
+
+    Parameters
+    ----------
+    path : str
+        Path to the PDF file.
+
+    Returns
+    -------
+    document : fitz.Document
+        The open document. It may be closed when other documents are opened, it must not be kept.
+    """
+    #PyMuPDF is only imported when a PDF is displayed
+    import fitz
+    
+    path = os.path.abspath(path)
+    key = (path, os.stat(path).st_mtime_ns)
+    
+    document = pdf_documents.get(key)
+    if document is None:
+        document = fitz.open(path)
+        pdf_documents.put(key, document)
+    
+    return document
+
+def render_page(path, page_num, width, bucket = 50):
+    """
+    Render a page of a PDF document, or get it from the pages already rendered.
+    The width is rounded down to a multiple of `bucket` pixels, so a small change of the width does not render the page again.
+
+    Parameters
+    ----------
+    path : str
+        Path to the PDF file.
+    page_num : int
+        The number of the page, from 0.
+    width : int
+        The width of the image.
+    bucket : int, optional
+        The step of the rendered widths, in pixels. The default is 50.
+
+    Returns
+    -------
+    image : PIL.Image.Image
+        The rendered page, shared by the cache, it must be copied before being modified.
+    """
+    import fitz
+    from PIL import Image
+    
+    path = os.path.abspath(path)
+    width = max(bucket, int(width) // bucket * bucket)
+    key = (path, os.stat(path).st_mtime_ns, page_num, width)
+    
+    image = pdf_pages.get(key)
+    if image is None:
+        page = open_pdf(path).load_page(page_num)
+        zoom = width / page.rect.width
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        pdf_pages.put(key, image)
+    
+    return image
+
+def image_thumbnail(path, width, height):
+    """
+    Resize an image to fit in (width, height) while preserving its aspect ratio, as it is shown in the assessment windows.
+
+    Parameters
+    ----------
+    path : str
+        Path to the image file.
+    width : int
+        The maximum width of the image.
+    height : int
+        The maximum height of the image.
+
+    Returns
+    -------
+    image : PIL.Image.Image
+        The resized image.
+    """
+    from PIL import Image
+    
+    image = Image.open(path)
+    
+    # Use the thumbnail method to resize the image in place, the file is read and closed
+    image.thumbnail((int(width), int(height)), Image.Resampling.LANCZOS)
+    
+    return image
+
+def pdf_thumbnail(path, width, height):
+    """
+    Render the first page of a PDF document to fit in (width, height), as it is shown in the assessment windows.
+
+    Parameters
+    ----------
+    path : str
+        Path to the PDF file.
+    width : int
+        The maximum width of the image.
+    height : int
+        The maximum height of the image.
+
+    Returns
+    -------
+    image : PIL.Image.Image
+        The first page resized.
+    """
+    from PIL import Image
+    
+    # The page is rendered at the exact width, the widths rounded to a bucket are for the resizable viewer and thumbnail never upscales.
+    # The rendered page is shared by the cache, it is copied before being resized
+    image = render_page(path, 0, width, bucket = 1).copy()
+    image.thumbnail((int(width), int(height)), Image.Resampling.LANCZOS)
+    
+    return image
+
+#The thumbnails rendered in advance are in this directory, next to the items
+STORE_NAME = ".ctj_thumbnails"
+INDEX_NAME = "index.json"
+
+#The index of each store read, with the modification time of the index file
+_store_indexes = {}
+
+def thumbnail_key(name, width, height):
+    """
+    The key of a thumbnail in the index of a store.
+
+    Parameters
+    ----------
+    name : str
+        The file name of the item, with its extension.
+    width : int
+        The maximum width of the thumbnail.
+    height : int
+        The maximum height of the thumbnail.
+
+    Returns
+    -------
+    key : str
+        The key in the format "name|width|height".
+    """
+    return name + "|" + str(int(width)) + "|" + str(int(height))
+
+def read_index(store):
+    """
+    Read the index of a thumbnail store, the index is only read again if it is modified.
+
+    Parameters
+    ----------
+    store : str
+        The directory of the store.
+
+    Returns
+    -------
+    index : dict
+        The thumbnails in the format {key : {"thumbnail" : file name, "mtime_ns" : modification time of the item}}, empty if there is no store.
+    """
+    index_path = os.path.join(store, INDEX_NAME)
+    
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except OSError:
+        return {}
+    
+    cached = _store_indexes.get(store)
+    if cached is None or cached[0] != mtime:
+        with open(index_path, "r", encoding="utf-8") as f:
+            cached = (mtime, json.load(f))
+        _store_indexes[store] = cached
+    
+    return cached[1]
+
+def stored_thumbnail(path, width, height):
+    """
+    Get the thumbnail of an item from the store of its directory, see `python -m CTJ thumbnails`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the image or PDF file.
+    width : int
+        The maximum width of the thumbnail.
+    height : int
+        The maximum height of the thumbnail.
+
+    Returns
+    -------
+    image : PIL.Image.Image or None
+        The thumbnail, None if it is not in the store or if the item was modified since it was rendered.
+    """
+    from PIL import Image
+    
+    path = os.path.abspath(path)
+    store = os.path.join(os.path.dirname(path), STORE_NAME)
+    
+    entry = read_index(store).get(thumbnail_key(os.path.basename(path), width, height))
+    if entry is None or entry["mtime_ns"] != os.stat(path).st_mtime_ns:
+        return None
+    
+    try:
+        image = Image.open(os.path.join(store, entry["thumbnail"]))
+        image.load()
+    except OSError:
+        return None
+    
+    return image
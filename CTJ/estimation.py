@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+"""
+The estimators of the values of the items, updated with each new assessment instead of being fitted again on all of them.
+"""
+
+import numpy as np
+
+###############################         FUNCTIONS       ############################################
+
+class LeastSquaresEstimator:
+    """
+    A class to estimate the values of the CTJ model with the least squares method.
+    Rather than stacking every line in a growing A array, the normal equations (A^T A, A^T b) are accumulated,
+    so adding a line does not depend on the number of lines already added and the memory stays in O(n^2).
+
+    Attributes:
+    -----------
+    _nb_items : int
+        The number of items.
+    _nb_lines : int
+        The number of lines added. Default is 0.
+    _AtA : float array
+        The product of the transposed A array by the A array, of shape (nb_items, nb_items).
+    _Atb : float array
+        The product of the transposed A array by the b array, of shape (nb_items,).
+
+    Methods:
+    --------
+    nb_lines() -> int:
+        Property to get the number of lines added.
+    AtA() -> float array:
+        Property to get the product of the transposed A array by the A array.
+    Atb() -> float array:
+        Property to get the product of the transposed A array by the b array.
+    add(index: list of int, coefficients: list of float, value: float):
+        Add a line of the A array, given by its non-zero coefficients, and the corresponding value of the b array.
+    solve() -> float array:
+        Calculate the least squares solution of the lines added.
+    """
+
+    def __init__(self, nb_items):
+        self._nb_items = nb_items
+        self._nb_lines = 0
+        self._AtA = np.zeros((nb_items, nb_items), dtype=np.double)
+        self._Atb = np.zeros(nb_items, dtype=np.double)
+
+    @property
+    def nb_lines(self):
+        return self._nb_lines
+
+    @property
+    def AtA(self):
+        return self._AtA
+
+    @property
+    def Atb(self):
+        return self._Atb
+
+    def add(self, index, coefficients, value = 0):
+        """
+        Add a line of the A array, given by its non-zero coefficients, and the corresponding value of the b array.
+
+        Parameters:
+        -----------
+        index : list of int
+            The columns of the non-zero coefficients, all distinct.
+        coefficients : list of float
+            The non-zero coefficients of the line.
+        value : float, optional
+            The value of the b array for this line. The default is 0.
+        """
+        index = np.asarray(index, dtype=np.intp)
+        coefficients = np.asarray(coefficients, dtype=np.double)
+        self._AtA[np.ix_(index, index)] += np.outer(coefficients, coefficients)
+        self._Atb[index] += coefficients * value
+        self._nb_lines += 1
+
+    def solve(self):
+        """
+        Calculate the least squares solution of the lines added.
+        When some values are not constrained the solution with the minimal norm is returned, as np.linalg.lstsq does on the A array.
+
+        Returns:
+        --------
+        float array
+            The estimated value of each item.
+        """
+        return np.linalg.lstsq(self._AtA, self._Atb, rcond=None)[0]
+
+
+class SparseLeastSquaresEstimator:
+    """
+    A class to estimate the values of the CTJ model with the least squares method on a sparse A array.
+    Each line of the CTJ model has only three non-zero coefficients, so only these coefficients are stored (COO format)
+    and the system is solved with the iterative solver scipy.sparse.linalg.lsmr, warm-started from the previous solution.
+    It is meant for large items lists, where a dense A array, or even A^T A, does not fit in memory.
+
+    Attributes:
+    -----------
+    _nb_items : int
+        The number of items.
+    _rows : list of int
+        The line of each non-zero coefficient.
+    _cols : list of int
+        The column of each non-zero coefficient.
+    _data : list of float
+        The non-zero coefficients.
+    _b : list of float
+        The value of the b array for each line.
+    _solution : float array or None
+        The last solution, used as starting point of the next solve. Default is None.
+    _atol : float
+        The tolerance of the solver.
+
+    Methods:
+    --------
+    nb_lines() -> int:
+        Property to get the number of lines added.
+    A() -> csr_matrix:
+        Property to get the sparse A array.
+    add(index: list of int, coefficients: list of float, value: float):
+        Add a line of the A array, given by its non-zero coefficients, and the corresponding value of the b array.
+    solve() -> float array:
+        Calculate the least squares solution of the lines added.
+    """
+
+    def __init__(self, nb_items, atol = 1e-10):
+        self._nb_items = nb_items
+        self._rows = []
+        self._cols = []
+        self._data = []
+        self._b = []
+        self._solution = None
+        self._atol = atol
+
+    @property
+    def nb_lines(self):
+        return len(self._b)
+
+    @property
+    def A(self):
+        #scipy.sparse is only imported by the sparse backend
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self._data, (self._rows, self._cols)), shape=(len(self._b), self._nb_items))
+
+    def add(self, index, coefficients, value = 0):
+        """
+        Add a line of the A array, given by its non-zero coefficients, and the corresponding value of the b array.
+
+        Parameters:
+        -----------
+        index : list of int
+            The columns of the non-zero coefficients, all distinct.
+        coefficients : list of float
+            The non-zero coefficients of the line.
+        value : float, optional
+            The value of the b array for this line. The default is 0.
+        """
+        line = len(self._b)
+        for i, coefficient in zip(index, coefficients):
+            self._rows.append(line)
+            self._cols.append(int(i))
+            self._data.append(float(coefficient))
+        self._b.append(float(value))
+
+    def solve(self):
+        """
+        Calculate the least squares solution of the lines added, starting from the previous solution.
+
+        Returns:
+        --------
+        float array
+            The estimated value of each item.
+        """
+        from scipy.sparse.linalg import lsmr
+        
+        b = np.array(self._b, dtype=np.double)
+        self._solution = lsmr(self.A, b, atol=self._atol, btol=self._atol, maxiter=max(10 * self._nb_items, 100), x0=self._solution)[0]
+        return self._solution.copy()
+
+
+class BradleyTerryModel:
+    """
+    A class to keep the Bradley-Terry model of an ACJ session, fitted with choix.ilsr_pairwise.
+    Each fit starts from the previous parameters, so after a new assessment only a few iterations are needed,
+    and the same parameters are shared by the pair selection and the estimation.
+
+    Attributes:
+    -----------
+    _nb_items : int
+        The number of items.
+    _alpha : float
+        The regularization parameter of choix.ilsr_pairwise. Default is 0.1.
+    _parameters : float array or None
+        The strength of each item, None before the first fit. Default is None.
+    _nb_fitted : int
+        The number of assessments used by the last fit. Default is 0.
+
+    Methods:
+    --------
+    parameters() -> float array or None:
+        Property to get the strength of each item.
+    nb_fitted() -> int:
+        Property to get the number of assessments used by the last fit.
+    fit(assessments: list of tuple) -> float array:
+        Fit the model on the assessments, starting from the current parameters.
+    update(assessments: list of tuple) -> float array:
+        Fit the model only if assessments were added since the last fit.
+    win_probability(winners: int array, losers: int array) -> float array:
+        Calculate the probability of each winner to be preferred to the corresponding loser.
+    """
+
+    def __init__(self, nb_items, alpha = 0.1):
+        self._nb_items = nb_items
+        self._alpha = alpha
+        self._parameters = None
+        self._nb_fitted = 0
+
+    @property
+    def parameters(self):
+        return self._parameters
+
+    @property
+    def nb_fitted(self):
+        return self._nb_fitted
+
+    def fit(self, assessments):
+        """
+        Fit the model on the assessments, starting from the current parameters.
+
+        Parameters:
+        -----------
+        assessments : list of tuple
+            A list containing all the assessments done as id of items in the format (winner, loser).
+
+        Returns:
+        --------
+        float array
+            The strength of each item.
+        """
+        #choix imports scipy.stats, it is only imported when a model is fitted
+        import choix
+        
+        self._parameters = choix.ilsr_pairwise(self._nb_items, assessments, alpha=self._alpha, initial_params=self._parameters)
+        self._nb_fitted = len(assessments)
+        return self._parameters
+
+    def update(self, assessments):
+        """
+        Fit the model only if assessments were added since the last fit, the assessments list is expected to only grow.
+
+        Parameters:
+        -----------
+        assessments : list of tuple
+            A list containing all the assessments done as id of items in the format (winner, loser).
+
+        Returns:
+        --------
+        float array
+            The strength of each item.
+        """
+        if self._parameters is None or self._nb_fitted != len(assessments):
+            self.fit(assessments)
+        return self._parameters
+
+    def win_probability(self, winners, losers):
+        """
+        Calculate, in one array operation, the probability of each winner to be preferred to the corresponding loser.
+        The result is the same as choix.probabilities([winner, loser], parameters)[0] for each pair.
+
+        Parameters:
+        -----------
+        winners : int array
+            The id of the first item of each pair.
+        losers : int array
+            The id of the second item of each pair.
+
+        Returns:
+        --------
+        float array
+            The probability of each winner to be preferred.
+        """
+        strength_winners = self._parameters[winners]
+        strength_losers = self._parameters[losers]
+        
+        #Stable softmax over each pair
+        highest = np.maximum(strength_winners, strength_losers)
+        exp_winners = np.exp(strength_winners - highest)
+        exp_losers = np.exp(strength_losers - highest)
+        return exp_winners / (exp_winners + exp_losers)
+
+
+class BatchLeastSquaresEstimator:
+    """
+    A class to estimate the values of the CTJ model for many independent sessions at once.
+    As in LeastSquaresEstimator the normal equations are accumulated, here with a leading dimension for the sessions,
+    so that the lines of all the sessions are added, and all the systems are solved, with a few array operations.
+
+    Attributes:
+    -----------
+    _nb_sessions : int
+        The number of sessions.
+    _nb_items : int
+        The number of items of each session.
+    _AtA : float array
+        The product of the transposed A array by the A array of each session, of shape (nb_sessions, nb_items, nb_items).
+    _Atb : float array
+        The product of the transposed A array by the b array of each session, of shape (nb_sessions, nb_items).
+
+    Methods:
+    --------
+    AtA() -> float array:
+        Property to get the product of the transposed A array by the A array of each session.
+    Atb() -> float array:
+        Property to get the product of the transposed A array by the b array of each session.
+    add(sessions: int array, index: int array, coefficients: float array, values: float array):
+        Add one line to the A array of each of the given sessions.
+    solve(sessions: int array) -> float array:
+        Calculate the least squares solution of the given sessions.
+    """
+
+    def __init__(self, nb_sessions, nb_items):
+        self._nb_sessions = nb_sessions
+        self._nb_items = nb_items
+        self._AtA = np.zeros((nb_sessions, nb_items, nb_items), dtype=np.double)
+        self._Atb = np.zeros((nb_sessions, nb_items), dtype=np.double)
+
+    @property
+    def AtA(self):
+        return self._AtA
+
+    @property
+    def Atb(self):
+        return self._Atb
+
+    def add(self, sessions, index, coefficients, values = 0):
+        """
+        Add one line to the A array of each of the given sessions, given by its non-zero coefficients, and the corresponding value of the b array.
+
+        Parameters:
+        -----------
+        sessions : int array
+            The sessions to update, all distinct.
+        index : int array
+            Array of shape (nb_sessions, nb_coefficients) containing the columns of the non-zero coefficients of each line.
+        coefficients : float array
+            Array of shape (nb_sessions, nb_coefficients) containing the non-zero coefficients of each line.
+        values : float or float array, optional
+            The value of the b array for each line. The default is 0.
+        """
+        sessions = np.asarray(sessions, dtype=np.intp)[:, None]
+        index = np.asarray(index, dtype=np.intp)
+        coefficients = np.asarray(coefficients, dtype=np.double)
+        values = np.broadcast_to(np.asarray(values, dtype=np.double), (len(sessions),))
+        
+        #The columns of a line are distinct, so there is no repeated index inside a session
+        self._AtA[sessions[:, :, None], index[:, :, None], index[:, None, :]] += coefficients[:, :, None] * coefficients[:, None, :]
+        self._Atb[sessions, index] += coefficients * values[:, None]
+
+    def solve(self, sessions = None):
+        """
+        Calculate the least squares solution of the given sessions.
+        When some values are not constrained the solution with the minimal norm is returned, as in LeastSquaresEstimator.
+
+        Parameters:
+        -----------
+        sessions : int array, optional
+            The sessions to solve. If None, all the sessions are solved. The default is None.
+
+        Returns:
+        --------
+        float array
+            Array of shape (nb_sessions, nb_items) containing the estimated value of each item.
+        """
+        if sessions is None :
+            sessions = np.arange(self._nb_sessions)
+        
+        #Same cut-off of the small singular values as np.linalg.lstsq with rcond=None
+        pseudo_inverse = np.linalg.pinv(self._AtA[sessions], rcond=np.finfo(float).eps * self._nb_items, hermitian=True)
+        return np.matmul(pseudo_inverse, self._Atb[sessions][:, :, None])[:, :, 0]
+
+
+class BatchBradleyTerryModel:
+    """
+    A class to keep the Bradley-Terry models of many independent ACJ sessions.
+    The models are fitted together with the iterative Luce Spectral Ranking algorithm of choix.ilsr_pairwise,
+    written over a leading dimension for the sessions: the stationary distributions of all the Markov chains
+    are solved in one batched linear solve. As in BradleyTerryModel each fit starts from the previous parameters.
+
+    Attributes:
+    -----------
+    _nb_sessions : int
+        The number of sessions.
+    _nb_items : int
+        The number of items of each session.
+    _alpha : float
+        The regularization parameter. Default is 0.1.
+    _max_iter : int
+        The maximum number of iterations of a fit. Default is 100.
+    _tol : float
+        The tolerance of the convergence test, the same as in choix. Default is 1e-8.
+    _wins : float array
+        The number of times each item won against each other item in each session, _wins[session, loser, winner].
+    _parameters : float array
+        The strength of each item in each session, of shape (nb_sessions, nb_items). All 0 before the first fit.
+
+    Methods:
+    --------
+    parameters() -> float array:
+        Property to get the strength of each item in each session.
+    add(sessions: int array, winners: int array, losers: int array):
+        Add one assessment to each of the given sessions.
+    fit(sessions: int array) -> float array:
+        Fit the models of the given sessions, starting from their current parameters.
+    win_probability(sessions: int array, winners: int array, losers: int array) -> float array:
+        Calculate the probability of each winner to be preferred to the corresponding loser in each session.
+    """
+
+    def __init__(self, nb_sessions, nb_items, alpha = 0.1, max_iter = 100, tol = 1e-8):
+        self._nb_sessions = nb_sessions
+        self._nb_items = nb_items
+        self._alpha = alpha
+        self._max_iter = max_iter
+        self._tol = tol
+        self._wins = np.zeros((nb_sessions, nb_items, nb_items))
+        self._parameters = np.zeros((nb_sessions, nb_items))
+
+    @property
+    def parameters(self):
+        return self._parameters
+
+    def add(self, sessions, winners, losers):
+        """
+        Add one assessment to each of the given sessions.
+
+        Parameters:
+        -----------
+        sessions : int array
+            The sessions to update, all distinct.
+        winners : int array
+            The id of the preferred item in each session.
+        losers : int array
+            The id of the other item in each session.
+        """
+        self._wins[sessions, losers, winners] += 1
+
+    def fit(self, sessions = None):
+        """
+        Fit the models of the given sessions, starting from their current parameters.
+        The iterations stop when every session has converged, or after `_max_iter` iterations.
+
+        Parameters:
+        -----------
+        sessions : int array, optional
+            The sessions to fit. If None, all the sessions are fitted. The default is None.
+
+        Returns:
+        --------
+        float array
+            Array of shape (nb_sessions, nb_items) containing the strength of each item.
+        """
+        if sessions is None :
+            sessions = np.arange(self._nb_sessions)
+        
+        n = self._nb_items
+        wins = self._wins[sessions]
+        parameters = self._parameters[sessions]
+        
+        #The last equation of each system is replaced by the normalisation of the distribution
+        right = np.zeros((len(sessions), n, 1))
+        right[:, -1, 0] = n
+        
+        previous = None
+        for _ in range(self._max_iter):
+            #The weights are normalised to sum to the number of items, as in choix
+            weights = np.exp(parameters)
+            weights *= n / weights.sum(axis=1, keepdims=True)
+            
+            #Transition rates of the Luce Spectral Ranking Markov chain of each session
+            chain = self._alpha + wins / (weights[:, :, None] + weights[:, None, :])
+            chain[:, np.arange(n), np.arange(n)] -= chain.sum(axis=2)
+            
+            #Stationary distribution of each chain
+            system = np.swapaxes(chain, 1, 2).copy()
+            system[:, -1, :] = 1
+            distribution = np.linalg.solve(system, right)[:, :, 0]
+            
+            parameters = np.log(distribution)
+            parameters -= parameters.mean(axis=1, keepdims=True)
+            
+            if previous is not None and np.all(np.abs(previous - parameters).sum(axis=1) <= self._tol * n):
+                break
+            previous = parameters
+        
+        self._parameters[sessions] = parameters
+        return parameters
+
+    def win_probability(self, sessions, winners, losers):
+        """
+        Calculate the probability of each winner to be preferred to the corresponding loser, for all the pairs of each session.
+
+        Parameters:
+        -----------
+        sessions : int array
+            The sessions.
+        winners : int array
+            The id of the first item of each pair.
+        losers : int array
+            The id of the second item of each pair.
+
+        Returns:
+        --------
+        float array
+            Array of shape (nb_sessions, nb_pairs) containing the probability of each winner to be preferred.
+        """
+        parameters = self._parameters[sessions]
+        strength_winners = parameters[:, winners]
+        strength_losers = parameters[:, losers]
+        
+        #Stable softmax over each pair
+        highest = np.maximum(strength_winners, strength_losers)
+        exp_winners = np.exp(strength_winners - highest)
+        exp_losers = np.exp(strength_losers - highest)
+        return exp_winners / (exp_winners + exp_losers)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+The experiments : automated sessions run for each configuration of a parameter grid, across processes.
+"""
+
+import contextlib
+import csv
+import io
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+from .ACJ import ACJ
+from .CTJ import CTJ
+from .Rubric import Rubric
+
+#The algorithms of the experiments and the parameters of each one that can be set in a grid
+METHODS = {"ACJ" : ACJ, "CTJ" : CTJ, "Rubric" : Rubric}
+
+METHOD_PARAMETERS = {"ACJ" : ("nb_judge", "sensibility", "max_iteration", "max_accuracy", "entropy", "candidate_window", "adjacent"),
+                     "CTJ" : ("sensibility", "max_iteration", "max_accuracy", "scale", "candidate_window", "backend"),
+                     "Rubric" : ("sensibility",)}
+
+###############################         FUNCTIONS       ############################################
+
+def expand_grid (grid):
+    """
+    Build the list of configurations of a parameter grid, the cartesian product of the values of each parameter.
+    Each method only takes the parameters it uses, so a grid can mix methods without duplicated configurations.
+
+    Parameters
+    ----------
+    grid : dict or list of dict
+        The values of each parameter in the format {string : list}. The key "method" lists the algorithms ("ACJ", "CTJ" or "Rubric"),
+        the key "items" gives the item sets in the format {string : list of (string, int)}, the name of a set and its items with their true values.
+        The other keys are parameters of the algorithms. A list of grids is expanded grid by grid.
+
+    Raises
+    ------
+    Exception
+        The method is unknown.
+
+    Returns
+    -------
+    configurations : list of dict
+        The configurations, each one with the keys "method", "items" and the parameters of the method.
+
+    """
+    if not isinstance(grid, dict) :
+        return [configuration for sub_grid in grid for configuration in expand_grid(sub_grid)]
+
+    item_sets = grid["items"]
+    configurations = []
+
+    for method in grid["method"] :
+        if method not in METHODS :
+            raise Exception("Unknown method " + str(method) + ", the method must be 'ACJ', 'CTJ' or 'Rubric'.")
+
+        names = [name for name in METHOD_PARAMETERS[method] if name in grid]
+        for label in item_sets :
+            for values in product(*[grid[name] for name in names]) :
+                configuration = {"method" : method, "items" : label}
+                configuration.update(zip(names, values))
+                configurations.append(configuration)
+
+    return configurations
+
+def run_task (task):
+    """
+    Run one automated session of an experiment, with its own seed. The results banner is not printed.
+
+    Parameters
+    ----------
+    task : tuple
+        The configuration, in the format of expand_grid, the item set in the format list of (string, int), the number of the run and its numpy.random.SeedSequence.
+
+    Returns
+    -------
+    row : dict
+        The configuration and the number of the run, with the number of iterations, the accuracy, the number of errors and the number of scale errors.
+
+    """
+    configuration, item_set, run, seed_sequence = task
+
+    method = configuration["method"]
+    parameters = {name : value for name, value in configuration.items() if name not in ("method", "items")}
+
+    #The sensibility is a list of thresholds for ACJ, a tuple for the other methods
+    if "sensibility" in parameters :
+        if method == "ACJ" :
+            parameters["sensibility"] = list(parameters["sensibility"])
+        else :
+            parameters["sensibility"] = tuple(parameters["sensibility"])
+
+    items = [item[0] for item in item_set]
+    true_values = [item[1] for item in item_set]
+    min_item = min(item_set, key=lambda item: item[1])
+    max_item = max(item_set, key=lambda item: item[1])
+
+    #Each task draws from its own stream, so its results do not depend on the worker running it
+    rng = np.random.default_rng(seed_sequence)
+
+    with contextlib.redirect_stdout(io.StringIO()) :
+        _, iterations, accuracy, error, _ = METHODS[method]([min_item[1], min_item[0]], [max_item[1], max_item[0]], items, true_values=true_values, rng=rng, **parameters)
+
+    row = dict(configuration)
+    row["run"] = run
+    row["iterations"] = int(iterations)
+    row["accuracy"] = float(accuracy)
+    if method == "CTJ" :
+        row["errors"] = int(error[0])
+        row["scale_errors"] = int(error[1])
+    else :
+        row["errors"] = int(np.sum(error))
+        row["scale_errors"] = None
+
+    return row
+
+def run_experiment (grid, nb_runs = 1, seed = None, max_workers = None):
+    """
+    Run `nb_runs` automated sessions for each configuration of a parameter grid, spread across a pool of processes.
+    Every session has its own random stream spawned from `seed`, so the same seed gives the same results whatever the number of workers.
+
+    Parameters
+    ----------
+    grid : dict or list of dict
+        The parameter grid, see expand_grid.
+    nb_runs : int, optional
+        The number of sessions of each configuration. The default is 1.
+    seed : int, optional
+        The seed of the experiment. If None, the results can not be reproduced. The default is None.
+    max_workers : int, optional
+        The number of processes. If 1, the sessions run in the current process. If None, one process per processor. The default is None.
+
+    Returns
+    -------
+    results : list of dict
+        One row per session, in the order of the configurations and of the runs, see run_task.
+
+    """
+    if isinstance(grid, dict) :
+        grid = [grid]
+
+    tasks = []
+    for sub_grid in grid :
+        for configuration in expand_grid(sub_grid) :
+            item_set = sub_grid["items"][configuration["items"]]
+            for run in range(nb_runs) :
+                tasks.append([configuration, item_set, run])
+
+    #One independent stream per session
+    for task, seed_sequence in zip(tasks, np.random.SeedSequence(seed).spawn(len(tasks))) :
+        task.append(seed_sequence)
+
+    if max_workers == 1 :
+        return [run_task(task) for task in tasks]
+
+    #The sessions are sent by chunks to limit the communication between the processes
+    chunksize = max(1, len(tasks) // (4 * (max_workers or os.cpu_count() or 1)))
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor :
+        return list(executor.map(run_task, tasks, chunksize=chunksize))
+
+def write_results (results, file):
+    """
+    Write the results of an experiment as a CSV table, one line per session.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of run_experiment.
+    file : file object
+        The opened file to write in.
+
+    """
+    columns = []
+    for row in results :
+        columns += [name for name in row if name not in columns]
+
+    writer = csv.DictWriter(file, fieldnames=columns, restval="")
+    writer.writeheader()
+    writer.writerows(results)
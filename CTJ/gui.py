@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+The windows shown to the human judges, and the WindowManager keeping them between the assessments.
+"""
+
+try:
+    import tkinter as tk
+except ImportError:
+    raise Exception("tkinter is not installed, for more information refer to : https://github.com/RoPerrier/CTJ/blob/main/fix_import_error_tkinter.md")
+
+from tkinter import colorchooser
+
+###############################         FUNCTIONS       ############################################
+
+def ready(window, info="", status=None):
+    """
+    If the assessment is done by the user, create a window to check if the user is ready
+
+    Parameters
+    ------
+    window : windowManager
+        windowManager object
+    info : string
+        A string for display information.
+    status : string 
+        Set if we are in a tutorial or not
+        
+    Raises
+    ------
+    Exception
+        The window was not destroy in the correct way.
+
+    Returns
+    -------
+    skip : bool
+        True if the user skip the tutorial.
+
+    """
+    def exit_program():
+        nonlocal BadEnding
+        BadEnding = True
+        done.set(True)
+            
+    def close():
+        screen.close_button.pack_forget()
+        screen.skip_button.pack_forget()
+        screen.countdown_label.config(text="The sample appear in 3 seconds...")
+        countdown(3)
+
+    def countdown(seconds):
+        if seconds > 0:
+            screen.countdown_label.config(text=f"The sample appear in {seconds} seconds...")
+            window.root.after(1000, countdown, seconds - 1)
+        else:
+            done.set(True)
+    
+    def skip_tutorial():
+        nonlocal skip
+        skip = True
+        screen.close_button.pack_forget()
+        screen.skip_button.pack_forget()
+        done.set(True)
+    
+    skip = False
+    BadEnding = False
+    
+    #The screen is built once, then only its texts and buttons change
+    screen = window.show_screen("Ready ?", build_ready_screen)
+    screen.close = close
+    screen.skip = skip_tutorial
+    
+    #The callbacks set this variable to end the wait
+    done = tk.BooleanVar(window.root, value=False)
+
+    if status is None:
+        t = 'Next Sample'
+    else:
+        t = 'Tutorial'
+    
+    screen.info_label.config(text=info)
+    screen.countdown_label.config(text="")
+    
+    #The buttons are packed again, in order, whatever the way the last call ended
+    screen.close_button.pack_forget()
+    screen.skip_button.pack_forget()
+    
+    screen.close_button.config(text=t)
+    screen.close_button.pack(pady=10)
+    
+    if status is not None :
+        screen.skip_button.pack(pady=10)
+    else :
+        screen.skip_button.pack_forget()
+    
+    window.root.protocol("WM_DELETE_WINDOW", exit_program)
+    
+    window.root.wait_variable(done)
+    if BadEnding :
+        window.root.destroy()
+        raise Exception("You are not ready.. You must click on the 'Ready' button.")
+
+    return skip
+
+def build_ready_screen(screen, window):
+    """
+    Build the widgets of the screen shown between the judgments, see ready.
+
+    Parameters
+    ----------
+    screen : Screen
+        The screen to fill.
+    window : WindowManager
+        windowManager object
+    """
+    screen.info_label = tk.Label(screen.frame, padx=10, pady=10, bg=window.bgcolor)
+    screen.info_label.pack()
+
+    screen.countdown_label = tk.Label(screen.frame, padx=10, pady=10, text="", fg="red", bg=window.bgcolor)
+    screen.countdown_label.pack()
+    
+    #The buttons are packed by ready, the callbacks of the current call are set on the screen
+    screen.close_button = tk.Button(screen.frame, command=lambda: screen.close())
+    screen.skip_button = tk.Button(screen.frame, text="Skip Tutorial", command=lambda: screen.skip())
+
+class Screen:
+    """
+    A class to keep the widgets of a screen of the window between the judgments, only their images, texts and commands are changed.
+    The function building the screen sets its widgets as attributes, and the commands of the widgets read the attributes set
+    by the assessment method at each judgment, as the AssessmentManager or the items shown.
+
+    Attributes:
+    -----------
+    _frame : tk.Frame
+        The frame containing all the widgets of the screen.
+    _title : str
+        The title of the window when the screen is shown.
+
+    Methods:
+    --------
+    frame() -> tk.Frame:
+        Property to get the frame of the screen.
+    title() -> str:
+        Property to get the title of the screen.
+    """
+
+    def __init__(self, window, title):
+        self._frame = tk.Frame(window.root, bg=window.bgcolor)
+        self._title = title
+    
+    @property
+    def frame(self):
+        return self._frame
+    
+    @property
+    def title(self):
+        return self._title
+
+class WindowManager:
+    """
+    A class to manage the creation and configuration of a Tkinter window with customizable properties.
+
+    Attributes:
+    -----------
+    _root : tk.Tk or None
+        The root window of the Tkinter application. Initialized as None.
+    _bgcolor : str
+        The background color of the window, specified as a hexadecimal color code. Default is '#f0f0f0'.
+    _menu_bar : tk.Menu or None
+        The menu bar of the window, created with the root window. Initialized as None.
+    _screens : dict
+        The screens already built, in the format {string : Screen}. Default is {}.
+    _screen : Screen or None
+        The screen shown. Initialized as None.
+    _screen_size : tuple or None
+        The width and height of the screen, read when the root window is created so the background threads do not call Tkinter. Initialized as None.
+
+    Methods:
+    --------
+    root() -> tk.Tk or None:
+        Property to get the root window.
+    root(value: tk.Tk or None):
+        Property to set the root window.
+    bgcolor() -> str:
+        Property to get the background color of the window.
+    bgcolor(value: str):
+        Property to set the background color of the window.
+    screen_size() -> tuple:
+        Property to get the width and height of the screen.
+    change_bg_color():
+        Opens a color chooser dialog to change the background color of the window and its child widgets.
+    create_window(title: str):
+        Creates and configures a new root window with the specified title, or reconfigures the existing root window.
+    clear():
+        Destroys the widgets of the root window which are not the menu bar or a screen.
+    show_screen(name: str, build: function, *args) -> Screen:
+        Shows a screen kept between the calls, built the first time it is shown.
+    """
+
+    def __init__(self):
+        self._root = None
+        self._bgcolor = '#f0f0f0'
+        self._menu_bar = None
+        self._screens = {}
+        self._screen = None
+        self._screen_size = None
+    
+    @property
+    def root(self):
+        return self._root
+    
+    @root.setter
+    def root(self, value):
+        self._root = value
+        self._screen_size = None
+    
+    @property
+    def bgcolor(self):
+        return self._bgcolor
+    
+    @bgcolor.setter
+    def bgcolor(self, value):
+        self._bgcolor = value
+    
+    @property
+    def screen_size(self):
+        if self._screen_size is None:
+            self._screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        return self._screen_size
+    
+    def change_bg_color(self):
+        """
+        Opens a color chooser dialog to change the background color of the window and its child widgets.
+        Updates the background color of all frames, labels, and text widgets within the root window, the ones of the hidden screens too.
+        """
+        color = colorchooser.askcolor()[1]
+        if color:
+            self.bgcolor = color
+            self.root.config(bg=self.bgcolor)
+            widgets = self.root.winfo_children()
+            while widgets:
+                widget = widgets.pop()
+                if isinstance(widget, tk.Frame) or isinstance(widget, tk.Label) or isinstance(widget, tk.Text):
+                    widget.config(bg=self.bgcolor)
+                widgets += widget.winfo_children()
+        
+    def create_window(self, title):
+        """
+        Creates and configures a new root window with the specified title.
+        If a root window already exists, it reconfigures the existing window with the new title,
+        the screens are hidden and kept, the other widgets are destroyed.
+
+        Parameters:
+        -----------
+        title : str
+            The title for the Tkinter window.
+        """
+        if self.root is None:
+            self.root = tk.Tk()
+            self.root.title(title)
+            try:
+                self.root.wm_attributes("-zoomed", True)
+            except tk.TclError:
+                self.root.state('zoomed')
+            self.root.config(bg=self.bgcolor)
+            self.root.option_add("*Font", ("TkDefaultFont", 14))
+            self.root.resizable(False, False)
+            
+            #The menu bar is kept until the window is destroyed
+            self._menu_bar = tk.Menu(self.root)
+            self.root.config(menu=self._menu_bar)
+            parameters_menu = tk.Menu(self._menu_bar, tearoff=0)
+            self._menu_bar.add_cascade(label="Parameters", menu=parameters_menu)
+            parameters_menu.add_command(label="Change Background Color", command=self.change_bg_color)
+            
+            self._screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        
+            self.root.update_idletasks()
+            
+        else:
+            if self._screen is not None:
+                self._screen.frame.pack_forget()
+                self._screen = None
+            self.clear()
+            self.root.title(title)
+            
+            self.root.update_idletasks()
+    
+    def clear(self):
+        """
+        Destroys the widgets of the root window which are not the menu bar or a screen.
+        """
+        frames = [screen.frame for screen in self._screens.values()]
+        for widget in self.root.winfo_children():
+            if widget is not self._menu_bar and widget not in frames:
+                widget.destroy()
+    
+    def show_screen(self, name, build, *args):
+        """
+        Shows the screen `name` in the root window, instead of the screen or the widgets shown.
+        The screen is built the first time by `build`, or again if its widgets were destroyed, then it is kept between the calls.
+
+        Parameters:
+        -----------
+        name : str
+            The name of the screen, and the title for the Tkinter window.
+        build : function
+            The function building the widgets of the screen, called as build(screen, window, *args).
+        *args : 
+            The other arguments of `build`.
+
+        Returns:
+        --------
+        screen : Screen
+            The screen shown.
+        """
+        if self.root is None:
+            self.create_window(name)
+        
+        screen = self._screens.get(name)
+        
+        if screen is None or not screen.frame.winfo_exists():
+            screen = Screen(self, name)
+            build(screen, self, *args)
+            self._screens[name] = screen
+        
+        if screen is not self._screen:
+            if self._screen is not None and self._screen.frame.winfo_exists():
+                self._screen.frame.pack_forget()
+            self.clear()
+            screen.frame.pack(fill=tk.BOTH, expand=True)
+            self._screen = screen
+            self.root.title(screen.title)
+        
+        return screen
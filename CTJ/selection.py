@@ -6,7 +6,9 @@ Created on Wed May  1 15:56:30 2024
 """
 
 import numpy as np
-import random as rd
+
+from itertools import chain, combinations, permutations
+from math import comb
 
 ###############################         FUNCTIONS       ############################################
 
@@ -16,12 +18,12 @@ def shannon_entropy(p):
     
     Parameters
     ----------
-    p : float
-        Probability of an event occurring, ranging from 0 to 1.
+    p : float or float array
+        Probability of an event occurring, ranging from 0 to 1. An array is processed element-wise.
     
     Returns
     -------
-    float
+    float or float array
         Shannon entropy value for the given probability.
     
     """
@@ -44,14 +46,64 @@ def MI(JointProba,Proba):
         Mutual information array representing the mutual information between each pair of random variables.
 
     """
-    n = len(JointProba)
-    mi = np.zeros((n, n))
-    for i in range(n):
-        for j in range(n):
-            if i!=j:
-                mi[i][j] = shannon_entropy(Proba[i]) + shannon_entropy(Proba[j]) - shannon_entropy(JointProba[i][j])
+    #Entropy of each marginal and of each pair is computed once
+    H = shannon_entropy(np.asarray(Proba, dtype=float))
+    HJoint = shannon_entropy(np.asarray(JointProba, dtype=float))
+    
+    mi = H[:, None] + H[None, :] - HJoint
+    np.fill_diagonal(mi, 0)
     return mi
      
+def MI_pairs(pairs, JointProba, Proba):
+    """
+    Calculate the mutual information only for the given pairs of random variables.
+    Unlike MI, the entropy of the joint probabilities is computed only for these pairs.
+    The probabilities may have a leading dimension for independent sessions, the result then has the same leading dimension.
+
+    Parameters
+    ----------
+    pairs : int array
+        Array of shape (nb_pairs, 2) containing the index of the two random variables of each pair.
+    JointProba : float array
+        Joint probability distribution of the two random variables.
+    Proba : float array
+        Marginal probability distribution of each random variable.
+
+    Returns
+    -------
+    mi : float array
+        Mutual information of each pair, in the same order as `pairs`.
+
+    """
+    return MI_pairs_probabilities(pairs, np.asarray(JointProba, dtype=float)[..., pairs[:, 0], pairs[:, 1]], Proba)
+
+def MI_pairs_probabilities(pairs, PairProba, Proba):
+    """
+    Calculate the mutual information of the given pairs from the joint probability of each pair, without the n*n joint probability matrix.
+    The probabilities may have a leading dimension for independent sessions, the result then has the same leading dimension.
+
+    Parameters
+    ----------
+    pairs : int array
+        Array of shape (nb_pairs, 2) containing the index of the two random variables of each pair.
+    PairProba : float array
+        Joint probability of the two random variables of each pair, in the same order as `pairs`.
+    Proba : float array
+        Marginal probability distribution of each random variable.
+
+    Returns
+    -------
+    mi : float array
+        Mutual information of each pair, in the same order as `pairs`.
+
+    """
+    i, j = pairs[:, 0], pairs[:, 1]
+    
+    H = shannon_entropy(np.asarray(Proba, dtype=float))
+    HJoint = shannon_entropy(np.asarray(PairProba, dtype=float))
+    
+    return H[..., i] + H[..., j] - HJoint
+     
 def II(TriProba,JointProba,Proba):
     """
     Calculate the triple-wise interaction information between three random variables.
@@ -72,18 +124,161 @@ def II(TriProba,JointProba,Proba):
 
     """
     n = len(JointProba)
-    ii = np.zeros((n, n, n))
-    for i in range(n):
-        for j in range(n):
-            for k in range(n):
-                if i!=j or j!=k or k!=i:
-                    #calculation of mutual information
-                    ii[i][j][k] = shannon_entropy(Proba[i]) + shannon_entropy(Proba[j]) - shannon_entropy(JointProba[i][j])
-                    #calculation of Conditional mutual information
-                    ii[i][j][k] -= shannon_entropy(JointProba[i][k])+shannon_entropy(JointProba[j][k])-shannon_entropy(TriProba[i][j][k])-shannon_entropy(Proba[k])
+    
+    #Entropy of each marginal, of each pair and of each trio is computed once
+    H = shannon_entropy(np.asarray(Proba, dtype=float))
+    HJoint = shannon_entropy(np.asarray(JointProba, dtype=float))
+    HTri = shannon_entropy(np.asarray(TriProba, dtype=float))
+    
+    #calculation of mutual information
+    ii = np.broadcast_to((H[:, None, None] + H[None, :, None]) - HJoint[:, :, None], (n, n, n)).copy()
+    #calculation of Conditional mutual information
+    ii -= ((HJoint[:, None, :] + HJoint[None, :, :]) - HTri) - H[None, None, :]
+    
+    diagonal = np.arange(n)
+    ii[diagonal, diagonal, diagonal] = 0
     return ii
      
-def roulette(population):
+def II_trios(trios, TriProba, JointProba, Proba):
+    """
+    Calculate the triple-wise interaction information only for the given trios of random variables.
+    Unlike II, no n*n*n array is allocated, the memory used is proportional to the number of trios.
+    The probabilities may have a leading dimension for independent sessions, the result then has the same leading dimension.
+
+    Parameters
+    ----------
+    trios : int array
+        Array of shape (nb_trios, 3) containing the index of the three random variables of each trio.
+    TriProba : float array
+        Conditional probability distribution of each trio, in the same order as `trios`.
+    JointProba : float array
+        Joint probability distribution of the two random variables.
+    Proba : float array
+        Marginal probability distribution of each random variable.
+
+    Returns
+    -------
+    ii : float array
+        Triple-wise interaction information of each trio, in the same order as `trios`.
+
+    """
+    i, j, k = trios[:, 0], trios[:, 1], trios[:, 2]
+    
+    JointProba = np.asarray(JointProba, dtype=float)
+    PairProba = np.stack((JointProba[..., i, j], JointProba[..., i, k], JointProba[..., j, k]), axis=-1)
+    
+    return II_trios_probabilities(trios, TriProba, PairProba, Proba)
+
+def II_trios_probabilities(trios, TriProba, PairProba, Proba):
+    """
+    Calculate the triple-wise interaction information of the given trios from the joint probabilities of the pairs of each trio,
+    without the n*n joint probability matrix.
+    The probabilities may have a leading dimension for independent sessions, the result then has the same leading dimension.
+
+    Parameters
+    ----------
+    trios : int array
+        Array of shape (nb_trios, 3) containing the index of the three random variables (i, j, k) of each trio.
+    TriProba : float array
+        Conditional probability distribution of each trio, in the same order as `trios`.
+    PairProba : float array
+        Array of shape (nb_trios, 3) containing the joint probabilities of the pairs (i, j), (i, k) and (j, k) of each trio.
+    Proba : float array
+        Marginal probability distribution of each random variable.
+
+    Returns
+    -------
+    ii : float array
+        Triple-wise interaction information of each trio, in the same order as `trios`.
+
+    """
+    i, j, k = trios[:, 0], trios[:, 1], trios[:, 2]
+    
+    #Entropy of each marginal and of each pair is computed once
+    H = shannon_entropy(np.asarray(Proba, dtype=float))
+    HJoint = shannon_entropy(np.asarray(PairProba, dtype=float))
+    HTri = shannon_entropy(np.asarray(TriProba, dtype=float))
+    
+    #calculation of mutual information
+    ii = (H[..., i] + H[..., j]) - HJoint[..., 0]
+    #calculation of Conditional mutual information
+    ii -= ((HJoint[..., 1] + HJoint[..., 2]) - HTri) - H[..., k]
+    return ii
+
+def combinations_index(nb_items, size):
+    """
+    Create the array of all the combinations of `size` distinct index among `nb_items`, each combination being sorted.
+
+    Parameters
+    ----------
+    nb_items : int
+        The number of items.
+    size : int
+        The number of items in each combination, 2 for pairs and 3 for trios.
+
+    Returns
+    -------
+    index : int array
+        Array of shape (nb_combinations, size) containing the combinations in lexicographic order.
+
+    """
+    nb_combinations = comb(nb_items, size)
+    index = np.fromiter(chain.from_iterable(combinations(range(nb_items), size)), dtype=np.intp, count=nb_combinations * size)
+    return index.reshape(nb_combinations, size)
+
+def window_candidates(estimated_values, size, width, nb_random = 0, rng = None):
+    """
+    Create the candidate pairs or trios made of items close in value.
+    The items are sorted by estimated value and only the tuples inside a sliding window of `width` neighbours are proposed,
+    plus `nb_random` random tuples to keep exploring the whole items list. There are about nb_items * width**(size-1) candidates.
+
+    Parameters
+    ----------
+    estimated_values : list of int
+        A list of int containing the estimated values corresponding to each item.
+    size : int
+        The number of items in each candidate, 2 for pairs and 3 for trios.
+    width : int
+        The number of following neighbours, in the sorted order, that can be associated with an item.
+    nb_random : int, optional
+        The number of random tuples added for exploration. The default is 0.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    candidates : int array
+        Array of shape (nb_candidates, size) containing distinct sorted tuples of index, in lexicographic order.
+
+    """
+    rng = np.random.default_rng(rng)
+    nb_items = len(estimated_values)
+    width = max(min(width, nb_items - 1), size - 1)
+    
+    #Position of each item once sorted by estimated value
+    order = np.argsort(np.asarray(estimated_values, dtype=float), kind='stable')
+    
+    candidates = []
+    
+    #Every tuple whose items are at most `width` positions away from the first one
+    for offsets in combinations(range(1, width + 1), size - 1):
+        start = np.arange(nb_items - offsets[-1])
+        candidates.append(np.column_stack([order[start]] + [order[start + offset] for offset in offsets]))
+    
+    #Random tuples for exploration, all drawn at once : the k-th item is drawn among the nb_items - k items left,
+    #then shifted past the items already drawn, so the items of a tuple are distinct
+    if nb_random > 0 :
+        tuples = rng.integers(0, nb_items - np.arange(size), size=(nb_random, size))
+        for k in range(1, size):
+            drawn = np.sort(tuples[:, :k], axis=1)
+            for j in range(k):
+                tuples[:, k] += tuples[:, k] >= drawn[:, j]
+        candidates.append(tuples)
+    
+    candidates = np.sort(np.concatenate(candidates), axis=1)
+    return np.unique(candidates, axis=0)
+
+def roulette(population, rng = None):
     """
     Perform roulette wheel selection to select an index from the population.
 
@@ -91,6 +286,8 @@ def roulette(population):
     ----------
     population : float array
         List or array containing the fitness values of individuals in the population.
+    rng : numpy.random.Generator or int, optional
+        The random generator used for the draws, or its seed. If None, a new generator is seeded from the system. The default is None.
 
     Returns
     -------
@@ -98,7 +295,318 @@ def roulette(population):
         Index of the selected individual in the population.
 
     """
-    total_fitness = sum(individual for individual in population)
-    selection_probabilities = [(individual + np.finfo(float).eps) / (total_fitness + np.finfo(float).eps) for individual in population]
-    selected_index = rd.choices(range(len(population)), weights=selection_probabilities)[0]
-    return selected_index
+    return RouletteSampler(population, rng).draw()
+
+def roulette_rows(population, mask, rng):
+    """
+    Perform one roulette wheel selection on each row of the population, with the same rules as RouletteSampler:
+    a null fitness can still be selected, and the masked individuals are removed unless the whole row is masked.
+
+    Parameters
+    ----------
+    population : float array
+        Array of shape (nb_rows, nb_individuals) containing the fitness values of the individuals of each row.
+    mask : bool array
+        Array of the same shape, True for the individuals to remove.
+    rng : numpy.random.Generator
+        The random generator used for the draws.
+
+    Returns
+    -------
+    selected_index : int array
+        Index of the selected individual in each row.
+
+    """
+    weights = np.maximum(np.asarray(population, dtype=float), 0) + np.finfo(float).eps
+    mask = np.asarray(mask, dtype=bool)
+    mask = mask & (mask.any(axis=1) & ~mask.all(axis=1))[:, None]
+    weights = np.where(mask, 0, weights)
+    cumulative = np.cumsum(weights, axis=1)
+    
+    r = rng.random(len(weights)) * cumulative[:, -1]
+    selected_index = (cumulative <= r[:, None]).sum(axis=1)
+    selected_index = np.minimum(selected_index, weights.shape[1] - 1)
+    
+    #Step back to the last individual with a weight, as RouletteSampler.draw does
+    allowed = np.where(weights > 0, np.arange(weights.shape[1]), 0)
+    allowed = np.maximum.accumulate(allowed, axis=1)
+    return allowed[np.arange(len(weights)), selected_index]
+
+def tuples_code(tuples, nb_items):
+    """
+    Encode each sorted tuple of index as a single integer, two tuples have the same code only if they are equal.
+
+    Parameters
+    ----------
+    tuples : int array
+        Array of shape (nb_tuples, size) containing sorted tuples of index.
+    nb_items : int
+        The number of items.
+
+    Returns
+    -------
+    codes : int array
+        The code of each tuple.
+
+    """
+    tuples = np.asarray(tuples, dtype=np.int64)
+    codes = np.zeros(len(tuples), dtype=np.int64)
+    for column in range(tuples.shape[1]):
+        codes = codes * nb_items + tuples[:, column]
+    return codes
+
+
+class RouletteSampler:
+    """
+    A class to perform roulette wheel selection with a binary search on the cumulative fitness.
+    The sampler is built once for a selection step, candidates can be excluded so the draw always returns an allowed one.
+
+    Attributes:
+    -----------
+    _weights : float array
+        The weight of each individual, its fitness, or 0 if it is excluded.
+    _cumulative : float array
+        The cumulative sum of the weights.
+    _rng : numpy.random.Generator
+        The random generator used for the draws.
+
+    Methods:
+    --------
+    weights() -> float array:
+        Property to get the weights of the individuals.
+    exclude(mask: bool array):
+        Remove the individuals from the selection.
+    draw() -> int:
+        Select an index with a probability proportional to its weight.
+    """
+
+    def __init__(self, population, rng = None):
+        #A small value is added so that a null fitness can still be selected
+        self._weights = np.maximum(np.asarray(population, dtype=float), 0) + np.finfo(float).eps
+        self._cumulative = np.cumsum(self._weights)
+        self._rng = np.random.default_rng(rng)
+
+    @property
+    def weights(self):
+        return self._weights
+
+    def exclude(self, mask):
+        """
+        Remove the individuals from the selection. If all the individuals would be removed nothing is done,
+        so an individual can still be drawn.
+
+        Parameters:
+        -----------
+        mask : bool array
+            True for the individuals to remove.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any() or mask.all():
+            return
+        self._weights = np.where(mask, 0, self._weights)
+        self._cumulative = np.cumsum(self._weights)
+
+    def draw(self):
+        """
+        Select an index with a probability proportional to its weight, in O(log n).
+
+        Returns:
+        --------
+        int
+            Index of the selected individual.
+        """
+        r = self._rng.random() * self._cumulative[-1]
+        selected_index = int(np.searchsorted(self._cumulative, r, side='right'))
+        #Guard against rounding of the last cumulative value
+        selected_index = min(selected_index, len(self._cumulative) - 1)
+        while self._weights[selected_index] == 0:
+            selected_index -= 1
+        return selected_index
+
+
+class SelectionState:
+    """
+    A class to keep the apparition counts of items, pairs and trios of items in the assessments, and the index of the assessed tuples.
+    The counts are updated each time a new assessment is added, so the apparition probabilities
+    used by the selection do not need to be recounted from the whole assessments list.
+
+    Attributes:
+    -----------
+    _nb_assessments : int
+        The number of assessments added. Default is 0.
+    _count : int array
+        The number of assessments in which each item appears.
+    _joint_count : int array or dict
+        The number of assessments in which each pair of distinct items appears together, an n*n array,
+        or if the state is sparse a dict whose keys are the sorted pairs of index.
+    _tri_count : dict
+        The number of assessments in which each trio of distinct items appears, the keys are the sorted trio of index.
+    _assessed : set
+        The assessed pairs or trios, as sorted tuples of index.
+    _assessed_codes : list of int
+        The code of each assessed tuple, see tuples_code.
+    _assessed_array : int array or None
+        The sorted array of `_assessed_codes`, built when needed. Default is None.
+
+    Methods:
+    --------
+    nb_assessments() -> int:
+        Property to get the number of assessments added.
+    count() -> int array:
+        Property to get the apparition count of each item.
+    joint_count() -> int array or dict:
+        Property to get the apparition count of each pair of items.
+    joint_count_of(pairs: int array) -> float array:
+        Get the apparition count of each of the given pairs.
+    tri_count() -> dict:
+        Property to get the apparition count of each trio of items.
+    tri_count_of(trios: int array) -> float array:
+        Get the apparition count of each of the given sorted trios.
+    add(tup: tuple of int):
+        Update the counts with a new assessment.
+    is_assessed(tup: tuple of int) -> bool:
+        Check in O(1) if a pair or trio was already assessed, whatever the order of its items.
+    assessed_mask(candidates: int array) -> bool array:
+        Find the candidates already assessed.
+    """
+
+    def __init__(self, nb_items, sparse = False):
+        self._nb_assessments = 0
+        self._count = np.zeros(nb_items, dtype=np.int32)
+        #Only the pairs already assessed are kept when the n*n array would be too large
+        self._joint_count = {} if sparse else np.zeros((nb_items, nb_items), dtype=np.int32)
+        self._tri_count = {}
+        self._assessed = set()
+        self._assessed_codes = []
+        self._assessed_array = None
+
+    @property
+    def nb_assessments(self):
+        return self._nb_assessments
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def joint_count(self):
+        return self._joint_count
+
+    @property
+    def tri_count(self):
+        return self._tri_count
+
+    def add(self, tup):
+        """
+        Update the counts with a new assessment.
+
+        Parameters:
+        -----------
+        tup : tuple of int
+            The index of the items in the assessment, a pair or a trio of distinct items.
+        """
+        self._nb_assessments += 1
+        for i in tup:
+            self._count[i] += 1
+        key = tuple(sorted(tup))
+        if isinstance(self._joint_count, dict):
+            for pair in combinations(key, 2):
+                self._joint_count[pair] = self._joint_count.get(pair, 0) + 1
+        else:
+            for i, j in permutations(tup, 2):
+                self._joint_count[i][j] += 1
+        if len(tup) == 3:
+            self._tri_count[key] = self._tri_count.get(key, 0) + 1
+        if key not in self._assessed:
+            self._assessed.add(key)
+            self._assessed_codes.append(int(tuples_code([key], len(self._count))[0]))
+            self._assessed_array = None
+
+    def is_assessed(self, tup):
+        """
+        Check if a pair or trio was already assessed, whatever the order of its items.
+
+        Parameters:
+        -----------
+        tup : tuple of int
+            The index of the items.
+
+        Returns:
+        --------
+        bool
+            True if the tuple was already assessed.
+        """
+        return tuple(sorted(tup)) in self._assessed
+
+    def assessed_mask(self, candidates):
+        """
+        Find the candidates already assessed, with one search for all of them.
+
+        Parameters:
+        -----------
+        candidates : int array
+            Array of shape (nb_candidates, size) containing sorted tuples of index.
+
+        Returns:
+        --------
+        bool array
+            True for the candidates already assessed.
+        """
+        if len(self._assessed_codes) == 0 or len(candidates) == 0:
+            return np.zeros(len(candidates), dtype=bool)
+        if self._assessed_array is None:
+            self._assessed_array = np.sort(np.array(self._assessed_codes, dtype=np.int64))
+        return np.isin(tuples_code(candidates, len(self._count)), self._assessed_array)
+
+    def joint_count_of(self, pairs):
+        """
+        Get the apparition count of each of the given pairs, whatever the storage of the counts.
+
+        Parameters:
+        -----------
+        pairs : int array
+            Array of shape (nb_pairs, 2) containing pairs of index.
+
+        Returns:
+        --------
+        float array
+            The apparition count of each pair, in the same order as `pairs`.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        if isinstance(self._joint_count, dict):
+            return self._counts_of(self._joint_count, np.sort(pairs, axis=1))
+        return self._joint_count[pairs[:, 0], pairs[:, 1]].astype(float)
+
+    def tri_count_of(self, trios):
+        """
+        Get the apparition count of each of the given trios without building a n*n*n array.
+
+        Parameters:
+        -----------
+        trios : int array
+            Array of shape (nb_trios, 3) containing sorted trios of index.
+
+        Returns:
+        --------
+        float array
+            The apparition count of each trio, in the same order as `trios`.
+        """
+        return self._counts_of(self._tri_count, trios)
+
+    def _counts_of(self, counts_dict, tuples):
+        counts = np.zeros(len(tuples))
+        if len(counts_dict) == 0 or len(tuples) == 0:
+            return counts
+        
+        #Each sorted tuple is encoded as a single integer to be searched in the sorted known tuples
+        nb_items = len(self._count)
+        keys = tuples_code(list(counts_dict.keys()), nb_items)
+        values = np.array(list(counts_dict.values()), dtype=float)
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        
+        codes = tuples_code(tuples, nb_items)
+        position = np.minimum(np.searchsorted(keys, codes), len(keys) - 1)
+        found = keys[position] == codes
+        counts[found] = values[position[found]]
+        return counts
@@ -0,0 +1,594 @@
+# -*- coding: utf-8 -*-
+"""
+The simulation of many automated sessions at once with NumPy arrays, for experiments.
+"""
+
+import numpy as np
+from statistics import NormalDist
+
+from .util import Rescale_rows, zscore
+from .estimation import BatchLeastSquaresEstimator, BatchBradleyTerryModel
+from .selection import MI_pairs, II_trios, combinations_index, roulette_rows, tuples_code
+
+###############################         FUNCTIONS       ############################################
+
+def SSR_rows (true_values, estimated_values):
+    """
+    Calculate the sum of squared residuals of each session, as util.SSR does.
+
+    Parameters
+    ----------
+    true_values : float array
+        The true values of the items.
+    estimated_values : float array
+        Array of shape (nb_sessions, nb_items) containing the estimated values of each session.
+
+    Returns
+    -------
+    SSR : float array
+        The sum of squared residuals of each session, between 0 and 1.
+
+    """
+    estimated_STD = np.std(estimated_values, axis=1)
+    MSE = np.square(np.subtract(true_values, estimated_values)).mean(axis=1)
+    true_STD_squared = estimated_STD**2 - MSE
+    SSR = true_STD_squared / (estimated_STD**2 + np.finfo(float).eps)
+    return np.clip(SSR, 0, 1)
+
+def simulate_pairs (true_values, pairs, sensibility, rng):
+    """
+    Simulate the judgment of one pair in each session, as make_ACJ_assessment does with true values.
+
+    Parameters
+    ----------
+    true_values : float array
+        The true values of the items.
+    pairs : int array
+        Array of shape (nb_sessions, 2) containing the id of the items of the pair of each session.
+    sensibility : int
+        The sensitivity threshold. If the margin between two items is equal to this value, there is a 10% probability of inverting them.
+    rng : numpy.random.Generator
+        The random generator used for the draws.
+
+    Returns
+    -------
+    winners : int array
+        The id of the preferred item in each session.
+    losers : int array
+        The id of the other item in each session.
+    errors : int array
+        One if the judgment is biaised else 0.
+
+    """
+    first, second = pairs[:, 0], pairs[:, 1]
+
+    val = np.abs(true_values[first] - true_values[second])
+    k = -np.log(1/9)/(sensibility + np.finfo(float).eps)
+    errors = rng.random(len(pairs)) >= 1/(1+np.exp(- k * val))
+
+    #The pair is sorted by decreasing true value, or increasing if the judge makes a mistake, ties keep their order
+    first_wins = np.where(errors, true_values[first] <= true_values[second], true_values[first] >= true_values[second])
+    winners = np.where(first_wins, first, second)
+    losers = np.where(first_wins, second, first)
+
+    return winners, losers, errors.astype(int)
+
+def simulate_trios (true_values, trios, sensibility, scale, rng):
+    """
+    Simulate the judgment of one trio in each session, as make_CTJ_assessment does with true values.
+
+    Parameters
+    ----------
+    true_values : float array
+        The true values of the items.
+    trios : int array
+        Array of shape (nb_sessions, 3) containing the id of the items of the trio of each session.
+    sensibility : tuple
+        A  tuple cointaining the sensibility treshold, the absolute value of the error on the scaler, and the probability of making a mystake. (int, int, double)
+    scale : int
+        The value of the scale for the CTJ model.
+    rng : numpy.random.Generator
+        The random generator used for the draws.
+
+    Returns
+    -------
+    trios : int array
+        Array of shape (nb_sessions, 3) containing the id of the Max, Average and Min items of each session.
+    dist : float array
+        The distance given between the Average and the Max item in each session.
+    errors : int array
+        Array of shape (nb_sessions, 2) containing the number of inversion and of scale error of each session.
+
+    """
+    nb_sessions = len(trios)
+    rows = np.arange(nb_sessions)
+
+    #We sort the trio, ties keep their order
+    order = np.argsort(-true_values[trios], axis=1, kind='stable')
+    trios = np.take_along_axis(trios, order, axis=1)
+
+    #We calculate the distance between the Average and the Max value, and between the Min and the Max value
+    dmin = true_values[trios[:, 1]] - true_values[trios[:, 0]]
+    dmax = true_values[trios[:, 2]] - true_values[trios[:, 0]]
+
+    k = -np.log(1/9)/(sensibility[0] + np.finfo(float).eps)
+    draws = rng.random((5, nb_sessions))
+
+    def inversion (first, second, draw):
+        val = np.abs(true_values[trios[:, first]] - true_values[trios[:, second]])
+        swap = draw >= 1/(1+np.exp(- k * val))
+        trios[np.ix_(rows[swap], [first, second])] = trios[np.ix_(rows[swap], [second, first])]
+        return swap
+
+    first_swap = inversion(0, 1, draws[0])
+    second_swap = inversion(1, 2, draws[1])
+    #The first two items are compared again only if the Min item moved
+    third_swap = inversion(0, 1, np.where(second_swap, draws[2], -1))
+    nb_inversion = first_swap.astype(int) + second_swap + third_swap
+
+    scale_error = draws[3] <= sensibility[2]
+    bias = np.where(scale_error, np.where(draws[4] < 0.5, -sensibility[1], sensibility[1]), 0)
+
+    ratio = np.divide(dmin, dmax, out=np.zeros(nb_sessions), where=dmax != 0)
+    dist = np.where(dmax == 0, scale//2 + bias, np.round(scale*ratio + bias))
+    dist = np.where(dist >= scale, scale-1, np.where(dist <= -1, 0, dist))
+
+    return trios, dist, np.column_stack((nb_inversion, scale_error.astype(int)))
+
+def simulate_ACJ (min_item, max_item, items, true_values, nb_sessions = 1000, sensibility = 0, max_iteration = 30, max_accuracy = 0.9, entropy = False, rng = None):
+    """
+    Simulate many independent ACJ sessions with one automated judge, advanced in lock-step.
+    Each step selects, judges and estimates one new pair for every session still running with a few array operations,
+    the sessions stop independently as in ACJ. The items lists are not modified.
+
+    Parameters
+    ----------
+    min_item : tuple
+        The min_item we wont to use. In the format (int, string).
+    max_item : tuple
+        The max_item we wont to use. In the format (int, string).
+    items : list of string
+        A list of strings representing the items to be assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+    nb_sessions : int, optional
+        The number of sessions to simulate. The default is 1000.
+    sensibility : int, optional
+        The sensitivity threshold of the judge. If the margin between two items is equal to this value, there is a 10% probability of inverting them. The default is 0.
+    max_iteration : int, optional
+        Number of maximum iteration of each session. The default is 30.
+    max_accuracy : float, optional
+        Accuracy of the model. The default is 0.9.
+    entropy : bool, optional
+        The method use to select items. The default is False.
+    rng : numpy.random.Generator or int, optional
+        The random generator, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    estimated_values : int array
+        Array of shape (nb_sessions, nb_items) containing the estimated values of each session.
+    int array
+        Number of iteration of each session.
+    cond : float array
+        Accuracy of the estimated values of each session.
+    error : int array
+        The number of error of each session.
+
+    """
+    rng = np.random.default_rng(rng)
+    items, true_values = add_bounds(min_item, max_item, items, true_values)
+
+    nb_items = len(items)
+    sessions = np.arange(nb_sessions)
+
+    mean = np.average(true_values)
+    std = np.std(true_values)
+
+    pairs = combinations_index(nb_items, 2)
+    #The pairs (k, i) are scanned by increasing i then k
+    pairs = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+    column = np.zeros((nb_items, nb_items), dtype=np.intp)
+    column[pairs[:, 0], pairs[:, 1]] = np.arange(len(pairs))
+    column[pairs[:, 1], pairs[:, 0]] = np.arange(len(pairs))
+
+    model = BatchBradleyTerryModel(nb_sessions, nb_items)
+    count = np.zeros((nb_sessions, nb_items))
+    joint_count = np.zeros((nb_sessions, nb_items, nb_items))
+    assessed = np.zeros((nb_sessions, len(pairs)), dtype=bool)
+    nb_assessments = np.zeros(nb_sessions, dtype=int)
+    error = np.zeros(nb_sessions, dtype=int)
+
+    def assess (running, judged_pairs):
+        winners, losers, errors = simulate_pairs(true_values, judged_pairs, sensibility, rng)
+        model.add(running, winners, losers)
+        count[running, winners] += 1
+        count[running, losers] += 1
+        joint_count[running, winners, losers] += 1
+        joint_count[running, losers, winners] += 1
+        assessed[running, column[winners, losers]] = True
+        nb_assessments[running] += 1
+        error[running] += errors
+
+    def estimate (running):
+        parameters = model.fit(running)
+        return np.round(zscore(parameters, axis=1) * std + mean)
+
+    #Assess all items one times, in a random order for each session
+    not_compared = np.argsort(rng.random((nb_sessions, nb_items)), axis=1)
+    for i in range(0, nb_items-2, 2):
+        assess(sessions, not_compared[:, [i, i+1]])
+    if nb_items%2 != 0:
+        assess(sessions, not_compared[:, [nb_items-1, nb_items-2]])
+
+    estimated_values = Rescale_rows(min_item[0], max_item[0], estimate(sessions)).astype(float)
+    cond = SSR_rows(true_values, estimated_values)
+    iteration = np.zeros(nb_sessions, dtype=int)
+
+    running = sessions[(iteration < max_iteration) & (cond < max_accuracy)]
+    while len(running) > 0:
+
+        #We select the best next pair of each session
+        if not entropy :
+            info = model.win_probability(running, pairs[:, 1], pairs[:, 0])
+            info = np.abs(0.5 - np.round(info, 2))
+            selected = pairs[np.argmin(info, axis=1)][:, ::-1]
+        else :
+            m = nb_assessments[running]
+            Proba = count[running] / (2 * m[:, None])
+            JointProba = joint_count[running] / m[:, None, None]
+            mi = MI_pairs(pairs, JointProba, Proba)
+            values = estimated_values[running]
+            Prox = np.abs(values[:, pairs[:, 0]] - values[:, pairs[:, 1]])
+            Disp = max_item[0]/(Prox+np.finfo(float).eps)
+            selected = pairs[roulette_rows(mi*Disp, assessed[running], rng)]
+
+        assess(running, selected)
+
+        estimated_values[running] = estimate(running)
+        cond[running] = SSR_rows(true_values, estimated_values[running])
+        iteration[running] += 1
+
+        running = running[(iteration[running] < max_iteration) & (cond[running] < max_accuracy)]
+
+    estimated_values = Rescale_rows(min_item[0], max_item[0], estimated_values)
+    return estimated_values, nb_assessments, cond, error
+
+def simulate_CTJ (min_item, max_item, items, true_values, nb_sessions = 1000, sensibility = (0,0,0), max_iteration = 30, max_accuracy = 0.9, scale = 10, rng = None):
+    """
+    Simulate many independent CTJ sessions with an automated judge, advanced in lock-step.
+    Each step selects, judges and estimates one new trio for every session still running with a few array operations,
+    the sessions stop independently as in CTJ. The items lists are not modified.
+
+    Parameters
+    ----------
+    min_item : tuple
+        The min_item we wont to use. In the format (int, string).
+    max_item : tuple
+        The max_item we wont to use. In the format (int, string).
+    items : list of string
+        A list of strings representing the items to be assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+    nb_sessions : int, optional
+        The number of sessions to simulate. The default is 1000.
+    sensibility : tuple, optional
+        A  tuple cointaining the sensibility treshold, the absolute value of the error on the scaler, and the probability of making a mystake. (int, int, double). The default is (0,0,0).
+    max_iteration : int, optional
+        Number of maximum iteration of each session. The default is 30.
+    max_accuracy : float, optional
+        Accuracy of the model. The default is 0.9.
+    scale : int, optional
+        The value of the scale for the CTJ model. The default is 10.
+    rng : numpy.random.Generator or int, optional
+        The random generator, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    estimated_values : int array
+        Array of shape (nb_sessions, nb_items) containing the estimated values of each session.
+    int array
+        Number of iteration of each session.
+    cond : float array
+        Accuracy of the estimated values of each session.
+    error : int array
+        Array of shape (nb_sessions, 2) containing the number of inversion and of scale error of each session.
+
+    """
+    rng = np.random.default_rng(rng)
+    items, true_values = add_bounds(min_item, max_item, items, true_values)
+
+    nb_items = len(items)
+    sessions = np.arange(nb_sessions)
+
+    trios = combinations_index(nb_items, 3)
+    codes = tuples_code(trios, nb_items)
+    i, j, k = trios[:, 0], trios[:, 1], trios[:, 2]
+
+    #Create the models with the two fixed points
+    estimator = BatchLeastSquaresEstimator(nb_sessions, nb_items)
+    estimator.add(sessions, np.full((nb_sessions, 1), items.index(min_item[1])), np.ones((nb_sessions, 1)), min_item[0])
+    estimator.add(sessions, np.full((nb_sessions, 1), items.index(max_item[1])), np.ones((nb_sessions, 1)), max_item[0])
+
+    count = np.zeros((nb_sessions, nb_items))
+    joint_count = np.zeros((nb_sessions, nb_items, nb_items))
+    tri_count = np.zeros((nb_sessions, len(trios)))
+    nb_assessments = np.zeros(nb_sessions, dtype=int)
+    error = np.zeros((nb_sessions, 2), dtype=int)
+
+    def assess (running, judged_trios):
+        judged_trios, dist, errors = simulate_trios(true_values, judged_trios, sensibility, scale, rng)
+        alpha = dist/(scale - dist)
+        coefficients = np.column_stack((np.ones(len(running)), -(alpha + 1), alpha))
+        estimator.add(running, judged_trios, coefficients)
+
+        rows = running[:, None]
+        count[rows, judged_trios] += 1
+        for first, second in ((0, 1), (0, 2), (1, 2)):
+            joint_count[running, judged_trios[:, first], judged_trios[:, second]] += 1
+            joint_count[running, judged_trios[:, second], judged_trios[:, first]] += 1
+        tri_count[running, np.searchsorted(codes, tuples_code(np.sort(judged_trios, axis=1), nb_items))] += 1
+        nb_assessments[running] += 1
+        error[running] += errors
+
+    #Assess all items one times, in a random order for each session
+    not_compared = np.argsort(rng.random((nb_sessions, nb_items)), axis=1)
+    for first in range(0, nb_items-3, 3):
+        assess(sessions, not_compared[:, [first, first+1, first+2]])
+    if nb_items%3 != 0:
+        assess(sessions, not_compared[:, [nb_items-1, nb_items-2, nb_items-3]])
+
+    estimated_values = Rescale_rows(min_item[0], max_item[0], estimator.solve()).astype(float)
+    cond = SSR_rows(true_values, estimated_values)
+    iteration = np.zeros(nb_sessions, dtype=int)
+
+    running = sessions[(iteration < max_iteration) & (cond < max_accuracy)]
+    while len(running) > 0:
+
+        #We select the best next trio of each session
+        m = nb_assessments[running]
+        Proba = count[running] / (3 * m[:, None])
+        JointProba = 2 * joint_count[running] / (3 * m[:, None, None])
+        TriProba = tri_count[running] / m[:, None]
+
+        values = estimated_values[running]
+        Prox = np.sqrt((values[:, i] - values[:, j]) ** 2 +
+                       (values[:, j] - values[:, k]) ** 2 +
+                       (values[:, i] - values[:, k]) ** 2)
+
+        ii = II_trios(trios, TriProba, JointProba, Proba)
+        selected = trios[roulette_rows((ii**2)*Prox, tri_count[running] > 0, rng)]
+
+        assess(running, selected)
+
+        estimated_values[running] = Rescale_rows(min_item[0], max_item[0], estimator.solve(running))
+        cond[running] = SSR_rows(true_values, estimated_values[running])
+        iteration[running] += 1
+
+        running = running[(iteration[running] < max_iteration) & (cond[running] < max_accuracy)]
+
+    estimated_values = Rescale_rows(min_item[0], max_item[0], estimated_values)
+    return estimated_values, nb_assessments, cond, error
+
+def simulate_Rubric (min_item, max_item, items, true_values, nb_sessions = 1000, sensibility = (0,0), rng = None):
+    """
+    Simulate many independent Rubric sessions with an automated judge. The items lists are not modified.
+
+    Parameters
+    ----------
+    min_item : tuple
+        The min_item we wont to use. In the format (int, string).
+    max_item : tuple
+        The max_item we wont to use. In the format (int, string).
+    items : list of string
+        A list of strings representing the items to be assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+    nb_sessions : int, optional
+        The number of sessions to simulate. The default is 1000.
+    sensibility : tuple, optional
+        A tuple cointaining the marge of error, and the probability of making a mystake. In the format (int, double). The default is (0,0).
+    rng : numpy.random.Generator or int, optional
+        The random generator, or its seed. If None, a new generator is seeded from the system. The default is None.
+
+    Returns
+    -------
+    estimated_values : int array
+        Array of shape (nb_sessions, nb_items) containing the estimated values of each session.
+    int array
+        Number of iteration of each session.
+    acc : float array
+        Accuracy of the estimated values of each session.
+    error : int array
+        The number of error of each session.
+
+    """
+    rng = np.random.default_rng(rng)
+    items, true_values = add_bounds(min_item, max_item, items, true_values)
+
+    nb_items = len(items)
+
+    draws = rng.random((2, nb_sessions, nb_items))
+    biased = draws[0] < sensibility[1]
+    bias = np.where(biased, np.where(draws[1] < 0.5, -sensibility[0], sensibility[0]), 0)
+
+    estimated_values = Rescale_rows(min_item[0], max_item[0], true_values + bias)
+    acc = SSR_rows(true_values, estimated_values)
+
+    return estimated_values, np.full(nb_sessions, nb_items), acc, biased.sum(axis=1)
+
+def add_bounds (min_item, max_item, items, true_values):
+    """
+    Add the min and max items to copies of the items and true values lists if they are missing, as ACJ, CTJ and Rubric do.
+
+    Parameters
+    ----------
+    min_item : tuple
+        The min_item we wont to use. In the format (int, string).
+    max_item : tuple
+        The max_item we wont to use. In the format (int, string).
+    items : list of string
+        A list of strings representing the items to be assessed.
+    true_values : list of int
+        A list of int containing the true values corresponding to each item in the `items` list.
+
+    Returns
+    -------
+    items : list of string
+        The items, with the min and max items.
+    true_values : float array
+        The true values, with the ones of the min and max items.
+
+    """
+    items = list(items)
+    true_values = list(true_values)
+    if min_item[1] not in items :
+        items.append(min_item[1])
+        true_values.append(min_item[0])
+    if max_item[1] not in items :
+        items.append(max_item[1])
+        true_values.append(max_item[0])
+    return items, np.array(true_values, dtype=float)
+
+def simulation_metrics (nb_assessments, cond, error):
+    """
+    The metrics of simulated sessions that can be tracked by simulate_sequential.
+
+    Parameters
+    ----------
+    nb_assessments : int array
+        Number of iteration of each session.
+    cond : float array
+        Accuracy of the estimated values of each session.
+    error : int array
+        The number of error of each session, or for CTJ the number of inversion and of scale error of each session.
+
+    Returns
+    -------
+    metrics : dict
+        The value of each metric for each session, in the format {string : array}, with the keys "accuracy", "iterations", "errors",
+        and "scale_errors" for CTJ.
+
+    """
+    error = np.asarray(error)
+    
+    metrics = {"accuracy" : np.asarray(cond, dtype=float), "iterations" : np.asarray(nb_assessments, dtype=float)}
+    
+    if error.ndim == 2 :
+        metrics["errors"] = error[:, 0].astype(float)
+        metrics["scale_errors"] = error[:, 1].astype(float)
+    else :
+        metrics["errors"] = error.astype(float)
+    
+    return metrics
+
+def confidence_width (samples, confidence = 0.95):
+    """
+    The width of the confidence interval of the mean of samples, with the quantile of the Student t distribution.
+    The quantile is computed from the normal one with the Cornish-Fisher expansion, without importing scipy.stats
+    which is slower to import than most simulations are to run. The relative error is below 1e-4 from 6 samples.
+
+    Parameters
+    ----------
+    samples : float array
+        The samples.
+    confidence : float, optional
+        The level of confidence of the interval. The default is 0.95.
+
+    Returns
+    -------
+    float
+        The width of the interval, infinite with less than two samples.
+
+    """
+    nb_samples = len(samples)
+    
+    if nb_samples < 2 :
+        return np.inf
+    
+    #We correct the normal quantile by powers of 1/degrees of freedom
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    dof = nb_samples - 1
+    quantile = (z + (z**3 + z) / (4 * dof)
+                  + (5*z**5 + 16*z**3 + 3*z) / (96 * dof**2)
+                  + (3*z**7 + 19*z**5 + 17*z**3 - 15*z) / (384 * dof**3)
+                  + (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / (92160 * dof**4))
+    
+    return 2 * quantile * np.std(samples, ddof=1) / np.sqrt(nb_samples)
+
+def simulate_sequential (simulate, *args, widths = None, relative = False, confidence = 0.95, chunk = 100, min_sessions = 200, max_sessions = 1000, rng = None, **kwargs):
+    """
+    Simulate sessions by chunks until the mean of the tracked metrics is known precisely enough, instead of a fixed number of sessions.
+    After each chunk, the simulation stops if the confidence interval of the mean of each metric is narrower than its target width,
+    so the easy configurations of a sweep stop early and the noisy ones get more sessions.
+    The width decreases as the square root of the number of sessions, so the next chunk is sized to reach the target widths at once:
+    the sessions of a chunk are simulated in lock-step, a few large chunks are faster than many small ones.
+
+    Parameters
+    ----------
+    simulate : function
+        The simulation, simulate_ACJ, simulate_CTJ or simulate_Rubric.
+    *args :
+        The arguments of `simulate`, without `nb_sessions` and `rng`.
+    widths : dict, optional
+        The target width of the confidence interval of each metric, in the format {string : float}, see simulation_metrics for the names. If None, {"accuracy" : 0.01}. The default is None.
+    relative : bool or list of string, optional
+        The metrics whose width is a fraction of their mean, the other widths are in the unit of their metric. If True all the widths are relative,
+        if False none. Keep absolute widths for the metrics whose mean can be close to 0, as the number of errors. The default is False.
+    confidence : float, optional
+        The level of confidence of the intervals. The default is 0.95.
+    chunk : int, optional
+        The minimum number of sessions of the chunks after the first one. The default is 100.
+    min_sessions : int, optional
+        The number of sessions of the first chunk, simulated before the widths are checked. The default is 200.
+    max_sessions : int, optional
+        The maximum number of sessions, even if the widths are not reached. The default is 1000.
+    rng : numpy.random.Generator or int, optional
+        The random generator, or its seed. If None, a new generator is seeded from the system. The default is None.
+    **kwargs :
+        The other keyword arguments of `simulate`.
+
+    Raises
+    ------
+    Exception
+        A metric can not be tracked for this simulation.
+
+    Returns
+    -------
+    The results of `simulate` for all the sessions simulated, their number is the length of the arrays.
+
+    """
+    rng = np.random.default_rng(rng)
+    
+    if widths is None :
+        widths = {"accuracy" : 0.01}
+    
+    results = []
+    nb_sessions = 0
+    size = min(min_sessions, max_sessions)
+    
+    while size > 0 :
+        results.append(simulate(*args, nb_sessions=size, rng=rng, **kwargs))
+        nb_sessions += size
+        
+        metrics = simulation_metrics(*[np.concatenate([result[i] for result in results]) for i in (1, 2, 3)])
+        
+        #The number of sessions needed by the least precise metric
+        needed = nb_sessions
+        for name, width in widths.items() :
+            if name not in metrics :
+                raise Exception("Unknown metric " + str(name) + ", the metric must be one of " + ", ".join(metrics) + ".")
+            
+            if relative is True or (relative is not False and name in relative) :
+                width = width * np.abs(metrics[name].mean())
+            
+            current_width = confidence_width(metrics[name], confidence)
+            if current_width > width :
+                needed = max(needed, np.inf if width == 0 else int(np.ceil(nb_sessions * (current_width / width) ** 2)))
+        
+        if needed <= nb_sessions :
+            break
+        
+        size = int(min(max(needed - nb_sessions, chunk), max_sessions - nb_sessions))
+    
+    return tuple(np.concatenate([result[i] for result in results]) for i in range(4))
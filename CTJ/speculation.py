@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+The worker thread shared by the sessions to select the next tuples while the judges are deciding.
+"""
+
+import threading
+
+#The worker is created at the first speculation, the lock keeps it unique when sessions speculate from several threads
+_executor = None
+_lock = threading.Lock()
+
+###############################         FUNCTIONS       ############################################
+
+def speculation_executor ():
+    """
+    The worker shared by the sessions to select the next tuples in the background, see ACJSession.speculate and CTJSession.speculate.
+    The selections are done one after the other, so the most likely judgment given first is prepared first.
+
+    Returns
+    -------
+    ThreadPoolExecutor
+        The executor with a single thread.
+    """
+    global _executor
+    
+    with _lock :
+        if _executor is None :
+            #The executor is only imported when a human assessment is done
+            from concurrent.futures import ThreadPoolExecutor
+            
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CTJ-selection")
+    
+    return _executor
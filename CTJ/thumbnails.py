@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+The on-disk store of the thumbnails of the items, rendered in advance for the assessment windows.
+"""
+
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import STORE_NAME, INDEX_NAME, image_thumbnail, pdf_thumbnail, read_index, thumbnail_key
+
+#The extensions of the items, as the assessment methods name the files : item + ".png" or item + ".pdf"
+EXTENSIONS = (".png", ".pdf")
+
+###############################         FUNCTIONS       ############################################
+
+def thumbnail_size (screen_width, screen_height):
+    """
+    The maximum size of the items in the assessment windows for a screen, a third of the width and half of the height of the screen.
+
+    Parameters
+    ----------
+    screen_width : int
+        The width of the screen in pixels.
+    screen_height : int
+        The height of the screen in pixels.
+
+    Returns
+    -------
+    tuple
+        The maximum width and height of the items.
+    """
+    return (screen_width * 0.9)//3, screen_height * 0.5
+
+def render_thumbnail (task):
+    """
+    Render the thumbnail of an item and write it in the store.
+
+    Parameters
+    ----------
+    task : tuple
+        The path to the item, the maximum width and height of the thumbnail, and the directory of the store.
+
+    Returns
+    -------
+    key : str
+        The key of the thumbnail in the index, see thumbnail_key.
+    entry : dict
+        The file name of the thumbnail and the modification time of the item.
+    """
+    path, width, height, store = task
+    
+    name = os.path.basename(path)
+    mtime = os.stat(path).st_mtime_ns
+    
+    if path.endswith(".pdf") :
+        image = pdf_thumbnail(path, width, height)
+    else :
+        image = image_thumbnail(path, width, height)
+    
+    #The thumbnails are lossless so the windows show the same pixels, a low compression is faster to read
+    thumbnail = name + "." + str(int(width)) + "x" + str(int(height)) + ".png"
+    image.save(os.path.join(store, thumbnail), compress_level=1)
+    
+    return thumbnail_key(name, width, height), {"thumbnail" : thumbnail, "mtime_ns" : mtime}
+
+def build_thumbnail_store (directory, screens = ((1920, 1080),), max_workers = None, force = False):
+    """
+    Render the thumbnails of all the items of a directory, the PNG images and the first page of the PDF documents,
+    in a pool of processes. The thumbnails are written in the `.ctj_thumbnails` directory with an index,
+    the assessment methods use them instead of decoding the items while the judge is waiting.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the items.
+    screens : list of tuple, optional
+        The size (width, height) of the screens of the judges, the thumbnails are rendered at the size of the windows of each screen. The default is ((1920, 1080),).
+    max_workers : int, optional
+        The number of processes. If 1, the thumbnails are rendered in the current process. If None, one process per processor. The default is None.
+    force : bool, optional
+        If True, all the thumbnails are rendered again, else only the ones of new or modified items. The default is False.
+
+    Returns
+    -------
+    index : dict
+        The index of the store, see CTJ.cache.read_index.
+    nb_rendered : int
+        The number of thumbnails rendered.
+    """
+    directory = os.path.abspath(directory)
+    store = os.path.join(directory, STORE_NAME)
+    os.makedirs(store, exist_ok=True)
+    
+    index = {} if force else dict(read_index(store))
+    
+    tasks = []
+    for name in sorted(os.listdir(directory)) :
+        path = os.path.join(directory, name)
+        if not name.endswith(EXTENSIONS) or not os.path.isfile(path) :
+            continue
+        
+        mtime = os.stat(path).st_mtime_ns
+        for screen in screens :
+            width, height = thumbnail_size(*screen)
+            entry = index.get(thumbnail_key(name, width, height))
+            if entry is None or entry["mtime_ns"] != mtime :
+                tasks.append((path, width, height, store))
+    
+    if max_workers == 1 :
+        results = [render_thumbnail(task) for task in tasks]
+    else :
+        #The thumbnails are sent by chunks to limit the communication between the processes
+        chunksize = max(1, len(tasks) // (4 * (max_workers or os.cpu_count() or 1)))
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor :
+            results = list(executor.map(render_thumbnail, tasks, chunksize=chunksize))
+    
+    index.update(results)
+    
+    #The index is replaced at once, so a window never reads a partial index
+    index_path = os.path.join(store, INDEX_NAME)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f :
+        json.dump(index, f, indent=1)
+    os.replace(index_path + ".tmp", index_path)
+    
+    return index, len(results)
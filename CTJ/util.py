@@ -5,16 +5,9 @@ Created on Wed May  1 15:56:51 2024
 @author: Romain Perrier
 """
 
+import asyncio
 import numpy as np
 
-try:
-    import tkinter as tk
-except ImportError:
-    raise Exception("tkinter is not installed, for more information refer to : https://github.com/RoPerrier/CTJ/blob/main/fix_import_error_tkinter.md")
-
-from tkinter import colorchooser
-from sklearn.preprocessing import MinMaxScaler
-
 ###############################         FUNCTIONS       ############################################
 
 def Rescale (Min,Max,estimated_values):
@@ -36,9 +29,61 @@ def Rescale (Min,Max,estimated_values):
         A list of int containing the estimated values corresponding to each item in the `items` list.
 
     """
-    scaler = MinMaxScaler(feature_range=(Min, Max))
-    estimated_values = scaler.fit_transform(np.array(estimated_values).reshape(-1, 1)).flatten().astype(type(Min)).tolist()
-    return estimated_values
+    return Rescale_rows(Min, Max, np.array(estimated_values).reshape(1, -1))[0].tolist()
+
+def Rescale_rows (Min, Max, estimated_values):
+    """
+    Rescaling the estimated values of each row between Min and Max, each row is rescaled independently.
+    The values are the same as the ones of sklearn.preprocessing.MinMaxScaler, a constant row is only shifted to Min.
+
+    Parameters
+    ----------
+    Min : int
+        The minimum value of items.
+    Max : int
+        The maximum value of items.
+    estimated_values : float array
+        Array of shape (nb_rows, nb_items) containing the estimated values of each row.
+
+    Returns
+    -------
+    estimated_values : array
+        Array of shape (nb_rows, nb_items) containing the rescaled values, of the type of Min.
+
+    """
+    estimated_values = np.asarray(estimated_values, dtype=float)
+    data_min = np.nanmin(estimated_values, axis=1, keepdims=True)
+    data_range = np.nanmax(estimated_values, axis=1, keepdims=True) - data_min
+    
+    #A constant row is not scaled
+    data_range[data_range < 10 * np.finfo(float).eps] = 1.0
+    
+    scale = (Max - Min) / data_range
+    return (estimated_values * scale + (Min - data_min * scale)).astype(type(Min))
+
+def zscore (values, axis = -1):
+    """
+    Calculate the z score of the values along an axis, as scipy.stats.zscore does, without importing scipy.stats.
+
+    Parameters
+    ----------
+    values : float array
+        The values.
+    axis : int, optional
+        The axis along which the mean and the standard deviation are calculated. The default is -1.
+
+    Returns
+    -------
+    float array
+        The z score of each value, nan if the values are constant along the axis.
+
+    """
+    values = np.asarray(values, dtype=float)
+    mean = values.mean(axis=axis, keepdims=True)
+    std = values.std(axis=axis, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (values - mean) / std
+    return np.where(std <= np.abs(np.finfo(float).eps * mean), np.nan, z)
 
 def SSR (true_values,estimated_values):
     """
@@ -67,197 +112,39 @@ def SSR (true_values,estimated_values):
         SSR=1
     return SSR
 
-def ready(window, info="", status=None):
+def run_session (session, name):
     """
-    If the assessment is done by the user, create a window to check if the user is ready
+    Run an asynchronous session in a new event loop, for the synchronous versions of the sessions.
 
     Parameters
-    ------
-    window : windowManager
-        windowManager object
-    info : string
-        A string for display information.
-    status : string 
-        Set if we are in a tutorial or not
-        
+    ----------
+    session : coroutine
+        The asynchronous session, as returned by ACJ_async, CTJ_async or Rubric_async.
+    name : string
+        The name of the asynchronous version, shown in the error.
+
     Raises
     ------
     Exception
-        The window was not destroy in the correct way.
+        An event loop is already running in this thread, as in a Jupyter notebook, a new one cannot be started.
 
     Returns
     -------
-    skip : bool
-        True if the user skip the tutorial.
+    The results of the session.
 
     """
-    def exit_program():
-        nonlocal testing
-        nonlocal BadEnding
-        testing = False
-        BadEnding = True
-            
-    def close():
-        close_button.destroy()
-        if status is not None :
-            skip_button.destroy()
-        countdown_label.config(text="The sample appear in 3 seconds...")
-        countdown(3)
-
-    def countdown(seconds):
-        nonlocal testing
-        if seconds > 0:
-            countdown_label.config(text=f"The sample appear in {seconds} seconds...")
-            window.root.after(1000, countdown, seconds - 1)
-        else:
-            testing = False
-    
-    def skip_tutorial():
-        nonlocal skip
-        nonlocal testing
-        skip = True
-        testing = False
-    
-    skip = False
-    testing = True
-    BadEnding = False
-    
-    window.create_window("Ready ?")
-
-    if status is None:
-        t = 'Next Sample'
-    else:
-        t = 'Tutorial'
-        
-    l = tk.Label(window.root, padx=10, pady=10, text=info)
-    l.config(bg=window.bgcolor)
-    l.pack()
-
-    countdown_label = tk.Label(window.root, padx=10, pady=10, text="", fg="red")
-    countdown_label.config(bg=window.bgcolor)
-    countdown_label.pack()
-
-    close_button = tk.Button(window.root, text=t, command=close)
-    close_button.pack(pady=10)
-    
-    if status is not None :
-    
-        skip_button = tk.Button(window.root, text="Skip Tutorial", command=skip_tutorial)
-        skip_button.pack(pady=10)
-    
-    window.root.protocol("WM_DELETE_WINDOW", exit_program)
+    try :
+        asyncio.get_running_loop()
+    except RuntimeError :
+        return asyncio.run(session)
     
-    while testing :
-        window.root.update()
-    for widget in window.root.winfo_children():
-        widget.destroy()
-    if BadEnding :
-        window.root.destroy()
-        raise Exception("You are not ready.. You must click on the 'Ready' button.")
-
-    return skip
-
-class WindowManager:
-    """
-    A class to manage the creation and configuration of a Tkinter window with customizable properties.
-
-    Attributes:
-    -----------
-    _root : tk.Tk or None
-        The root window of the Tkinter application. Initialized as None.
-    _bgcolor : str
-        The background color of the window, specified as a hexadecimal color code. Default is '#f0f0f0'.
-
-    Methods:
-    --------
-    root() -> tk.Tk or None:
-        Property to get the root window.
-    root(value: tk.Tk or None):
-        Property to set the root window.
-    bgcolor() -> str:
-        Property to get the background color of the window.
-    bgcolor(value: str):
-        Property to set the background color of the window.
-    change_bg_color():
-        Opens a color chooser dialog to change the background color of the window and its child widgets.
-    destroy():
-        Destroys the root window if it exists.
-    create_window(title: str):
-        Creates and configures a new root window with the specified title, or reconfigures the existing root window.
-    """
-
-    def __init__(self):
-        self._root = None
-        self._bgcolor = '#f0f0f0'
-    
-    @property
-    def root(self):
-        return self._root
-    
-    @root.setter
-    def root(self, value):
-        self._root = value
-    
-    @property
-    def bgcolor(self):
-        return self._bgcolor
-    
-    @bgcolor.setter
-    def bgcolor(self, value):
-        self._bgcolor = value
-    
-    def change_bg_color(self):
-        """
-        Opens a color chooser dialog to change the background color of the window and its child widgets.
-        Updates the background color of all frames, labels, and text widgets within the root window.
-        """
-        color = colorchooser.askcolor()[1]
-        if color:
-            self.bgcolor = color
-            self.root.config(bg=self.bgcolor)
-            for widget in self.root.winfo_children():
-                if isinstance(widget, tk.Frame) or isinstance(widget, tk.Label) or isinstance(widget, tk.Text):
-                    widget.config(bg=self.bgcolor)
-        
-    def create_window(self, title):
-        """
-        Creates and configures a new root window with the specified title.
-        If a root window already exists, it reconfigures the existing window with the new title.
-
-        Parameters:
-        -----------
-        title : str
-            The title for the Tkinter window.
-        """
-        if self.root is None:
-            self.root = tk.Tk()
-            self.root.title(title)
-            try:
-                self.root.wm_attributes("-zoomed", True)
-            except tk.TclError:
-                self.root.state('zoomed')
-            self.root.config(bg=self.bgcolor)
-            self.root.option_add("*Font", ("TkDefaultFont", 14))
-            self.root.resizable(False, False)
-            
-            menu_bar = tk.Menu(self.root)
-            self.root.config(menu=menu_bar)
-            parameters_menu = tk.Menu(menu_bar, tearoff=0)
-            menu_bar.add_cascade(label="Parameters", menu=parameters_menu)
-            parameters_menu.add_command(label="Change Background Color", command=self.change_bg_color)
-        
-            self.root.update_idletasks()
-            
-        else:
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            self.root.title(title)
-            menu_bar = tk.Menu(self.root)
-            self.root.config(menu=menu_bar)
-            parameters_menu = tk.Menu(menu_bar, tearoff=0)
-            menu_bar.add_cascade(label="Parameters", menu=parameters_menu)
-            parameters_menu.add_command(label="Change Background Color", command=self.change_bg_color)
-            
-            self.root.update_idletasks()
-            
-            
\ No newline at end of file
+    #The session is never started, it is closed to avoid the warning of a coroutine never awaited
+    session.close()
+    raise Exception("An event loop is already running (for example in Jupyter), the session cannot be run in a new one : use await " + name + "(...) instead.")
+
+def __getattr__ (name):
+    #The window functions need tkinter, they are only imported when a human assessment is done
+    if name in ("ready", "WindowManager") :
+        from . import gui
+        return getattr(gui, name)
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
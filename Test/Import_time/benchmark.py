@@ -0,0 +1,65 @@
+# Import necessary libraries
+import importlib.util
+import subprocess
+import sys
+import time
+import numpy as np
+
+# Number of cold starts to time
+nb_runs = 20
+
+def run_time (code):
+    # Time the whole process, so every module imported by the code is counted, not only the line of CTJ
+    times = []
+    for _ in range(nb_runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.median(times)
+
+def available (module):
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:
+        return False
+
+# The modules imported by `import CTJ` before the imports were made lazy
+eager_modules = ["tkinter", "PIL.ImageTk", "fitz", "sklearn.preprocessing", "scipy.stats"]
+missing = [module for module in eager_modules if not available(module)]
+eager_import = "".join("import " + module + "; " for module in eager_modules if module not in missing)
+if "tkinter" not in missing:
+    eager_import += "import CTJ.assessment_method; "
+eager_import += "import CTJ"
+
+# The start of the interpreter is timed alone and removed from the other timings
+interpreter = run_time("pass")
+timings = [("import CTJ", run_time("import CTJ")),
+           ("import CTJ and the assessment methods", run_time("import CTJ; CTJ.acj_assessment_method_image") if "tkinter" not in missing else None),
+           ("eager import, as before", run_time(eager_import))]
+
+print("Interpreter start : " + str(round(interpreter, 1)) + " ms, removed from the timings below")
+for name, timing in timings:
+    if timing is None:
+        print(name + " : skipped, tkinter is not installed")
+    else:
+        print(name + " : " + str(round(timing - interpreter, 1)) + " ms")
+if missing:
+    print("Not installed, so not counted in the eager import : " + ", ".join(missing))
+
+# Check that the algorithms run without a display, tkinter is made unavailable
+headless = """
+import sys
+sys.modules['tkinter'] = None
+import contextlib, io
+from CTJ import ACJ, CTJ, Rubric
+colors = [('black', 0), ('g1', 160), ('g2', 106), ('g3', 209), ('g4', 80), ('g5', 135), ('white', 255)]
+with contextlib.redirect_stdout(io.StringIO()):
+    for method in (ACJ, CTJ, Rubric):
+        method([0, 'black'], [255, 'white'], [color[0] for color in colors], true_values=[color[1] for color in colors], rng=0)
+print([module for module in ('PIL', 'fitz', 'sklearn', 'choix') if module in sys.modules])
+"""
+output = subprocess.run([sys.executable, "-c", headless], capture_output=True, text=True)
+if output.returncode == 0 :
+    print("Headless run : ok, heavy modules imported " + output.stdout.strip())
+else :
+    print("Headless run : failed\n" + output.stderr)
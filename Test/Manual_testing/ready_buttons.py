@@ -0,0 +1,33 @@
+# Import necessary libraries
+from CTJ.gui import WindowManager, ready
+
+# Create the window shared by the screens
+window = WindowManager()
+window.create_window("Ready ?")
+
+# The tutorial screen is shown, then skipped with its button after a short delay
+window.root.after(200, lambda: window._screens["Ready ?"].skip_button.invoke())
+skipped = ready(window, info="Tutorial", status="Tuto")
+
+# The screen of the next sample is checked while it is shown, then closed with its button
+mapped = []
+
+def check():
+    window.root.update_idletasks()
+    screen = window._screens["Ready ?"]
+    mapped.append((screen.close_button.winfo_ismapped(), screen.skip_button.winfo_ismapped()))
+    screen.close_button.invoke()
+
+window.root.after(200, check)
+next_skipped = ready(window, info="Next sample")
+
+window.root.destroy()
+
+# Only the 'Next Sample' button must be shown, the 'Skip Tutorial' button of the tutorial is gone
+print("Tutorial skipped:", skipped)
+print("Next sample skipped:", next_skipped)
+print("Buttons shown on the next sample (Next Sample, Skip Tutorial):", mapped)
+if skipped and not next_skipped and mapped == [(1, 0)]:
+    print("OK")
+else:
+    print("FAILED")
@@ -1,5 +1,5 @@
 # Import necessary libraries
-from CTJ import ACJ, CTJ
+from CTJ.simulation import simulate_ACJ, simulate_CTJ, simulate_sequential
 import pandas as pd
 import numpy as np
 
@@ -7,78 +7,76 @@ import numpy as np
 colors = [('black', 0), ('g1', 160), ('g2', 106), ('g3', 209),
            ('g4', 80), ('g5', 135), ('white', 255)]
 
-# Initialize lists to store results for ACJ and CTJ methods
-# ACJ
-errors_acj = []
-acc_acj = []
-ite_acj = []
-oc_acj = np.zeros(1000)  # Array to count occurrences of errors
-
-# ACJ with entropy
-errors_acj_E = []
-acc_acj_E = []
-ite_acj_E = []
-oc_acj_E = np.zeros(1000)  # Array to count occurrences of errors
-
-# CTJ
-errors_ctj = []
-acc_ctj = []
-ite_ctj = []
-oc_ctj = np.zeros(1000)  # Array to count occurrences of errors
-
-# Loop to perform 1000 iterations
-for j in range(1000):
-    # Perform ACJ without entropy
-    _, i, a, b, _ = ACJ(
-        [0, 'black'], [255, 'white'],
-        [color[0] for color in colors],
-        true_values=[color[1] for color in colors],
-        nb_judge=1,
-        max_accuracy=0.95,
-        max_iteration=1000,
-        sensibility=[30]
-    )
-    # Store results
-    errors_acj.append(int(b[0]))
-    acc_acj.append(a)
-    ite_acj.append(i)
-    if b[0] < 1000:
-        oc_acj[int(b[0])] += 1
-        
-    # Perform ACJ with entropy
-    _, i, a, b, _ = ACJ(
-        [0, 'black'], [255, 'white'],
-        [color[0] for color in colors],
-        true_values=[color[1] for color in colors],
-        nb_judge=1,
-        max_accuracy=0.95,
-        max_iteration=200,
-        sensibility=[30],
-        entropy=True
-    )
-    errors_acj_E.append(int(b[0]))
-    acc_acj_E.append(a)
-    ite_acj_E.append(i)
-    if b[0] < 1000:
-        oc_acj_E[int(b[0])] += 1
-      
-    # Perform CTJ
-    _, i, a, b, _ = CTJ(
-        [0, 'black'], [255, 'white'],
-        [color[0] for color in colors],
-        true_values=[color[1] for color in colors],
-        max_accuracy=0.95,
-        max_iteration=200,
-        sensibility=(30, 0, 0)
-    )
-    errors_ctj.append(int(b[0]))
-    acc_ctj.append(a)
-    ite_ctj.append(i)
-    if b[0] < 1000:
-        oc_ctj[int(b[0])] += 1
-
-    # Print the current iteration number
-    print(j)
+# Minimum and maximum number of simulated sessions for each method
+min_sessions = 100
+max_sessions = 1000
+
+# Each method is simulated until the 95% confidence intervals of the mean accuracy and of the mean number
+# of errors are narrower than 0.02 and 0.2, and the one of the mean number of iterations narrower than 30% of the mean.
+# The width of the errors is absolute: their mean is close to 0, a relative width is never reached
+widths = {"accuracy": 0.02, "iterations": 0.3, "errors": 0.2}
+relative = ["iterations"]
+
+# Random generator shared by all the simulations
+rng = np.random.default_rng()
+
+# Simulate the ACJ sessions without entropy until their means are precise enough
+_, ite_acj, acc_acj, errors_acj = simulate_sequential(
+    simulate_ACJ,
+    [0, 'black'], [255, 'white'],
+    [color[0] for color in colors],
+    [color[1] for color in colors],
+    widths=widths,
+    relative=relative,
+    min_sessions=min_sessions,
+    max_sessions=max_sessions,
+    max_accuracy=0.95,
+    max_iteration=1000,
+    sensibility=30,
+    rng=rng
+)
+# Count the occurrences of errors, the number of sessions can differ between the methods
+oc_acj = np.bincount(errors_acj[errors_acj < 1000], minlength=1000)
+
+# Simulate the ACJ sessions with entropy until their means are precise enough
+_, ite_acj_E, acc_acj_E, errors_acj_E = simulate_sequential(
+    simulate_ACJ,
+    [0, 'black'], [255, 'white'],
+    [color[0] for color in colors],
+    [color[1] for color in colors],
+    widths=widths,
+    relative=relative,
+    min_sessions=min_sessions,
+    max_sessions=max_sessions,
+    max_accuracy=0.95,
+    max_iteration=200,
+    sensibility=30,
+    entropy=True,
+    rng=rng
+)
+oc_acj_E = np.bincount(errors_acj_E[errors_acj_E < 1000], minlength=1000)
+
+# Simulate the CTJ sessions until their means are precise enough
+_, ite_ctj, acc_ctj, errors_ctj = simulate_sequential(
+    simulate_CTJ,
+    [0, 'black'], [255, 'white'],
+    [color[0] for color in colors],
+    [color[1] for color in colors],
+    widths=widths,
+    relative=relative,
+    min_sessions=min_sessions,
+    max_sessions=max_sessions,
+    max_accuracy=0.95,
+    max_iteration=200,
+    sensibility=(30, 0, 0),
+    rng=rng
+)
+errors_ctj = errors_ctj[:, 0]
+oc_ctj = np.bincount(errors_ctj[errors_ctj < 1000], minlength=1000)
+
+# Print the number of sessions simulated for each method
+sessions = [len(ite_acj), len(ite_acj_E), len(ite_ctj)]
+print("Sessions simulated (ACJ, ACJ with entropy, CTJ):", *sessions)
 
 # ACJ data processing
 data = {
@@ -144,7 +142,8 @@ data = {
     'errors_ctj': errors_ctj,
     'accuracy_ctj': acc_mean_ctj,
     'iteration_ctj': ite_mean_ctj,
-    'occurence_ctj': [oc_ctj[i] for i in errors_ctj]
+    'occurence_ctj': [oc_ctj[i] for i in errors_ctj],
+    'sessions': sessions
 }
 
 # Specify the output file name
@@ -1,38 +1,32 @@
 # Import necessary libraries
 import numpy as np
 import pandas as pd
-from CTJ import CTJ
-
-# Initialize lists to store results for the CTJ method
-errors_ctj_scale = []
-acc_ctj_scale = []
-ite_ctj_scale = []
-pb_ctj = np.zeros(1000)  # Array to count occurrences of errors
+from CTJ.simulation import simulate_CTJ, simulate_sequential
 
 # Define the colors and their corresponding values
 colors = [('black', 0), ('g1', 160), ('g2', 106), ('g3', 209),
            ('g4', 80), ('g5', 135), ('white', 255)]
 
-# Loop to perform 1000 iterations
-for j in range(1000):
-    # Perform the CTJ method
-    _, i, a, b, _ = CTJ(
-        [0, 'black'], [255, 'white'],
-        [color[0] for color in colors],
-        true_values=[color[1] for color in colors],
-        max_accuracy=0.95,
-        max_iteration=200,
-        sensibility=(0, 1, 0.5)
-    )
-    # Store results
-    errors_ctj_scale.append(int(b[1]))
-    acc_ctj_scale.append(a)
-    ite_ctj_scale.append(i)
-    # Update the occurrence counter for errors
-    if b[1] < 1000:
-        pb_ctj[int(b[1])] += 1
-    # Print the current iteration number
-    print(j)
+# Simulate between 100 and 1000 CTJ sessions, until the 95% confidence intervals of the mean accuracy and of the mean
+# number of scale errors are narrower than 0.02 and 1, and the one of the mean number of iterations narrower than 30% of the mean.
+# The width of the scale errors is absolute, as their mean can be close to 0
+_, ite_ctj_scale, acc_ctj_scale, errors = simulate_sequential(
+    simulate_CTJ,
+    [0, 'black'], [255, 'white'],
+    [color[0] for color in colors],
+    [color[1] for color in colors],
+    widths={"accuracy": 0.02, "iterations": 0.3, "scale_errors": 1},
+    relative=["iterations"],
+    min_sessions=100,
+    max_sessions=1000,
+    max_accuracy=0.95,
+    max_iteration=200,
+    sensibility=(0, 1, 0.5)
+)
+errors_ctj_scale = errors[:, 1]
+print("Sessions simulated:", len(ite_ctj_scale))
+# Count the occurrences of errors
+pb_ctj = np.bincount(errors_ctj_scale[errors_ctj_scale < 1000], minlength=1000)
 
 # Create a DataFrame to store the results
 data = {
@@ -59,6 +53,7 @@ data = {
     "accuracy": acc_mean_ctj_scale,
     "iteration": ite_mean_ctj_scale,
     "occurrence": [pb_ctj[i] for i in errors_ctj_scale],
+    "sessions": [len(ite_ctj_scale)],
 }
 
 # Write the data to a CSV file
@@ -1,11 +1,24 @@
 # Import necessary libraries
-from CTJ import ACJ, CTJ
+from CTJ.simulation import simulate_ACJ, simulate_CTJ, simulate_sequential
 import numpy as np
 
 # Define the colors and their corresponding values
 colors = [('black', 0), ('g1', 160), ('g2', 106), ('g3', 209),
            ('g4', 80), ('g5', 135), ('white', 255)]
 
+# Minimum and maximum number of simulated sessions for each threshold
+min_sessions = 100
+max_sessions = 1000
+
+# Each threshold is simulated until the 95% confidence interval of the mean accuracy is narrower
+# than 0.02 and the one of the mean number of iterations narrower than 30% of the mean.
+# The number of errors is left out: its mean is close to 0 at low thresholds, a relative width is never reached
+widths = {"accuracy": 0.02, "iterations": 0.3}
+relative = ["iterations"]
+
+# Random generator shared by all the simulations
+rng = np.random.default_rng()
+
 # Initialize lists to store results for ACJ and CTJ methods
 errors_acj = []
 acc_acj = []
@@ -19,84 +32,80 @@ errors_ctj = []
 acc_ctj = []
 ite_ctj = []
 
+# Number of sessions simulated for each threshold
+sessions_acj = []
+sessions_acj_E = []
+sessions_ctj = []
+
 # Define the sensitivity thresholds
 threesold = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 110]
 
 # Loop through each threshold
 for a in threesold:
     
-    # Temporary lists to store intermediate results for each threshold
-    errors_acj_temp = []
-    acc_acj_temp = []
-    ite_acj_temp = []
-    
-    errors_acj_E_temp = []
-    acc_acj_E_temp = []
-    ite_acj_E_temp = []
-    
-    errors_ctj_temp = []
-    acc_ctj_temp = []
-    ite_ctj_temp = []
-
-    # Repeat 1000 iterations for each threshold
-    for j in range(1000):
-        # Perform ACJ without entropy
-        _, i, ac, b, _ = ACJ(
-            [0, 'black'], [255, 'white'],
-            [color[0] for color in colors],
-            true_values=[color[1] for color in colors],
-            nb_judge=1,
-            max_accuracy=0.95,
-            max_iteration=500,
-            sensibility=[a]
-        )
-        errors_acj_temp.append(int(b[0]))
-        acc_acj_temp.append(ac)
-        ite_acj_temp.append(i)
-        
-        # Perform ACJ with entropy
-        _, i, ac, b, _ = ACJ(
-            [0, 'black'], [255, 'white'],
-            [color[0] for color in colors],
-            true_values=[color[1] for color in colors],
-            nb_judge=1, max_accuracy=0.95,
-            max_iteration=500,
-            sensibility=[a],
-            entropy=True
-        )
-        errors_acj_E_temp.append(int(b[0]))
-        acc_acj_E_temp.append(ac)
-        ite_acj_E_temp.append(i)
-        
-        # Perform CTJ
-        _, i, ac, b, _ = CTJ(
-            [0, 'black'], [255, 'white'],
-            [color[0] for color in colors],
-            true_values=[color[1] for color in colors],
-            max_accuracy=0.95,
-            max_iteration=100,
-            sensibility=(a, 0, 0)
-        )
-        errors_ctj_temp.append(int(b[0]))
-        acc_ctj_temp.append(ac)
-        ite_ctj_temp.append(i)
-        
-        # Print the current iteration and threshold
-        print(j)
-        print(a)
+    # Simulate the ACJ sessions without entropy until their means are precise enough
+    _, i, ac, b = simulate_sequential(
+        simulate_ACJ,
+        [0, 'black'], [255, 'white'],
+        [color[0] for color in colors],
+        [color[1] for color in colors],
+        widths=widths,
+        relative=relative,
+        min_sessions=min_sessions,
+        max_sessions=max_sessions,
+        max_accuracy=0.95,
+        max_iteration=500,
+        sensibility=a,
+        rng=rng
+    )
+    errors_acj.append(b.mean())
+    acc_acj.append(ac.mean())
+    ite_acj.append(i.mean())
+    sessions_acj.append(len(i))
     
-    # Calculate and store the mean results for the current threshold
-    errors_acj.append(np.array(errors_acj_temp).mean())
-    acc_acj.append(np.array(acc_acj_temp).mean())
-    ite_acj.append(np.array(ite_acj_temp).mean())
+    # Simulate the ACJ sessions with entropy until their means are precise enough
+    _, i, ac, b = simulate_sequential(
+        simulate_ACJ,
+        [0, 'black'], [255, 'white'],
+        [color[0] for color in colors],
+        [color[1] for color in colors],
+        widths=widths,
+        relative=relative,
+        min_sessions=min_sessions,
+        max_sessions=max_sessions,
+        max_accuracy=0.95,
+        max_iteration=500,
+        sensibility=a,
+        entropy=True,
+        rng=rng
+    )
+    errors_acj_E.append(b.mean())
+    acc_acj_E.append(ac.mean())
+    ite_acj_E.append(i.mean())
+    sessions_acj_E.append(len(i))
     
-    errors_acj_E.append(np.array(errors_acj_E_temp).mean())
-    acc_acj_E.append(np.array(acc_acj_E_temp).mean())
-    ite_acj_E.append(np.array(ite_acj_E_temp).mean())
+    # Simulate the CTJ sessions until their means are precise enough
+    _, i, ac, b = simulate_sequential(
+        simulate_CTJ,
+        [0, 'black'], [255, 'white'],
+        [color[0] for color in colors],
+        [color[1] for color in colors],
+        widths=widths,
+        relative=relative,
+        min_sessions=min_sessions,
+        max_sessions=max_sessions,
+        max_accuracy=0.95,
+        max_iteration=100,
+        sensibility=(a, 0, 0),
+        rng=rng
+    )
+    errors_ctj.append(b[:, 0].mean())
+    acc_ctj.append(ac.mean())
+    ite_ctj.append(i.mean())
+    sessions_ctj.append(len(i))
     
-    errors_ctj.append(np.array(errors_ctj_temp).mean())
-    acc_ctj.append(np.array(acc_ctj_temp).mean())
-    ite_ctj.append(np.array(ite_ctj_temp).mean())
+    # Print the current threshold and the number of sessions simulated for each method
+    print(a, sessions_acj[-1], sessions_acj_E[-1], sessions_ctj[-1])
 
 # Create a DataFrame to store all the results
 data = {
@@ -109,7 +118,10 @@ data = {
     'iteration_acj_Entropy': ite_acj_E,
     'number_of_errors_ctj': errors_ctj,
     'accuracy_ctj': acc_ctj,
-    'iteration_ctj': ite_ctj
+    'iteration_ctj': ite_ctj,
+    'sessions_acj': sessions_acj,
+    'sessions_acj_Entropy': sessions_acj_E,
+    'sessions_ctj': sessions_ctj
 }
 
 # Specify the output file name
@@ -121,4 +133,4 @@ with open(output_file, mode='w') as file:
         line = f"{key}:" + ",".join(map(str, values)) + "\n"
         file.write(line)
 
-print(f"Data written to {output_file}")
\ No newline at end of file
+print(f"Data written to {output_file}")
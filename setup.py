@@ -19,7 +19,6 @@ setup(
           'pillow>=10.2.0',
           'choix>=0.3.5',
           'numpy>=1.26.4',
-          'scikit_learn>=1.2.2',
           'scipy>=1.11.4',
           'setuptools>=68.2.2',
             ],